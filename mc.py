@@ -57,6 +57,18 @@ parser.add_argument("-C",
                     help="The MPF framework default config file. Default is "
                     "mpf/mpfconfig.yaml")
 
+parser.add_argument("--no-config-cache",
+                    action="store_false", dest="config_cache", default=True,
+                    help="Scans the asset folders and converts the DMD images "
+                    "without reading or writing the asset manifest and DMD "
+                    "image cache")
+
+parser.add_argument("--rebuild-config-cache",
+                    action="store_true", dest="rebuild_config_cache",
+                    default=False,
+                    help="Ignores the existing asset manifest and DMD image "
+                    "cache and rebuilds them")
+
 parser.add_argument("--version",
                     action="version", version=version.version_str,
                     help="Displays the MPF, config file, and BCP version info "
@@ -68,6 +68,28 @@ parser.add_argument("-C",
                     help="The MPF framework default config file. Default is "
                     "mpf/mpfconfig.yaml")
 
+parser.add_argument("--no-config-cache",
+                    action="store_false", dest="config_cache", default=True,
+                    help="Loads the config files and scans the asset folders "
+                    "without reading or writing the config cache and asset "
+                    "manifest")
+
+parser.add_argument("--rebuild-config-cache",
+                    action="store_true", dest="rebuild_config_cache",
+                    default=False,
+                    help="Ignores the existing config cache and asset "
+                    "manifest and rebuilds them")
+
+parser.add_argument("--profile-startup",
+                    action="store", dest="profile_startup", nargs='?',
+                    const=os.path.join("logs", datetime.now().strftime(
+                    "%Y-%m-%d-%H-%M-%S-startup-profile.json")),
+                    default=None, metavar='json_file',
+                    help="Records how long each part of MPF's startup takes "
+                    "and how much memory it uses, logs a report and writes "
+                    "it to a JSON file. Default file is "
+                    "logs/<date>-startup-profile.json")
+
 parser.add_argument("--version",
                     action="version", version=version.version_str,
                     help="Displays the MPF, config file, and BCP version info "
@@ -1,4 +1,5 @@
 __all__ = ['yaml_interface',
-           # 'json_interface',  will uncomment when ready
+           'json_interface',
+           'pickle_interface',
            # 'xml_interface',
            ]
\ No newline at end of file
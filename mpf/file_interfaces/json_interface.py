@@ -1,4 +1,4 @@
-"""Contains the JsonInterface class for reading & writing to YAML files"""
+"""Contains the JsonInterface class for reading & writing JSON files"""
 
 # json_interface.py
 # Mission Pinball Framework
@@ -40,38 +40,35 @@ class JsonInterface(FileInterface):
             except ValueError:
                 return 0
 
-    def load(self, filename, verify_version=True):
-        """Loads a YAML file from disk.
+    def load(self, filename, verify_version=True, halt_on_error=False):
+        """Loads a JSON file from disk.
 
         Args:
             filename: The file to load.
-            verify_version: Boolean which specifies whether this method should
-                verify whether this file's config_version is compatible with
-                this version of MPF. Default is True.
+            verify_version: Not used. JSON files are only used for data files,
+                which don't have a config version.
+            halt_on_error: Boolean which controls what happens if the file
+                can't be loaded. (Not found, invalid format, etc. If True, MPF
+                will raise an error and exit. If False, an empty config
+                dictionary will be returned.
 
         Returns:
-            A dictionary of the settings from this YAML file.
+            A dictionary of the settings from this JSON file.
 
         """
+        try:
+            self.log.debug("Loading JSON file: %s", filename)
 
-        config = Util.keys_to_lower(self.byteify(json.load(open(filename, 'r'))))
-
-        # if verify_version:
-        #     self.check_config_file_version(filename)
-        #
-        # try:
-        #     self.log.debug("Loading configuration file: %s", filename)
-        #     config = Util.keys_to_lower(json.loads(open(filename, 'r')))
-        # except yaml.YAMLError, exc:
-        #     if hasattr(exc, 'problem_mark'):
-        #         mark = exc.problem_mark
-        #         self.log.critical("Error found in config file %s. Line %s, "
-        #                      "Position %s", filename, mark.line+1,
-        #                      mark.column+1)
-        #         sys.exit()
-        # except:
-        #     self.log.critical("Couldn't load from file: %s", filename)
-        #     raise
+            with open(filename, 'r') as f:
+                config = Util.keys_to_lower(self.byteify(json.load(f)))
+
+        except (IOError, ValueError) as e:
+            self.log.critical("Couldn't load from file: %s. %s", filename, e)
+
+            if halt_on_error:
+                sys.exit()
+            else:
+                config = dict()
 
         return config
 
@@ -86,7 +83,8 @@ class JsonInterface(FileInterface):
             return input
 
     def save(self, filename, data):
-        pass
+        with open(filename, 'w') as output_file:
+            json.dump(data, output_file, separators=(',', ':'))
 
 file_interface_class = JsonInterface
 
@@ -0,0 +1,87 @@
+"""Contains the PickleInterface class for reading & writing binary data
+files"""
+
+# pickle_interface.py
+# Mission Pinball Framework
+# Written by Brian Madden & Gabe Knuth
+# Released under the MIT License. (See license info at the end of this file.)
+
+# Documentation and more info at http://missionpinball.com/mpf
+
+import cPickle as pickle
+import sys
+
+from mpf.system.file_manager import FileInterface
+
+
+class PickleInterface(FileInterface):
+    """Reads and writes data files in Python's binary pickle format. This is
+    much faster than YAML for large data files (like audits), but the files
+    aren't human-readable. Only use it for files that MPF writes itself."""
+
+    file_types = ['.pickle', '.pkl']
+
+    @staticmethod
+    def get_config_file_version(filename):
+        return 0
+
+    def load(self, filename, verify_version=False, halt_on_error=False):
+        """Loads a pickle file from disk.
+
+        Args:
+            filename: The file to load.
+            verify_version: Not used. Pickle files are only used for data
+                files, which don't have a config version.
+            halt_on_error: Boolean which controls what happens if the file
+                can't be loaded. If True, MPF will exit. If False, an empty
+                dictionary will be returned.
+
+        Returns:
+            The data from this file.
+
+        """
+        try:
+            self.log.debug("Loading data file: %s", filename)
+
+            with open(filename, 'rb') as f:
+                data = pickle.load(f)
+
+        except Exception as e:
+            self.log.critical("Couldn't load from file: %s. %s", filename, e)
+
+            if halt_on_error:
+                sys.exit()
+            else:
+                data = dict()
+
+        return data
+
+    def save(self, filename, data):
+        with open(filename, 'wb') as output_file:
+            pickle.dump(data, output_file, pickle.HIGHEST_PROTOCOL)
+
+file_interface_class = PickleInterface
+
+
+
+# The MIT License (MIT)
+
+# Copyright (c) 2013-2015 Brian Madden and Gabe Knuth
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
@@ -13,6 +13,12 @@ from mpf.system.config import Config
 from mpf.system.file_manager import FileInterface
 from mpf.system.utility_functions import Util
 
+try:
+    # use the libyaml C parser if it's available since it's much faster
+    from yaml import CSafeLoader as SafeLoader, CLoader as Loader
+except ImportError:
+    from yaml import SafeLoader, Loader
+
 
 class YamlInterface(FileInterface):
 
@@ -54,7 +60,15 @@ class YamlInterface(FileInterface):
             self.log.debug("Loading configuration file: %s", filename)
 
             with open(filename, 'r') as f:
-                config = Util.keys_to_lower(yaml.load(f))
+                try:
+                    config = yaml.load(f, Loader=SafeLoader)
+                except yaml.constructor.ConstructorError:
+                    # Data files written by MPF (machine vars, high scores,
+                    # etc.) contain Python object tags
+                    f.seek(0)
+                    config = yaml.load(f, Loader=Loader)
+
+            config = Util.keys_to_lower(config)
         except yaml.YAMLError, exc:
             if hasattr(exc, 'problem_mark'):
                 mark = exc.problem_mark
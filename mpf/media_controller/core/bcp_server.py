@@ -133,7 +133,7 @@ class BCPServer(threading.Thread):
             while not self.done:
                 msg = self.sending_queue.get()
 
-                if not msg.startswith('dmd_frame'):
+                if not msg.startswith(('dmd_frame', 'dmd_delta')):
                     self.log.debug('Sending "%s"', msg)
 
                 try:
@@ -23,6 +23,7 @@ from mpf.system.timing import Timing, Timer
 from mpf.system.assets import AssetManager
 from mpf.system.utility_functions import Util
 from mpf.media_controller.core.slide import Slide
+from mpf.media_controller.core.frame_renderer import FrameRenderer
 from mpf.media_controller.core.font_manager import FontManager
 from mpf.media_controller.core.slide_builder import SlideBuilder
 import mpf.media_controller.decorators
@@ -118,8 +119,11 @@ class DisplayController(object):
                            module.split('.')[0], fromlist=[''])
 
             if i.is_used(self.machine.config):
-                self.hw_module = getattr(i, module.split('.')[1])(self.machine)
-                return  # we only support one type of hw_module at a time
+                hw_module = getattr(i, module.split('.')[1])(self.machine)
+
+                # the playfield lights can be used along with the DMD
+                if not self.hw_module:
+                    self.hw_module = hw_module
 
     def _load_display_element_modules(self):
 
@@ -217,6 +221,12 @@ class MPFDisplay(object):
             taking place on this display.
         name: String name of this display. Default is 'MPFDisplay'.
         surface: Pygame surface that this display uses.
+        change_count: Integer which goes up with every update that changed
+            this display, so other things which show its contents (like the
+            VirtualDMD) can tell whether there's anything new.
+        renderer: The FrameRenderer which composes the frames of this display
+            in a worker thread if media_controller:render_thread is enabled,
+            otherwise None.
 
     """
 
@@ -259,6 +269,11 @@ class MPFDisplay(object):
         self.transition_slide = None
         self.transition_object = None
 
+        self.shown_slide = None
+        self.dirty_rects = list()
+        self.change_count = 0
+        self.renderer = None
+
         self.name = 'MPFDisplay'
 
         if not self.machine.display.default_display:
@@ -288,6 +303,10 @@ class MPFDisplay(object):
 
         self.create_blank_slide()
 
+        if self.machine.config['media_controller'].get('render_thread'):
+            self.renderer = FrameRenderer(self)
+            self.renderer.start()
+
         self.machine.timing.add(
             Timer(self.update, frequency=1/float(self.config['fps'])))
 
@@ -448,11 +467,55 @@ class MPFDisplay(object):
             return False
 
     def update(self):
-        """Updates the contents of the current slide. This method can safely
-        be called frequently.
+        """Updates the contents of the current slide (or takes the newest frame
+        from the renderer) and shows it with show_frame(). This method can
+        safely be called frequently.
+
+        Afterwards dirty_rects is the list of areas of the display which have
+        changed since the last update. It's empty if nothing changed.
 
         """
-        self.current_slide.update()
+        if self.renderer:
+            surface, self.dirty_rects = self.renderer.get_frame()
+        else:
+            self.current_slide.update()
+            self.dirty_rects = self.get_dirty_rects()
+            surface = self.current_slide.surface
+
+        if self.dirty_rects:
+            self.change_count += 1
+
+        self.show_frame(surface)
+
+    def show_frame(self, surface):
+        """Shows a frame on the actual display (window, DMD, etc.). Called by
+        update(). Display modules override this.
+
+        Args:
+            surface: The Pygame surface of the frame. Only the areas in
+                dirty_rects have changed since the last call.
+
+        """
+        pass
+
+    def get_dirty_rects(self):
+        """Returns the list of Pygame Rects of the areas of the current slide
+        which changed since the last time this method was called. (The whole
+        slide if the current slide is a different one.)"""
+        slide = self.current_slide
+        rects = slide.dirty_rects
+        slide.dirty_rects = list()
+
+        if slide is not self.shown_slide:
+            self.shown_slide = slide
+            return [slide.surface.get_rect()]
+
+        return rects
+
+    def redraw(self):
+        """Makes the next update show the whole display, e.g. after the window
+        was covered."""
+        self.shown_slide = None
 
     def get_surface(self):
         """Returns the surface of the current slide."""
@@ -486,6 +549,9 @@ class DisplayElement(object):
         y: The vertical position offset for the placement of this element.
         h_pos: The horizontal anchor.
         v_pos: The vertical anchor.
+        dmd_alpha: Boolean as to whether this element is blended onto 8-bit
+            (DMD) slides with the alpha in the high 4 bits of each pixel. See
+            Slide.blit_8bit_alpha().
 
     """
 
@@ -500,6 +566,9 @@ class DisplayElement(object):
         self.loadable_asset = False
         self.notify_when_loaded = set()
         self.loaded = False
+        self.asset = None
+        self.dmd_alpha = False
+        self.drawn_rect = None
 
         self.x = x
         self.y = y
@@ -816,6 +885,11 @@ class DisplayElement(object):
         self.slide = None
         self.element_surface = None
 
+        if self.asset:
+            # the asset can be unloaded now if nothing else is using it
+            self.asset.asset_manager.release(self.asset)
+            self.asset = None
+
 class Decorator(object):
     """Parent class of all Decorators."""
 
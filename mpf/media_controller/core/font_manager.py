@@ -9,9 +9,16 @@
 
 import logging
 import os
+from collections import OrderedDict
 
 import pygame
 
+from mpf.system.utility_functions import Util
+
+
+GLYPH_ATLAS_CHARS = '0123456789,. '
+"""Characters which text rendered with the glyph atlas can contain."""
+
 
 class FontManager(object):
     """Parent class of the Font Manager.
@@ -22,6 +29,11 @@ class FontManager(object):
 
     Attributes:
         font_cache: Dictionary of Pygame font rendering objects.
+        render_cache: OrderedDict of rendered & cropped text surfaces, least
+            recently used first. Its size is limited by the
+            media_controller:text_render_cache setting.
+        glyph_atlases: Dictionary of pre-rendered glyph surfaces for the
+            glyph atlas mode, keyed by the font settings.
 
     """
 
@@ -33,23 +45,85 @@ class FontManager(object):
         self.config = config
         self.font_cache = dict()
 
+        self.render_cache = OrderedDict()
+        self.render_cache_bytes = 0
+        self.render_cache_max = Util.string_to_bytes(
+            self.machine.config['media_controller'].get('text_render_cache'))
+        self.glyph_atlases = dict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
         # todo add setting to preload them?
         # todo add setting to fail if font/size combo not found
 
     def render(self, text, font='default', antialias=False, size=None,
                color=None, bg_color=None, alpha_color=None,
-               alpha_channel=None, **kwargs):
+               alpha_channel=None, glyph_atlas=False, **kwargs):
+        """Renders a string of text and returns the cropped surface.
+
+        Rendered surfaces are cached (least recently used first out), so
+        rendering the same text with the same settings again is just a
+        lookup. The returned surface can be shared, so don't draw on it.
+
+        Args:
+            text: The string to render.
+            font: String name of the font from the fonts: config.
+            antialias: Boolean as to whether the text is antialiased.
+            size: Optional size, overriding the size of the font config.
+            color: The text color.
+            bg_color: The background color. Default is None, which means a
+                transparent background.
+            glyph_atlas: Boolean which builds strings which only contain
+                digits and number separators (like scores) from individually
+                rendered glyphs instead of rendering the whole string. This
+                doesn't apply kerning, so it's best for fonts with fixed
+                width digits. Default is False.
+
+        """
+        if isinstance(color, list):
+            color = tuple(color)
+
+        if isinstance(bg_color, list):
+            bg_color = tuple(bg_color)
+
+        key = (text, font, size, color, bg_color, antialias, glyph_atlas)
+
+        try:
+            surface = self.render_cache.pop(key)
+            self.render_cache[key] = surface
+            self.hits += 1
+            return surface
+        except KeyError:
+            self.misses += 1
+
+        surface = None
+
+        if glyph_atlas and text and not text.strip(GLYPH_ATLAS_CHARS):
+            surface = self._render_from_atlas(text, font, antialias, size,
+                                              color, bg_color)
+
+        if not surface:
+            surface = self._render(text, font, antialias, size, color,
+                                   bg_color)
+
+        surface = self._crop(surface, font)
+        self._add_to_render_cache(key, surface)
 
+        return surface
+
+    def _render(self, text, font, antialias, size, color, bg_color):
         font_obj = self.get_font(font, size)
 
         if bg_color is not None:
-            surface = font_obj.render(text, antialias, color, bg_color)
+            return font_obj.render(text, antialias, color, bg_color)
         else:
-            surface = font_obj.render(text, antialias, color)
+            return font_obj.render(text, antialias, color)
 
         # if alpha, do something to the surface # todo
 
-        # crop the surface
+    def _crop(self, surface, font):
         start_y = 0
         end_y = surface.get_height()
 
@@ -61,6 +135,78 @@ class FontManager(object):
 
         return surface.subsurface((0, start_y, surface.get_width(), end_y))
 
+    def _render_from_atlas(self, text, font, antialias, size, color, bg_color):
+        # Builds the text from the glyph surfaces of its characters. Returns
+        # None for glyphs with per-pixel alpha, since they can't be copied
+        # onto another transparent surface with a plain blit.
+        atlas_key = (font, size, color, bg_color, antialias)
+
+        if atlas_key not in self.glyph_atlases:
+            self.glyph_atlases[atlas_key] = dict(
+                (char, self._render(char, font, antialias, size, color,
+                                    bg_color))
+                for char in GLYPH_ATLAS_CHARS)
+
+        glyphs = self.glyph_atlases[atlas_key]
+        first_glyph = glyphs[text[0]]
+
+        if first_glyph.get_flags() & pygame.SRCALPHA:
+            return None
+
+        surface = pygame.Surface(
+            (sum(glyphs[char].get_width() for char in text),
+             first_glyph.get_height()), 0, first_glyph)
+
+        if surface.get_bytesize() == 1:
+            surface.set_palette(first_glyph.get_palette())
+
+        colorkey = first_glyph.get_colorkey()
+
+        if colorkey:
+            surface.set_colorkey(colorkey)
+            surface.fill(colorkey)
+        elif bg_color is not None:
+            surface.fill(bg_color)
+
+        x = 0
+
+        for char in text:
+            surface.blit(glyphs[char], (x, 0))
+            x += glyphs[char].get_width()
+
+        return surface
+
+    def _add_to_render_cache(self, key, surface):
+        if not self.render_cache_max:
+            return
+
+        # a subsurface shares the memory of the whole rendered surface
+        parent = surface.get_parent() or surface
+        size = parent.get_pitch() * parent.get_height()
+
+        if size > self.render_cache_max:
+            return
+
+        self.render_cache[key] = surface
+        self.render_cache_bytes += size
+
+        while self.render_cache_bytes > self.render_cache_max:
+            _, old_surface = self.render_cache.popitem(last=False)
+            parent = old_surface.get_parent() or old_surface
+            self.render_cache_bytes -= parent.get_pitch() * parent.get_height()
+            self.evictions += 1
+
+    def get_render_stats(self):
+        """Returns a dictionary of the text render cache statistics: the
+        number of ``entries``, the ``bytes`` they use, the ``max`` bytes, and
+        the ``hits``, ``misses`` and ``evictions``."""
+        return dict(entries=len(self.render_cache),
+                    bytes=self.render_cache_bytes,
+                    max=self.render_cache_max,
+                    hits=self.hits,
+                    misses=self.misses,
+                    evictions=self.evictions)
+
     def metrics(self, text, font='default', size=None, **kwargs):
         """
 
@@ -0,0 +1,218 @@
+"""Contains the FrameRenderer class which composes the frames of a display in
+a worker thread."""
+# frame_renderer.py
+# Mission Pinball Framework
+# Written by Brian Madden & Gabe Knuth
+# Released under the MIT License. (See license info at the end of this file.)
+
+# Documentation and more info at http://missionpinball.com/mpf
+
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from mpf.media_controller.core.slide import add_dirty_rect
+
+
+class FrameRenderer(threading.Thread):
+    """Composes the frames of a display in a worker thread, so the main thread
+    only has to show them.
+
+    At the display's fps, the worker updates the display's current slide and
+    copies the areas which changed into the back one of two frame buffers,
+    which then becomes the next frame. The main thread takes it with
+    get_frame() when it updates the display. It never waits for a frame to
+    be composed, and the worker never writes to the buffer which is shown.
+
+    If the main thread hasn't taken the previous frame yet when the next one
+    is composed, the slide is still updated (so animations keep their pace)
+    but the frame is dropped, and the areas which changed are added to the
+    next one.
+
+    The slides are only updated while the worker holds the media controller's
+    render_lock. The main thread holds it while it processes BCP commands and
+    ticks, since those are what change the slides.
+
+    Args:
+        display: The MPFDisplay this renderer composes the frames of.
+
+    """
+
+    def __init__(self, display):
+        super(FrameRenderer, self).__init__(
+            name='FrameRenderer.' + display.name)
+        self.daemon = True
+
+        self.display = display
+        self.machine = display.machine
+        self.log = logging.getLogger('FrameRenderer.' + display.name)
+        self.secs_per_frame = 1.0 / display.config['fps']
+        self.done = False
+
+        surface = display.current_slide.surface
+        self.buffers = [surface.copy(), surface.copy()]
+        self.missing_rects = [list(), list()]  # areas a buffer is behind on
+        self.front = 0
+        self.ready = None
+        self.ready_rects = list()
+        self.pending_rects = list()
+        self.swap_lock = threading.Lock()
+
+        self.stats = None
+        self._reset_stats()
+
+    def run(self):
+        next_frame_time = time.time()
+
+        try:
+            while not self.done:
+                delay = next_frame_time - time.time()
+
+                if delay > 0:
+                    time.sleep(delay)
+
+                self.render_frame()
+
+                next_frame_time += self.secs_per_frame
+
+                if next_frame_time < time.time():
+                    # Too far behind. Skip the missed frames.
+                    next_frame_time = time.time() + self.secs_per_frame
+
+        except Exception:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value,
+                                               exc_traceback)
+            msg = ''.join(line for line in lines)
+            self.machine.crash_queue.put(msg)
+
+    def stop(self):
+        """Stops the worker thread after the frame it's working on."""
+        self.done = True
+
+    def render_frame(self):
+        """Updates the current slide and copies the areas which changed into
+        the back buffer. Called by the worker thread."""
+        start_time = time.time()
+
+        with self.machine.render_lock:
+            lock_time = time.time()
+
+            self.display.current_slide.update()
+
+            for rect in self.display.get_dirty_rects():
+                add_dirty_rect(self.pending_rects, rect)
+
+            if not self.pending_rects:
+                self._add_stats(start_time, lock_time)
+                return
+
+            if self.ready is not None:
+                # The main thread hasn't taken the last frame yet.
+                self.stats['dropped'] += 1
+                self._add_stats(start_time, lock_time)
+                return
+
+            back = 1 - self.front
+            rects = self.pending_rects
+            self.pending_rects = list()
+
+            for rect in rects:
+                add_dirty_rect(self.missing_rects[back], rect)
+
+            for rect in self.missing_rects[back]:
+                self.buffers[back].blit(self.display.current_slide.surface,
+                                        rect, area=rect)
+
+        self.missing_rects[back] = list()
+
+        for rect in rects:
+            add_dirty_rect(self.missing_rects[self.front], rect)
+
+        with self.swap_lock:
+            self.ready = back
+            self.ready_rects = rects
+
+        self.stats['frames'] += 1
+        self._add_stats(start_time, lock_time)
+
+    def get_frame(self):
+        """Takes the newest finished frame. Called by the display in the main
+        thread.
+
+        Returns: A tuple of the surface to show and the list of Pygame Rects
+            of the areas which changed since the last frame that was taken.
+            The surface is the last frame again (and the list is empty) if
+            there's no new frame. The surface is not changed until the next
+            call.
+
+        """
+        with self.swap_lock:
+            if self.ready is None:
+                return self.buffers[self.front], list()
+
+            self.front = self.ready
+            self.ready = None
+
+            return self.buffers[self.front], self.ready_rects
+
+    def _add_stats(self, start_time, lock_time):
+        end_time = time.time()
+
+        self.stats['updates'] += 1
+        self.stats['lock_secs'] += lock_time - start_time
+        self.stats['render_secs'] += end_time - lock_time
+        self.stats['max_render_secs'] = max(self.stats['max_render_secs'],
+                                            end_time - lock_time)
+
+        self._report_stats()
+
+    def _reset_stats(self):
+        self.stats = dict(updates=0, frames=0, dropped=0, lock_secs=0.0,
+                          render_secs=0.0, max_render_secs=0.0,
+                          start_time=time.time())
+
+    def _report_stats(self):
+        # Logs the frame rate and times every 10 secs
+
+        elapsed = time.time() - self.stats['start_time']
+
+        if elapsed < 10.0:
+            return
+
+        self.log.debug("%.1f frames/sec (%.1f dropped), %.2fms avg / %.2fms "
+                       "max per frame, %.2fms avg waiting for the render lock",
+                       self.stats['frames'] / elapsed,
+                       self.stats['dropped'] / elapsed,
+                       (self.stats['render_secs'] * 1000 /
+                        self.stats['updates']),
+                       self.stats['max_render_secs'] * 1000,
+                       self.stats['lock_secs'] * 1000 / self.stats['updates'])
+
+        self._reset_stats()
+
+
+
+# The MIT License (MIT)
+
+# Copyright (c) 2013-2015 Brian Madden and Gabe Knuth
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
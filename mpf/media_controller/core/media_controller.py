@@ -6,9 +6,12 @@
 
 # Documentation and more info at http://missionpinball.com/mpf
 
+import hashlib
 import logging
 import os
+import shutil
 import sys
+import threading
 import time
 from distutils.version import LooseVersion
 import Queue
@@ -18,6 +21,7 @@ import pygame
 
 from mpf.media_controller.core import *
 from mpf.media_controller.core.bcp_server import BCPServer
+from mpf.system.asset_manifest import AssetManifest
 from mpf.system.config import Config, CaseInsensitiveDict
 from mpf.system.events import EventManager
 from mpf.system.timing import Timing
@@ -26,6 +30,7 @@ from mpf.system.player import Player
 from mpf.system.assets import AssetManager
 from mpf.system.utility_functions import Util
 from mpf.system.file_manager import FileManager
+from mpf.system.startup_profiler import StartupProfiler
 import mpf.system.bcp as bcp
 import version
 
@@ -58,6 +63,7 @@ class MediaController(object):
         self.log.debug("32-bit Python? %s", sys.maxsize < 2**32)
 
         self.active_debugger = dict()
+        self.startup_profiler = StartupProfiler()
 
         self.config = dict()
         self.done = False  # todo
@@ -79,6 +85,10 @@ class MediaController(object):
         self.HZ = 0
         self.next_tick_time = 0
         self.secs_per_tick = 0
+        self.loop_stats = None
+        self._reset_loop_stats()
+        self._wakeup_processed = threading.Event()
+        self.render_lock = threading.RLock()
         self.machine_vars = CaseInsensitiveDict()
         self.machine_var_monitor = False
         self.tick_num = 0
@@ -100,6 +110,7 @@ class MediaController(object):
                              'machine_variable': self.bcp_machine_variable,
                              'mode_start': self.bcp_mode_start,
                              'mode_stop': self.bcp_mode_stop,
+                             'ping': self.bcp_ping,
                              'player_added': self.bcp_player_add,
                              'player_score': self.bcp_player_score,
                              'player_turn_start': self.bcp_player_turn_start,
@@ -138,15 +149,41 @@ class MediaController(object):
 
         self.log.info("Machine folder: %s", machine_path)
 
+        if self.options.get('config_cache', True):
+            self.asset_manifest = AssetManifest(
+                filename=os.path.join('cache', 'mc_assets_{}.cache'.format(
+                    hashlib.md5(self.machine_path).hexdigest()[:12])),
+                rebuild=self.options.get('rebuild_config_cache', False))
+
+            # images converted for the DMD, keyed by their content
+            self.dmd_cache_path = os.path.abspath(os.path.join('cache', 'dmd'))
+
+            if (self.options.get('rebuild_config_cache', False) and
+                    os.path.isdir(self.dmd_cache_path)):
+                self.log.info("Rebuilding the DMD image cache")
+                shutil.rmtree(self.dmd_cache_path, ignore_errors=True)
+
+            if not os.path.isdir(self.dmd_cache_path):
+                os.makedirs(self.dmd_cache_path)
+        else:
+            self.asset_manifest = None
+            self.dmd_cache_path = None
+
         mediacontroller_config_spec = '''
                         exit_on_disconnect: boolean|True
                         port: int|5050
+                        asset_loader_threads: int|2
+                        text_render_cache: str|2MB
+                        render_thread: boolean|False
                         '''
 
         self.config['media_controller'] = (
             Config.process_config(mediacontroller_config_spec,
                                   self.config['media_controller']))
 
+        AssetManager.num_loader_threads = (
+            self.config['media_controller']['asset_loader_threads'])
+
         self.events = EventManager(self, setup_event_player=False)
         self.timing = Timing(self)
 
@@ -177,6 +214,9 @@ class MediaController(object):
         self.events.post("init_phase_5")
         self.events._process_event_queue()
 
+        if self.asset_manifest:
+            self.asset_manifest.save()
+
         self.reset()
 
     def _load_mc_config(self):
@@ -372,10 +412,22 @@ class MediaController(object):
         dmd_string = 'dmd_frame?' + data
         self.sending_queue.put(dmd_string)
 
+    def send_dmd_delta(self, delta):
+        """Sends the changes since the last DMD frame to the BCP client.
+
+        Args:
+            delta: A raw byte string created by bcp.encode_dmd_delta().
+        """
+
+        dmd_string = ('dmd_delta?' + bcp.DMD_DELTA_LENGTH.pack(len(delta)) +
+                      delta)
+        self.sending_queue.put(dmd_string)
+
     def _timer_init(self):
         self.HZ = 30
         self.next_tick_time = time.time()
         self.secs_per_tick = 1.0 / self.HZ
+        self._reset_loop_stats()
 
     def timer_tick(self):
         """Called by the platform each machine tick based on self.HZ"""
@@ -387,7 +439,15 @@ class MediaController(object):
         self.events._process_event_queue()
 
     def run(self):
-        """Main run loop."""
+        """Main run loop.
+
+        The loop blocks on the BCP receive queue, so it sleeps until either a
+        BCP command arrives or a wake-up thread signals that the next tick is
+        due. A tick (which runs the timers and updates the displays) that's
+        due always runs before the next BCP command, so a burst of BCP
+        commands can't delay a frame.
+
+        """
         self._timer_init()
 
         self.log.info("Starting the run loop at %sHz", self.HZ)
@@ -395,21 +455,26 @@ class MediaController(object):
         start_time = time.time()
         loops = 0
 
-        secs_per_tick = self.secs_per_tick
-
         self.next_tick_time = time.time()
 
+        wakeup_thread = threading.Thread(target=self._post_wakeups,
+                                         name='MC wake-ups')
+        wakeup_thread.daemon = True
+        wakeup_thread.start()
+
         try:
             while self.done is False:
-                time.sleep(0.001)
-
-                self.get_from_queue()
+                message = self.receive_queue.get()
 
-                if self.next_tick_time <= time.time():  # todo change this
-                    self.timer_tick()
-                    self.next_tick_time += secs_per_tick
+                if self.next_tick_time <= time.time():
+                    self._tick()
                     loops += 1
 
+                if message is None:
+                    self._wakeup_processed.set()
+                else:
+                    self._process_message(message)
+
             self._do_shutdown()
             self.log.info("Target loop rate: %s Hz", self.HZ)
             self.log.info("Actual loop rate: %s Hz",
@@ -418,6 +483,74 @@ class MediaController(object):
         except KeyboardInterrupt:
             self.shutdown()
 
+    def _post_wakeups(self):
+        # Runs in its own thread and puts a None into the receive queue when
+        # the next tick is due, which wakes up the run loop. There's only one
+        # of them in the queue at a time.
+        while self.done is False:
+            delay = self.next_tick_time - time.time()
+
+            if delay > 0:
+                time.sleep(delay)
+
+            self._wakeup_processed.clear()
+            self.receive_queue.put(None)
+            self._wakeup_processed.wait()
+
+    def _tick(self):
+        start_time = time.time()
+
+        with self.render_lock:
+            self.timer_tick()
+
+        end_time = time.time()
+
+        stats = self.loop_stats
+        stats['ticks'] += 1
+        stats['tick_secs'] += end_time - start_time
+        stats['max_tick_secs'] = max(stats['max_tick_secs'],
+                                     end_time - start_time)
+        stats['max_tick_delay'] = max(stats['max_tick_delay'],
+                                      start_time - self.next_tick_time)
+
+        self.next_tick_time += self.secs_per_tick
+
+        if self.next_tick_time < end_time:
+            # Too far behind. Skip the missed ticks instead of running them
+            # all at once.
+            self.next_tick_time = end_time + self.secs_per_tick
+
+        self._report_loop_stats()
+
+    def _reset_loop_stats(self):
+        self.loop_stats = dict(ticks=0, tick_secs=0.0, max_tick_secs=0.0,
+                               max_tick_delay=0.0, bcp_commands=0,
+                               bcp_secs=0.0, max_bcp_secs=0.0,
+                               start_time=time.time())
+
+    def _report_loop_stats(self):
+        # Logs the frame time and BCP processing time every 10 secs
+
+        stats = self.loop_stats
+        elapsed = time.time() - stats['start_time']
+
+        if elapsed < 10.0 or not stats['ticks']:
+            return
+
+        self.log.debug("Run loop: %.1f ticks/sec, %.2fms avg / %.2fms max "
+                       "per tick, %.2fms max tick delay, %.1f BCP commands/sec"
+                       ", %.2fms avg / %.2fms max per command",
+                       stats['ticks'] / elapsed,
+                       stats['tick_secs'] * 1000 / stats['ticks'],
+                       stats['max_tick_secs'] * 1000,
+                       stats['max_tick_delay'] * 1000,
+                       stats['bcp_commands'] / elapsed,
+                       (stats['bcp_secs'] * 1000 /
+                        max(stats['bcp_commands'], 1)),
+                       stats['max_bcp_secs'] * 1000)
+
+        self._reset_loop_stats()
+
     def shutdown(self):
         """Shuts down and exits the media controller.
 
@@ -427,6 +560,12 @@ class MediaController(object):
         self.socket_thread.stop()
 
     def _do_shutdown(self):
+        # the frame renderers have to finish before pygame goes away
+        for display in self.display.displays.values():
+            if display.renderer:
+                display.renderer.stop()
+                display.renderer.join()
+
         if self.pygame:
             pygame.quit()
 
@@ -444,10 +583,30 @@ class MediaController(object):
     def get_from_queue(self):
         """Gets and processes all queued up incoming BCP commands."""
         while not self.receive_queue.empty():
-            cmd, kwargs = bcp.decode_command_string(
-                self.receive_queue.get(False))
+            message = self.receive_queue.get(False)
+
+            if message is None:
+                # let _post_wakeups() know its wake-up was taken off the queue
+                self._wakeup_processed.set()
+            else:
+                self._process_message(message)
+
+    def _process_message(self, message):
+        start_time = time.time()
+
+        cmd, kwargs = bcp.decode_command_string(message)
+
+        # BCP commands can change the slides, so any frame renderers have to
+        # wait until they're done
+        with self.render_lock:
             self._process_command(cmd, **kwargs)
 
+        secs = time.time() - start_time
+        self.loop_stats['bcp_commands'] += 1
+        self.loop_stats['bcp_secs'] += secs
+        self.loop_stats['max_bcp_secs'] = max(self.loop_stats['max_bcp_secs'],
+                                              secs)
+
     def bcp_hello(self, **kwargs):
         """Processes an incoming BCP 'hello' command."""
         try:
@@ -460,6 +619,19 @@ class MediaController(object):
             self.log.warning("Received invalid 'version' parameter with "
                              "'hello'")
 
+    def bcp_ping(self, timestamp, **kwargs):
+        """Processes an incoming BCP 'ping' command by sending back a 'pong'
+        with the same timestamp and the depths of the BCP queues.
+
+        Since this is processed in order with all the other incoming commands,
+        the pinball controller can use the round trip time and the queue
+        depths to see how far behind the media controller is.
+
+        """
+        self.send('pong', timestamp=timestamp,
+                  receive_queue=self.receive_queue.qsize(),
+                  send_queue=self.sending_queue.qsize())
+
     def bcp_goodbye(self, **kwargs):
         """Processes an incoming BCP 'goodbye' command."""
         if self.config['media_controller']['exit_on_disconnect']:
@@ -681,28 +853,28 @@ class MediaController(object):
         if self.tick_num % 5 != 0:
             return
 
-        if AssetManager.total_assets or self._pc_total_assets:
+        mc_remaining = AssetManager.get_pending_count()
+
+        total = AssetManager.total_assets + self._pc_total_assets
+
+        if total:
             # max because this could go negative at first
-            percent = max(0, int(float(AssetManager.total_assets -
-                                       self._pc_assets_to_load -
-                                       AssetManager.loader_queue.qsize()) /
-                                       AssetManager.total_assets * 100))
+            percent = max(0, int(float(total - self._pc_assets_to_load -
+                                       mc_remaining) / total * 100))
         else:
             percent = 100
 
         self.log.debug("Asset Loading Counter. PC remaining:{}, MC remaining:"
                        "{}, Percent Complete: {}".format(
-                       self._pc_assets_to_load, AssetManager.loader_queue.qsize(),
-                       percent))
+                       self._pc_assets_to_load, mc_remaining, percent))
 
         self.events.post('asset_loader',
-                         total=AssetManager.loader_queue.qsize() +
-                               self._pc_assets_to_load,
+                         total=mc_remaining + self._pc_assets_to_load,
                          pc=self._pc_assets_to_load,
-                         mc=AssetManager.loader_queue.qsize(),
+                         mc=mc_remaining,
                          percent=percent)
 
-        if not AssetManager.loader_queue.qsize():
+        if not mc_remaining:
 
             if not self.pc_connected:
                 self.events.post("waiting_for_client_connection")
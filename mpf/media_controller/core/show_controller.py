@@ -264,6 +264,7 @@ class ShowController(object):
 class Show(Asset):
 
     load_priority = 50  # lower than default (100) so shows go second
+    file_manager_asset = True
 
     def __init__(self, machine, config, file_name, asset_manager, actions=None):
         if not actions:
@@ -17,6 +17,65 @@ try:
 except ImportError:
     pass
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _create_8bit_alpha_table():
+    # The result of every source pixel (shade in the low 4 bits, alpha in the
+    # high 4 bits) blended onto every destination shade, as a flat string
+    # which is indexed with source * 16 + destination.
+    table = bytearray(256 * 16)
+
+    for source in range(256):
+        shade = source & 0x0f
+        alpha = (source >> 4) / 15.0
+
+        for dest in range(16):
+            table[source * 16 + dest] = int(dest + (shade - dest) * alpha + .5)
+
+    return str(table)
+
+
+ALPHA_TABLE = _create_8bit_alpha_table()
+
+if numpy:
+    ALPHA_ARRAY = numpy.frombuffer(ALPHA_TABLE, dtype=numpy.uint8).reshape(
+        256, 16)
+
+
+def add_dirty_rect(rects, rect):
+    """Adds a Pygame Rect to a list of dirty rects, merging it with the ones
+    it overlaps so no area is in the list twice."""
+    i = rect.collidelist(rects)
+
+    while i != -1:
+        rect = rect.union(rects.pop(i))
+        i = rect.collidelist(rects)
+
+    rects.append(rect)
+
+
+def blend_8bit_alpha(source, dest):
+    """Blends a string of 8-bit DMD-style alpha pixels onto a string of
+    destination shades (see Slide.blit_8bit_alpha()) and returns the result as
+    a string of shades.
+
+    This is the version which is used if NumPy isn't installed. It looks up
+    every pixel in a precalculated table.
+
+    """
+    table = ALPHA_TABLE
+    dest = bytearray(dest)
+
+    for i, pixel in enumerate(bytearray(source)):
+        dest[i] = table[(pixel << 4) | (dest[i] & 0x0f)]
+
+    return str(dest)
+
+
 class Slide(object):
     """Parent class for a Slide object.
 
@@ -57,6 +116,8 @@ class Slide(object):
         palette: The Pygame palette this slide uses. (8-bit only)
         expire_ms: Integer of ms that will cause this slide to automatically
             remove itself. The timer doesn't start until the slide is shown.
+        dirty_rects: List of Pygame Rects of the areas of the surface which
+            have changed since the display last showed this slide.
 
     """
 
@@ -93,6 +154,11 @@ class Slide(object):
         """List of callback/kwarg tuples which will be called when all the
         elements of this slide are ready to be shown."""
 
+        self.dirty_rects = list()
+        self._invalid_rects = list()
+        """Areas which have to be composited again even though no element
+        there has changed, e.g. where an element was removed."""
+
         # todo make priority a property with a setter that will show/hide the
         # slide if needed when it changes?
 
@@ -142,24 +208,79 @@ class Slide(object):
         self.ready_callbacks = list()
 
     def update(self):
-        """Updates this slide by calling each display element's update() method,
-        and blits the results if there's an update.
+        """Updates this slide by calling each display element's update() method.
+
+        Only the areas of the elements which changed (where they are now and
+        where they were drawn before) are composited again, from the
+        background and all the elements in those areas, lowest layer first.
+        These areas are added to dirty_rects.
         """
         if self.pending_elements:
             return
 
-        force_dirty = False
-
         if self not in self.mpfdisplay.slides:
             return
 
+        rects = self._invalid_rects
+        self._invalid_rects = list()
+        updated_elements = list()
+
         for element in self.elements:
 
             if element.update():
-                self.surface.blit(element.surface, element.rect)
-                force_dirty = True
-            elif force_dirty:
-                self.surface.blit(element.surface, element.rect)
+                updated_elements.append(element)
+
+                if element.rect:
+                    add_dirty_rect(rects, element.rect)
+
+                if element.drawn_rect:
+                    add_dirty_rect(rects, element.drawn_rect)
+
+        for rect in rects:
+            self._composite(rect)
+            add_dirty_rect(self.dirty_rects, rect)
+
+        for element in updated_elements:
+            if element.rect:
+                element.drawn_rect = pygame.Rect(element.rect)
+
+    def _composite(self, rect):
+        # draws everything in this area of the slide again
+        rect = rect.clip(self.surface.get_rect())
+
+        if not rect.width or not rect.height:
+            return
+
+        self.surface.blit(self.mpfdisplay.surface, rect, area=rect)
+
+        for element in self.elements:
+            if (element.rect and element.opacity and
+                    element.rect.colliderect(rect)):
+                self._blit_element(element, rect)
+
+    def _blit_element(self, element, area):
+        rect = element.rect.clip(area)
+        source_rect = rect.move(-element.rect.x, -element.rect.y)
+
+        if element.dmd_alpha and self.depth == 8:
+            self.blit_8bit_alpha(element.surface.subsurface(source_rect),
+                                 self.surface, rect.x, rect.y)
+        else:
+            self.surface.blit(element.surface, rect, area=source_rect)
+
+    def mark_dirty(self, rect=None):
+        """Marks an area of this slide as changed, so the display shows it
+        again even though no element there was updated.
+
+        Args:
+            rect: Pygame Rect of the area. Default is None which marks the
+                whole slide.
+
+        """
+        if not rect:
+            rect = self.surface.get_rect()
+
+        add_dirty_rect(self.dirty_rects, rect)
 
     def get_subsurface(self, rect, layer=0):
         """Returns a surface of the slide based on the rect passed, but only for
@@ -197,36 +318,46 @@ class Slide(object):
                 will be blitted to on the destination surface.
             y: y position (goes with `x` above)
 
-        Note this blit is expensive, so it's only used when it's specifically
-        called for.
-        """
+        The low 4 bits of each source pixel are its shade and the high 4 bits
+        are its alpha, from 0 (transparent) to 15 (opaque). Each destination
+        pixel is set to:
 
-        working_surface = dest_surface.subsurface((x, y,
-                                                   source_surface.get_width(),
-                                                   source_surface.get_height()))
+            dest + (source_shade - dest) * source_alpha / 15
+
+        The results for all 4096 combinations are precalculated, so with NumPy
+        this is a single table lookup over surfarray views of both surfaces.
+        Without NumPy it's a lookup per pixel, which is still fast enough for
+        DMD-sized elements. This is used for the elements which have
+        ``dmd_alpha: yes`` in their settings.
+        """
+        rect = pygame.Rect((x, y), source_surface.get_size()).clip(
+            dest_surface.get_rect())
 
-        dest_pa = pygame.PixelArray(working_surface)
-        source_pa = pygame.PixelArray(source_surface)
+        if not rect.width or not rect.height:
+            return
 
-        for y in range(len(working_surface.get_height())):
-            for x in range(len(working_surface.get_width())):
+        source_surface = source_surface.subsurface(
+            (rect.x - x, rect.y - y, rect.width, rect.height))
+        working_surface = dest_surface.subsurface(rect)
 
-                # This blend formula is complex, so here's how it was worked out
+        if numpy:
+            source_array = pygame.surfarray.pixels2d(source_surface)
+            dest_array = pygame.surfarray.pixels2d(working_surface)
 
-                # alpha_percet = (source_pa[x, y] >> 4) / 15.0
-                # delta = source_pa[x, y] - dest_pa[x, y]
-                # change = delta * alpha_percent
-                # new_value = dest_pa[x, y] + change
-                # dest_pa[x, y] = new_value
+            dest_array[...] = ALPHA_ARRAY[source_array, dest_array & 0x0f]
 
-                # now here they all are on one line
+            # the surfaces stay locked until the arrays are gone
+            del source_array
+            del dest_array
 
-                dest_pa[x, y] = (dest_pa[x, y] +
-                                 ((source_pa[x, y] - dest_pa[x, y]) *
-                                  (source_pa[x, y] >> 4) / 15.0))
+        else:
+            shades = blend_8bit_alpha(
+                pygame.image.tostring(source_surface, 'P'),
+                pygame.image.tostring(working_surface, 'P'))
 
-        del dest_pa
-        del source_pa
+            shade_surface = pygame.image.fromstring(shades, rect.size, 'P')
+            shade_surface.set_palette(self.palette)
+            working_surface.blit(shade_surface, (0, 0))
 
     def add_element(self, element_type, name=None, x=None, y=None, h_pos=None,
                     v_pos=None, text_variables=None, **kwargs):
@@ -278,6 +409,8 @@ class Slide(object):
                                 text_variables=text_variables,
                                 **kwargs)
 
+        element.dmd_alpha = kwargs.get('dmd_alpha', False)
+
         if not element.ready:
             self.log.debug("Element is not ready. Adding to pending elements "
                            "list. %s", element)
@@ -307,27 +440,26 @@ class Slide(object):
             name: String name of the display element you want to remove.
         """
 
-        mark_dirty = False
+        for element in [x for x in self.elements if x.name == name]:
+            self.elements.remove(element)
 
-        # Reverse so we can mark any elements below this as dirty
-        for element in reversed(self.elements):
-            if element.name == name:
-                self.elements.remove(element)
-                mark_dirty = True
-            elif mark_dirty:
-                element.dirty = True
+            # whatever was under it is composited again on the next update
+            if element.drawn_rect:
+                add_dirty_rect(self._invalid_rects, element.drawn_rect)
 
-        # If we wanted to optimize more, we could only mark the Rect of the
-        # element that was removed as dirty, but meh. If we do that we should
-        # probably instead create some kind of dirty rect handler since we
-        # could use it in other places too.
+            element.scrub()
 
     def clear(self):
         """Removes all elements from the slide and resets the slide to all
         black."""
+        for element in self.elements:
+            element.scrub()
+
         self.elements = list()
         self.surface = pygame.Surface.copy(self.mpfdisplay.surface)
         self.dirty = True
+        self._invalid_rects = list()
+        self.mark_dirty()
 
     def refresh(self, force_dirty=False):
         """Refreshes the slide by clearing it, and updating all the display
@@ -340,9 +472,15 @@ class Slide(object):
         """
         self.surface = pygame.Surface.copy(self.mpfdisplay.surface)
 
-        if force_dirty:
-            for element in self.elements:
+        # the new surface is blank, so every element has to be drawn again
+        for element in self.elements:
+            element.drawn_rect = None
+
+            if force_dirty:
                 element.dirty = True
+
+        self._invalid_rects = list()
+        self.mark_dirty()
         self.update()
 
     def schedule_expire(self, removal_time=None):
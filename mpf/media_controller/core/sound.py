@@ -861,6 +861,15 @@ class Sound(Asset):
     def _unload(self):
         self.sound_object = None
 
+    def get_memory_size(self):
+        if not self.sound_object or not pygame.mixer.get_init():
+            return super(Sound, self).get_memory_size()
+
+        frequency, size, channels = pygame.mixer.get_init()
+
+        return int(self.sound_object.get_length() * frequency *
+                   abs(size) / 8 * channels)
+
     def play(self, loops=0, priority=0, fade_in=0, volume=1, **kwargs):
         """Plays this sound.
 
@@ -90,6 +90,9 @@ class Transition(Slide):
             #self.complete()
             pass
 
+        # the whole slide moves, so all of it has to be shown again
+        self.dirty_rects = [self.surface.get_rect()]
+
         # figure out what percentage along we are
         self.percent = (time.time() - self.start_time) / self.duration
 
@@ -87,6 +87,11 @@ class WindowManager(MPFDisplay):
         # them one-by-one as event handlers are registered.
         pygame.event.set_allowed(None)
 
+        # Only the changed areas are drawn, so draw everything again when the
+        # window was covered
+        self.machine.register_pygame_handler(pygame.locals.VIDEOEXPOSE,
+                                             self.redraw)
+
     def _initialize(self):
         super(WindowManager, self)._initialize()
 
@@ -128,16 +133,19 @@ class WindowManager(MPFDisplay):
         # Set the caption
         pygame.display.set_caption(self.config['title'])
 
-    def update(self):
-        """Updates the display. Called from a timer based on this display's fps
-        settings.
+    def show_frame(self, surface):
+        """Shows a frame in the window. Called from update() which runs on a
+        timer based on this display's fps settings.
 
         """
-        super(WindowManager, self).update()
+        if not self.dirty_rects:
+            return
+
+        # Update only the parts of the window which changed
+        for rect in self.dirty_rects:
+            self.window.blit(surface, rect, area=rect)
 
-        # Update the display
-        self.window.blit(self.current_slide.surface, (0, 0))
-        pygame.display.flip()
+        pygame.display.update(self.dirty_rects)
 
 
 # The MIT License (MIT)
@@ -7,12 +7,35 @@ module-level functions related to using DMD files."""
 
 # Documentation and more info at http://missionpinball.com/mpf
 
+import hashlib
+import mmap
 import os
 import struct
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
 import pygame  # todo make it so this doesn't crash if pygame is not available
 import logging
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from mpf.media_controller.core.display import MPFDisplay
+from mpf.system.bcp import encode_dmd_delta
+
+
+dmd_palette = [(i, 0, 0) for i in range(16)] * 16
+"""The palette of the 8-bit surfaces created by surface_to_dmd(). Each pixel
+value is its shade."""
+
+DMD_FILE_HEADER = 0x00646D64
+CONVERSION_VERSION = 1
+"""Part of the key of cached conversions. Change it if the conversion changes
+so existing cache files aren't used anymore."""
 
 
 def load_dmd_file(file_name, palette=None, alpha_color=None,
@@ -83,8 +106,191 @@ def load_dmd_file(file_name, palette=None, alpha_color=None,
         raise Exception()
 
 
+def save_dmd_file(file_name, surface_list):
+    """Saves a list of 8-bit Pygame surfaces (like the ones returned by
+    load_dmd_file() or surface_to_dmd()) as a .DMD file.
+
+    Args:
+        file_name: A string of the file name (with path) of the file to write.
+        surface_list: A list of 8-bit Pygame surfaces, one for each frame. All
+            of them have to be the same size.
+
+    The file is written to a temp file first and then renamed, so other
+    threads never see a partially written file.
+
+    """
+    width, height = surface_list[0].get_size()
+
+    # each call gets its own temp file, since several loader threads can
+    # convert images with the same content at the same time
+    fd, temp_file = tempfile.mkstemp(suffix='.tmp',
+                                     dir=os.path.dirname(file_name) or '.')
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(struct.pack("IIII", DMD_FILE_HEADER, len(surface_list),
+                                width, height))
+
+            for surface in surface_list:
+                f.write(pygame.image.tostring(surface, 'P'))
+
+        if sys.platform == 'win32' and os.path.exists(file_name):
+            # Windows can't rename over an existing file
+            os.remove(file_name)
+
+        os.rename(temp_file, file_name)
+
+    except (IOError, OSError):
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        raise
+
+
+class DmdFrames(object):
+    """The frames of a .DMD file, which are decoded from a memory map of the
+    file when they're used instead of all at once when the file is loaded.
+
+    This behaves like the list of surfaces returned by load_dmd_file(), so
+    ``len(frames)`` is the number of frames and ``frames[n]`` is the surface
+    of frame n. The most recently used frames are kept in a cache, so the
+    frames around the playhead of the animation (or of every animation
+    element which plays it) are only decoded once.
+
+    Args:
+        file_name: A string of the file name (with path) of the file to map.
+        palette: Optional Python list in the Pygame palette format.
+        alpha_color: Whether one of the colors of this rendered DMD should be
+            transparent. Default is None.
+        cache_size: How many decoded frames are kept. Default is 8.
+
+    """
+
+    def __init__(self, file_name, palette=None, alpha_color=None,
+                 cache_size=8):
+        self.file_name = file_name
+        self.palette = palette
+        self.alpha_color = alpha_color
+        self.cache_size = max(1, cache_size)
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.log = logging.getLogger('dmd')
+
+        self.hits = 0
+        self.misses = 0
+
+        with open(file_name, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        frame_count, self.width, self.height = struct.unpack(
+            "III", self.map[4:16])
+        self.frame_size = self.width * self.height
+
+        if len(self.map) != 16 + self.frame_size * frame_count:
+            self.log.warning("File size of %s inconsistent with header "
+                             "information.", file_name)
+
+        # don't read past the end of a truncated file
+        if self.frame_size:
+            self.frame_count = min(frame_count, (len(self.map) - 16) //
+                                   self.frame_size)
+        else:
+            self.frame_count = 0
+
+    def __len__(self):
+        return self.frame_count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.frame_count
+
+        if not 0 <= index < self.frame_count:
+            raise IndexError("Frame {} is out of range".format(index))
+
+        with self.lock:
+            try:
+                surface = self.cache.pop(index)
+                self.hits += 1
+            except KeyError:
+                surface = self._decode_frame(index)
+                self.misses += 1
+
+                if len(self.cache) >= self.cache_size:
+                    self.cache.popitem(last=False)
+
+            self.cache[index] = surface
+
+        return surface
+
+    def __iter__(self):
+        for index in range(self.frame_count):
+            yield self[index]
+
+    def _decode_frame(self, index):
+        offset = 16 + index * self.frame_size
+
+        surface = pygame.image.fromstring(
+            self.map[offset:offset + self.frame_size],
+            (self.width, self.height), 'P')
+
+        if self.palette:
+            surface.set_palette(self.palette)
+
+        if self.alpha_color is not None:
+            surface.set_colorkey((self.alpha_color, 0, 0))
+
+        return surface
+
+    def get_memory_size(self):
+        """Returns the number of bytes the decoded frames use at most. (The
+        mapped file is paged in and out by the OS.)"""
+        return min(self.cache_size, self.frame_count) * self.frame_size
+
+    def close(self):
+        """Closes the memory map. The frames can't be used afterwards."""
+        with self.lock:
+            self.cache = OrderedDict()
+            self.map.close()
+
+
+def map_dmd_file(file_name, palette=None, alpha_color=None, cache_size=8):
+    """Maps a .DMD file into memory and returns a DmdFrames object which
+    decodes its frames when they're used. See load_dmd_file() for the file
+    format and DmdFrames for the arguments."""
+    try:
+        return DmdFrames(file_name, palette, alpha_color, cache_size)
+    except (IOError, ValueError, struct.error):
+        raise Exception("Could not map DMD file {}".format(file_name))
+
+
+def get_converted_file_name(file_name, cache_path, shades=16, alpha_color=None,
+                            weights=(.299, .587, .114), alpha_threshold=128):
+    """Returns the file name of the cached DMD conversion of an image file.
+
+    Args:
+        file_name: The image file which is converted.
+        cache_path: The folder the converted .DMD files are stored in.
+        shades, alpha_color, weights, alpha_threshold: The surface_to_dmd()
+            settings used for the conversion.
+
+    Returns: The full path of the .DMD file, which is named by the hash of the
+        image file's contents and the conversion settings. (So the cached file
+        isn't used anymore if either of them changes.) The file might not
+        exist yet.
+
+    """
+    file_hash = hashlib.sha1()
+
+    with open(file_name, 'rb') as f:
+        file_hash.update(f.read())
+
+    file_hash.update(repr((CONVERSION_VERSION, shades, alpha_color,
+                           tuple(weights), alpha_threshold)))
+
+    return os.path.join(cache_path, file_hash.hexdigest() + '.dmd')
+
+
 def surface_to_dmd(surface, shades=16, alpha_color=None,
-                   weights=(.299, .587, .114)):
+                   weights=(.299, .587, .114), alpha_threshold=128):
     """Converts a 24-bit RGB Pygame surface to surface that's compatible with
     DMD displays in MPF.
 
@@ -98,6 +304,9 @@ def surface_to_dmd(surface, shades=16, alpha_color=None,
         weights: A tuple of the relative weights of the R, G, and B channels
             that will be used to convert the 24-bit surface to the new surface.
             Default is (.299, .587, .114)
+        alpha_threshold: If the surface has per-pixel alpha and alpha_color
+            is set, pixels with an alpha value below this are set to the
+            alpha_color. Default is 128.
 
     Returns: An 8-bit Pygame surface ready to display on the DMD.
 
@@ -111,50 +320,86 @@ def surface_to_dmd(surface, shades=16, alpha_color=None,
     More information on this conversion process, and the reason we chose the
     default weights we did, is here:
     http://en.wikipedia.org/wiki/Grayscale#Luma_coding_in_video_systems
+
+    The conversion uses NumPy if it's installed, and a (slower) lookup table
+    for each channel if it isn't.
     """
 
     width, height = surface.get_size()
-    pa = pygame.PixelArray(surface)
-    new_surface = pygame.Surface((width, height), depth=8)
-
-    # todo add support for alpha channel (per pixel), and specifying the
-    # alpha color before the conversion versus after
-
-    palette = [
-        (0, 0, 0),
-        (1, 0, 0),
-        (2, 0, 0),
-        (3, 0, 0),
-        (4, 0, 0),
-        (5, 0, 0),
-        (6, 0, 0),
-        (7, 0, 0),
-        (8, 0, 0),
-        (9, 0, 0),
-        (10, 0, 0),
-        (11, 0, 0),
-        (12, 0, 0),
-        (13, 0, 0),
-        (14, 0, 0),
-        (15, 0, 0)] * 16
-
-    new_surface.set_palette(palette)
+
+    # the RGBA string has the same layout for any kind of source surface
+    rgba = pygame.image.tostring(surface, 'RGBA')
+
+    if alpha_color is not None and surface.get_flags() & pygame.SRCALPHA:
+        alpha_value = alpha_color
+    else:
+        alpha_value = None
+
+    if numpy:
+        pixels = rgba_to_shades_numpy(rgba, shades, weights, alpha_value,
+                                      alpha_threshold)
+    else:
+        pixels = rgba_to_shades(rgba, shades, weights, alpha_value,
+                                alpha_threshold)
+
+    new_surface = pygame.image.fromstring(pixels, (width, height), 'P')
+    new_surface.set_palette(dmd_palette)
 
     if alpha_color is not None:
         new_surface.set_colorkey((alpha_color, 0, 0))
 
-    new_pa = pygame.PixelArray(new_surface)
+    return new_surface
+
+
+def rgba_to_shades_numpy(rgba, shades=16, weights=(.299, .587, .114),
+                         alpha_value=None, alpha_threshold=128):
+    """Converts a string of RGBA pixels to a string of 8-bit shades with
+    NumPy. See surface_to_dmd() for the arguments.
+
+    Args:
+        alpha_value: The shade that pixels with an alpha value below the
+            alpha_threshold are set to, or None to ignore the alpha channel.
+
+    """
+    pixels = numpy.frombuffer(rgba, dtype=numpy.uint8).reshape(-1, 4)
+
+    # scaling the weights first saves a pass over the whole image
+    scaled_weights = numpy.array(weights) * ((shades - 1) / 255.0)
 
-    for x in range(width):
-        for y in range(height):
-            pixel_color = surface.unmap_rgb(pa[x, y])
-            pixel_weight = ((pixel_color[0] * weights[0]) +
-                            (pixel_color[1] * weights[1]) +
-                            (pixel_color[2] * weights[2])) / 255.0
+    # floor(x + .5) instead of rint() so .5 rounds up like round() does
+    result = numpy.floor(pixels[:, :3].dot(scaled_weights) + .5).astype(
+        numpy.uint8)
 
-            new_pa[x, y] = int(round(pixel_weight * (shades - 1)))
+    if alpha_value is not None:
+        result[pixels[:, 3] < alpha_threshold] = alpha_value
 
-    return new_pa.surface
+    return result.tostring()
+
+
+def rgba_to_shades(rgba, shades=16, weights=(.299, .587, .114),
+                   alpha_value=None, alpha_threshold=128):
+    """Converts a string of RGBA pixels to a string of 8-bit shades without
+    NumPy. See rgba_to_shades_numpy() for the arguments."""
+    scale = (shades - 1) / 255.0
+
+    # the weighted value of every possible channel value, with the rounding
+    # offset added to the red one
+    red = [value * weights[0] * scale + .5 for value in range(256)]
+    green = [value * weights[1] * scale for value in range(256)]
+    blue = [value * weights[2] * scale for value in range(256)]
+
+    rgba = bytearray(rgba)
+    result = bytearray(len(rgba) // 4)
+
+    for i, j in enumerate(xrange(0, len(rgba), 4)):
+        result[i] = int(red[rgba[j]] + green[rgba[j + 1]] + blue[rgba[j + 2]])
+
+    if alpha_value is not None:
+        for i, j in enumerate(xrange(3, len(rgba), 4)):
+            if rgba[j] < alpha_threshold:
+                result[i] = alpha_value
+
+    return str(result)
 
 
 def create_palette(bright_color=(255, 0, 0), dark_color=(0, 0, 0),
@@ -292,6 +537,32 @@ class DMD(MPFDisplay):
             self.color_dmd = True
             self.depth = 24
 
+        # Settings for streaming frames to the physical DMD via BCP. Unchanged
+        # frames can be skipped, and changed frames can be sent as deltas of
+        # the rows (or runs of bytes within rows) that changed. A full
+        # keyframe is sent every keyframe_interval frames (0 = never) so the
+        # remote side can recover if it's out of sync.
+
+        if 'skip_unchanged_frames' not in self.config:
+            self.config['skip_unchanged_frames'] = True
+
+        if 'delta_frames' not in self.config:
+            self.config['delta_frames'] = 'rows'
+
+        if 'keyframe_interval' not in self.config:
+            self.config['keyframe_interval'] = 30
+
+        if self.config['delta_frames'] not in ('rows', 'runs'):
+            self.config['delta_frames'] = None
+
+        self.last_frame = None
+        self.frames_since_keyframe = 0
+        self.stream_stats = None
+        self._reset_stream_stats()
+
+        self.machine.events.add_handler('client_connected',
+                                        self._reset_stream)
+
     def _initialize(self):
         # Internal method which initialized the DMD. This is separate from
         # __init__ because we have to wait until Pygame has been initialized
@@ -300,26 +571,112 @@ class DMD(MPFDisplay):
 
         self.machine.display.default_display = self
 
-    def update(self):
-        """Automatically called based on a timer when the display should update.
+    def show_frame(self, surface):
+        """Sends the frame to the physical DMD. Called from update() which
+        runs on a timer.
         """
-
-        super(DMD, self).update()
+        if (self.use_physical and not self.dirty_rects and
+                self.config['skip_unchanged_frames'] and
+                self.last_frame is not None and not self._keyframe_due()):
+            # nothing changed, so there's no need to even get the frame
+            self.frames_since_keyframe += 1
+            self.stream_stats['skipped'] += 1
+            self._report_stream_stats()
+            return
 
         if self.use_physical and self.depth == 8:
             try:
-                self.machine.send_dmd_frame(
-                    pygame.image.tostring(self.current_slide.surface, 'P'))
+                self.send_frame(pygame.image.tostring(surface, 'P'))
             except TypeError:
                 return False
 
         elif self.use_physical and self.depth == 24:
             try:
-                self.machine.send_dmd_frame(
-                    pygame.image.tostring(self.current_slide.surface, 'RGB'))
+                self.send_frame(pygame.image.tostring(surface, 'RGB'))
             except TypeError:
                 return False
 
+    def send_frame(self, frame):
+        """Sends a raw frame to the physical DMD via BCP, either as a full
+        keyframe, as a delta from the previous frame, or not at all if it
+        hasn't changed.
+
+        Args:
+            frame: The raw byte string of the frame.
+
+        """
+        start_time = time.time()
+
+        if (self.last_frame is None or
+                len(frame) != len(self.last_frame) or
+                self._keyframe_due()):
+
+            self.machine.send_dmd_frame(frame)
+            self.frames_since_keyframe = 0
+            self.stream_stats['keyframes'] += 1
+            self.stream_stats['bytes'] += len(frame)
+
+        elif self.config['skip_unchanged_frames'] and frame == self.last_frame:
+            self.frames_since_keyframe += 1
+            self.stream_stats['skipped'] += 1
+
+        elif self.config['delta_frames']:
+            delta = encode_dmd_delta(
+                self.last_frame, frame,
+                row_length=len(frame) // self.height,
+                runs=self.config['delta_frames'] == 'runs')
+
+            self.machine.send_dmd_delta(delta)
+            self.frames_since_keyframe += 1
+            self.stream_stats['deltas'] += 1
+            self.stream_stats['bytes'] += len(delta)
+
+        else:
+            self.machine.send_dmd_frame(frame)
+            self.frames_since_keyframe += 1
+            self.stream_stats['keyframes'] += 1
+            self.stream_stats['bytes'] += len(frame)
+
+        self.last_frame = frame
+        self.stream_stats['secs'] += time.time() - start_time
+
+        self._report_stream_stats()
+
+    def _keyframe_due(self):
+        return bool(self.config['keyframe_interval'] and
+                    self.frames_since_keyframe >=
+                    self.config['keyframe_interval'])
+
+    def _reset_stream(self, **kwargs):
+        # Forces the next frame to be sent as a keyframe, e.g. when a new BCP
+        # client connects
+        self.last_frame = None
+
+    def _report_stream_stats(self):
+        # Logs the DMD stream bandwidth & CPU use once per second
+
+        elapsed = time.time() - self.stream_stats['start_time']
+
+        if elapsed < 1.0:
+            return
+
+        self.log.debug("DMD stream: %.1f frames/sec (%.1f key, %.1f delta, "
+                       "%.1f skipped), %d bytes/sec, %.2fms CPU/sec",
+                       (self.stream_stats['keyframes'] +
+                        self.stream_stats['deltas'] +
+                        self.stream_stats['skipped']) / elapsed,
+                       self.stream_stats['keyframes'] / elapsed,
+                       self.stream_stats['deltas'] / elapsed,
+                       self.stream_stats['skipped'] / elapsed,
+                       self.stream_stats['bytes'] / elapsed,
+                       self.stream_stats['secs'] * 1000 / elapsed)
+
+        self._reset_stream_stats()
+
+    def _reset_stream_stats(self):
+        self.stream_stats = dict(keyframes=0, deltas=0, skipped=0, bytes=0,
+                                 secs=0.0, start_time=time.time())
+
 # The MIT License (MIT)
 
 # Copyright (c) 2013-2015 Brian Madden and Gabe Knuth
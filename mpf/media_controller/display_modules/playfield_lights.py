@@ -1,5 +1,6 @@
 """MPF Display Module which treats the playfield lights as a Pygame surface.
-This module is not yet complete."""
+Slides shown on this display set the colors of the playfield LEDs and the
+brightness of the playfield lights under them."""
 # playfield_lights.py
 # Mission Pinball Framework
 # Written by Brian Madden & Gabe Knuth
@@ -10,37 +11,234 @@ This module is not yet complete."""
 
 import logging
 import pygame
-# todo make it so this doesn't crash if pygame is not available
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-class PlayfieldLights(object):
+from mpf.media_controller.core.display import MPFDisplay
+
+
+class PlayfieldLights(MPFDisplay):
+    """An MPFDisplay whose pixels are the playfield LEDs and lights.
+
+    The x and y coordinates of the LEDs and lights (in pixels of this display,
+    which are tenths of inches by default) are requested from MPF via BCP
+    when it connects. Every update which changed the display samples the
+    pixels under all of them at once, and the LEDs and lights whose pixels
+    changed are sent to MPF as a frame of an external show.
+
+    """
 
     def __init__(self, machine):
-        self.machine = machine
-
-        # create the pygame surface
-        self.surface = pygame.Surface((205, 460))  # in tenths of inches
-        self.surface.fill((0, 0, 0))
-
-        self.machine.events.add_handler('timer_tick', self.tick)
-
-    def update(self, surface):
-        pa = pygame.PixelArray(surface)
-
-        if hasattr(self.machine, 'lights'):  # todo got to be a better way
-            for light in self.machine.lights:
-                if light.x and light.y:
-                    if pa[light.x, light.y]:
-                        light.on()
-                    else:
-                        light.off()
-        if hasattr(self.machine, 'leds'):
-            for led in self.machine.leds:
-                pass
-
-    def tick(self):
-        # see if the surface has changed, if so, update it todo
-        self.update(self.surface)
+        if 'playfield_lights' in machine.config:
+            self.config = machine.config['playfield_lights']
+        else:
+            self.config = dict()
+
+        if 'width' not in self.config:
+            self.config['width'] = 205
+
+        if 'height' not in self.config:
+            self.config['height'] = 460
+
+        if 'priority' not in self.config:
+            self.config['priority'] = 0
+
+        self.log = logging.getLogger('PlayfieldLights')
+
+        # Unlike the DMD, this display shouldn't become the default display.
+        # The window is created after the display modules, so it might not be
+        # set yet.
+        default_display = machine.display.default_display
+        MPFDisplay.__init__(self, machine, self.config)
+        self.machine.display.default_display = default_display
+
+        self.name = 'playfield_lights'
+        self.depth = 24
+
+        self.leds = list()
+        self.led_coordinates = None
+        self.led_colors = None
+        self.lights = list()
+        self.light_coordinates = None
+        self.light_brightness = None
+
+        self.machine.events.add_handler('client_connected',
+                                        self._request_coordinates)
+        self.machine.events.add_handler('bcp_set_led_coordinates',
+                                        self._set_led_coordinates)
+        self.machine.events.add_handler('bcp_set_light_coordinates',
+                                        self._set_light_coordinates)
+
+    def _initialize(self):
+        default_display = self.machine.display.default_display
+        super(PlayfieldLights, self)._initialize()
+        self.machine.display.default_display = default_display
+
+    def _request_coordinates(self, **kwargs):
+        self.machine.send('get', names='led_coordinates,light_coordinates')
+
+    def _set_led_coordinates(self, value, **kwargs):
+        self.leds, self.led_coordinates = self._map_coordinates(value)
+        self._start_show()
+
+    def _set_light_coordinates(self, value, **kwargs):
+        self.lights, self.light_coordinates = self._map_coordinates(value)
+        self._start_show()
+
+    def _map_coordinates(self, value):
+        # Returns the names of the devices on this display and the index
+        # arrays of their pixels
+        names = list()
+        xs = list()
+        ys = list()
+
+        for name, (x, y) in parse_coordinates(value):
+            if 0 <= x < self.width and 0 <= y < self.height:
+                names.append(name)
+                xs.append(x)
+                ys.append(y)
+            else:
+                self.log.warning("%s at %s,%s is not on the %sx%s playfield "
+                                 "lights display", name, x, y, self.width,
+                                 self.height)
+
+        if numpy:
+            return names, (numpy.array(xs, dtype=numpy.intp),
+                           numpy.array(ys, dtype=numpy.intp))
+        else:
+            return names, (xs, ys)
+
+    def _start_show(self):
+        # The devices of an external show can't change, so it's started again
+        # with the new list, and the next update sends all of them.
+        self.machine.send('external_show_stop', name=self.name)
+        self.machine.send('external_show_start', name=self.name,
+                          priority=self.config['priority'],
+                          leds=','.join(self.leds),
+                          lights=','.join(self.lights))
+
+        self.led_colors = None
+        self.light_brightness = None
+        self.redraw()
+
+    def show_frame(self, surface):
+        """Sends the colors of the LEDs and lights which changed to MPF.
+        Called from update() which runs on a timer.
+        """
+        if not self.dirty_rects or not (self.leds or self.lights):
+            return
+
+        frame = dict()
+        payload = None
+
+        if self.leds:
+            colors = sample_pixels(surface, self.led_coordinates)
+            changes = get_changes(self.led_colors, colors)
+            self.led_colors = colors
+
+            if len(changes):
+                if numpy:
+                    payload = colors[changes].astype(numpy.uint8).tostring()
+                else:
+                    payload = ''.join(chr(c) for i in changes
+                                      for c in colors[i])
+
+                if len(changes) < len(self.leds):
+                    frame['led_indexes'] = ','.join(str(i) for i in changes)
+
+        if self.lights:
+            colors = sample_pixels(surface, self.light_coordinates)
+
+            if numpy:
+                brightness = colors.max(axis=1)
+            else:
+                brightness = [max(color) for color in colors]
+
+            changes = get_changes(self.light_brightness, brightness)
+            self.light_brightness = brightness
+
+            if len(changes):
+                frame['light_data'] = ''.join(
+                    '{:02x}'.format(int(brightness[i])) for i in changes)
+
+                if len(changes) < len(self.lights):
+                    frame['light_indexes'] = ','.join(str(i) for i in changes)
+
+        if payload or frame:
+            self.machine.send('external_show_frame', name=self.name,
+                              payload=payload, **frame)
+
+
+def parse_coordinates(value):
+    """Parses the value of a BCP led_coordinates or light_coordinates set
+    command.
+
+    Args:
+        value: String in the format name1:x,y;name2:x,y;...
+
+    Returns: A list of (name, (x, y)) tuples.
+
+    """
+    coordinates = list()
+
+    for entry in value.split(';'):
+        if entry:
+            name, position = entry.split(':')
+            x, y = position.split(',')
+            coordinates.append((name, (int(x), int(y))))
+
+    return coordinates
+
+
+def sample_pixels(surface, coordinates):
+    """Returns the RGB colors of a list of pixels of a 24-bit surface.
+
+    Args:
+        surface: The Pygame surface.
+        coordinates: Tuple of the list of x coordinates and the list of y
+            coordinates of the pixels, as numpy arrays if numpy is available.
+
+    Returns: A numpy array with a row for each pixel, or a list of RGB tuples
+        if numpy isn't available.
+
+    """
+    xs, ys = coordinates
+
+    if numpy:
+        return pygame.surfarray.pixels3d(surface)[xs, ys]
+    else:
+        return [tuple(surface.get_at((x, y)))[:3] for x, y in zip(xs, ys)]
+
+
+def get_changes(previous, current):
+    """Returns the list of indexes of the items in current which are
+    different from previous (or all of them if previous is None)."""
+    if previous is None:
+        return range(len(current))
+
+    if numpy:
+        if current.ndim > 1:
+            return numpy.flatnonzero((current != previous).any(axis=1))
+        else:
+            return numpy.flatnonzero(current != previous)
+
+    return [i for i, (old, new) in enumerate(zip(previous, current))
+            if old != new]
+
+
+def is_used(config):
+    """Checks a config dictionary to see if this display module should be used.
+
+    Args:
+        config: A python dictionary
+    Returns: Boolean as to whether there's a playfield_lights section.
+    """
+    return 'playfield_lights' in config
+
+
 
 # The MIT License (MIT)
 
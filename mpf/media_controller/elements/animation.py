@@ -39,6 +39,11 @@ class Animation(Asset):
         else:
             self.alpha_color = None
 
+        if 'frame_cache' in self.config:
+            self.frame_cache = self.config['frame_cache']
+        else:
+            self.frame_cache = 8
+
         self.surface_list = None
 
     def do_load(self, callback):
@@ -49,10 +54,12 @@ class Animation(Asset):
         # load from image file
 
         if self.file_name.endswith('.dmd'):
-            self.surface_list = mpf.media_controller.display_modules.dmd.load_dmd_file(
+            # the frames are decoded when they're shown
+            self.surface_list = mpf.media_controller.display_modules.dmd.map_dmd_file(
                 self.file_name,
                 dmd_palette,
-                self.alpha_color)
+                self.alpha_color,
+                self.frame_cache)
 
         else:
             pass
@@ -65,8 +72,23 @@ class Animation(Asset):
             callback()
 
     def _unload(self):
+        try:
+            self.surface_list.close()  # releases the memory map
+        except AttributeError:
+            pass
+
         self.surface_list = None
 
+    def get_memory_size(self):
+        if not self.surface_list:
+            return 0
+
+        try:
+            return self.surface_list.get_memory_size()
+        except AttributeError:
+            return sum(x.get_pitch() * x.get_height()
+                       for x in self.surface_list)
+
 
 class AnimationDisplayElement(DisplayElement):
     """Represents an animation display element.
@@ -133,11 +155,15 @@ class AnimationDisplayElement(DisplayElement):
         self.set_fps(fps)
         self.layer = layer
 
+        self.asset = self.animation
+        self.animation.asset_manager.add_ref(self.animation)
+
         if self.animation.loaded:
             self._asset_loaded()
         else:
             self.ready = False
-            self.animation.load(callback=self._asset_loaded)
+            self.animation.asset_manager.load_asset(self.animation,
+                                                    self._asset_loaded)
 
         if play_now:
             self.play()
@@ -257,7 +257,6 @@ class CharacterPicker(DisplayElement):
 
         self.set_position(self.x, self.y, self.h_pos, self.v_pos)
         self.dirty = True
-        self.slide.refresh(force_dirty=True)
 
     def complete(self):
         self.scrub()
@@ -61,8 +61,6 @@ class EnteredChars(DisplayElement):
 
         self.update_cursor()
 
-        self.slide.refresh(force_dirty=True)
-
     def update_cursor(self):
         if not self.cursor_element:
             self.cursor_element = self.create_cursor_element()
@@ -73,6 +71,7 @@ class EnteredChars(DisplayElement):
                 y=self.y + self.config['cursor_offset_y'],
                 h_pos=self.h_pos,
                 v_pos=self.v_pos)
+            self.cursor_element.dirty = True
 
     def create_cursor_element(self):
         element = self.slide.add_element(
@@ -6,6 +6,8 @@
 
 # Documentation and more info at http://missionpinball.com/mpf
 
+import os
+
 import pygame
 import pygame.locals
 
@@ -76,23 +78,11 @@ class Image(Asset):
             self.image_surface = self.image_surface[0]
             self.loaded = True
 
+        elif self.target == 'dmd':
+            self._load_dmd_image()
+
         else:  # image file (.png, .bmp, etc.)
-            try:
-                self.image_surface = pygame.image.load(self.file_name)
-            except pygame.error:
-                self.asset_manager.log.error("Pygame Error for file %s. '%s'",
-                                             self.file_name, pygame.get_error())
-            except:
-                raise
-
-            if self.target == 'dmd':
-                # This image will be shown on the DMD, so we need to convert its
-                # surface to the DMD format
-
-                self.image_surface = (
-                    mpf.media_controller.display_modules.dmd.surface_to_dmd(
-                    surface=self.image_surface, alpha_color=self.alpha_color))
-                # todo add shades here if we ever support values other than 16
+            self._load_image_file()
 
         self.loaded = True
 
@@ -104,10 +94,57 @@ class Image(Asset):
         # w, h
         # load from image file
 
+    def _load_image_file(self):
+        try:
+            self.image_surface = pygame.image.load(self.file_name)
+        except pygame.error:
+            self.asset_manager.log.error("Pygame Error for file %s. '%s'",
+                                         self.file_name, pygame.get_error())
+        except:
+            raise
+
+    def _load_dmd_image(self):
+        # This image will be shown on the DMD, so we need to convert its
+        # surface to the DMD format. Converted images are cached as .dmd
+        # files, so this only happens the first time an image is loaded.
+        dmd = mpf.media_controller.display_modules.dmd
+        cache_path = self.machine.dmd_cache_path
+
+        if cache_path:
+            cache_file = dmd.get_converted_file_name(
+                self.file_name, cache_path, alpha_color=self.alpha_color)
+
+            if os.path.isfile(cache_file):
+                self.image_surface = dmd.load_dmd_file(
+                    file_name=cache_file,
+                    palette=dmd_palette,
+                    alpha_color=self.alpha_color)[0]
+                return
+
+        self._load_image_file()
+
+        # todo add shades here if we ever support values other than 16
+        self.image_surface = dmd.surface_to_dmd(surface=self.image_surface,
+                                                alpha_color=self.alpha_color)
+
+        if cache_path:
+            try:
+                dmd.save_dmd_file(cache_file, [self.image_surface])
+            except (IOError, OSError) as e:
+                self.asset_manager.log.warning(
+                    "Could not cache the DMD version of %s: %s",
+                    self.file_name, e)
+
     def _unload(self):
         self.image_surface = None
         #self.loaded = False
 
+    def get_memory_size(self):
+        if not self.image_surface:
+            return 0
+
+        return self.image_surface.get_pitch() * self.image_surface.get_height()
+
 
 class ImageDisplayElement(DisplayElement):
 
@@ -153,11 +190,15 @@ class ImageDisplayElement(DisplayElement):
 
         self.layer = layer
 
+        self.asset = self.image
+        self.image.asset_manager.add_ref(self.image)
+
         if self.image.loaded:
             self._asset_loaded()
         else:
             self.ready = False
-            self.image.load(callback=self._asset_loaded)
+            self.image.asset_manager.load_asset(self.image,
+                                                self._asset_loaded)
 
     def _asset_loaded(self):
 
@@ -98,11 +98,15 @@ class MovieDisplayElement(DisplayElement):
 
         self.layer = layer
 
+        self.asset = self.movie
+        self.movie.asset_manager.add_ref(self.movie)
+
         if self.movie.loaded:
             self._asset_loaded()
         else:
             self.ready = False
-            self.movie.load(callback=self._asset_loaded)
+            self.movie.asset_manager.load_asset(self.movie,
+                                                self._asset_loaded)
 
     def _asset_loaded(self):
 
@@ -30,6 +30,10 @@ class VirtualDMD(DisplayElement):
     Note: Full documentation on the use of the x, y, h_pos, and v_pos arguments
     can be found at: https://missionpinball.com/docs/displays/display-elements/positioning/
 
+    The source DMD is only scaled again when it changed since the last update,
+    and the pixel spacing grid is drawn once into an overlay surface which is
+    blitted on top of each new frame.
+
     """
 
     @classmethod
@@ -41,19 +45,6 @@ class VirtualDMD(DisplayElement):
         else:
             return False
 
-    @property
-    def dirty(self):
-        return True
-        # future optimization could be to return the dirty status of the source
-        # DMD. We don't do that now because there would have to be some extra
-        # intelligence to make sure it did one more loop as dirty after the
-        # source turns clean. And really if the computer can't handle these
-        # udpates then the fps is too high anyway, so we can ignore this.
-
-    @dirty.setter
-    def dirty(self, value):
-        pass
-
     def __init__(self,  slide, machine, dmd_object=None, x=None, y=None, h_pos=None,
                  v_pos=None, layer=0, **kwargs):
 
@@ -112,40 +103,94 @@ class VirtualDMD(DisplayElement):
         if self.dmd_object.depth == 8:
             self.element_surface.set_palette(self.palette)
 
+        self.grid_surface = None
+        self.shown_change_count = None
+
         self.layer = layer
         self.set_position(x, y, h_pos, v_pos)
 
     def update(self):
         """Updates the on screen representation of the physical DMD. This
         method automatically scales the surface as needed.
+
+        Nothing is drawn if the source DMD hasn't changed since the last
+        update.
         """
+        change_count = self.dmd_object.change_count
 
-        try:
-            source_surface = pygame.PixelArray(self.dmd_object.get_surface()).surface
-        except TypeError:
-            return False
+        if change_count != self.shown_change_count:
+            source_surface = self.dmd_object.get_surface()
+
+            if source_surface:
+                self.draw(source_surface)
+                self.shown_change_count = change_count
+
+        return super(VirtualDMD, self).update()
+
+    def draw(self, source_surface):
+        """Draws a frame of the source DMD onto this element's surface.
+
+        Args:
+            source_surface: The surface of the source DMD's current slide.
+
+        """
+        if source_surface.get_size() == self.element_surface.get_size():
+            self.element_surface.blit(source_surface, (0, 0))
+        else:
+            # Both 8-bit surfaces hold DMD shades, so scaling copies them as
+            # is and they're shown with this element's palette.
+            pygame.transform.scale(source_surface,
+                                   (self.config['width'],
+                                    self.config['height']),
+                                   self.element_surface)
+
+        if self.config.get('pixel_spacing'):
+
+            if not self.grid_surface:
+                self.grid_surface = self.create_grid_surface(
+                    source_surface.get_size())
+
+            self.element_surface.blit(self.grid_surface, (0, 0))
+
+        self.dirty = True
+
+    def create_grid_surface(self, source_size):
+        """Returns a surface with the lines between the DMD pixels which is
+        transparent everywhere else.
 
-        pygame.transform.scale(source_surface,
-                               (self.config['width'],
-                                self.config['height']),
-                               self.element_surface)
+        Args:
+            source_size: Tuple of the width and height of the source DMD, in
+                pixels.
+
+        """
+        grid_surface = pygame.Surface(self.element_surface.get_size(), 0,
+                                      self.element_surface)
+
+        if self.dmd_object.depth == 8:
+            grid_surface.set_palette(self.palette)
+
+        # any mapped color other than the one of the lines will do
+        if grid_surface.map_rgb((0, 0, 0)):
+            colorkey = 0
+        else:
+            colorkey = 1
 
-        ratio = self.element_surface.get_width() / float(source_surface.get_width())
+        grid_surface.fill(colorkey)
+        grid_surface.set_colorkey(colorkey)
 
-        if self.config['pixel_spacing']:
+        ratio = self.element_surface.get_width() / float(source_size[0])
 
-            for row in range(source_surface.get_height() + 1):
-                pygame.draw.line(self.element_surface, (0, 0, 0), (0, row*ratio),
-                                 (self.config['width']-1, row*ratio),
-                                 self.config['pixel_spacing'])
+        for row in range(source_size[1] + 1):
+            pygame.draw.line(grid_surface, (0, 0, 0), (0, row*ratio),
+                             (self.config['width']-1, row*ratio),
+                             self.config['pixel_spacing'])
 
-            for col in range(source_surface.get_width() + 1):
-                pygame.draw.line(self.element_surface, (0, 0, 0), (col*ratio, 0),
-                                 (col*ratio, self.config['height']-1),
-                                 self.config['pixel_spacing'])
+        for col in range(source_size[0] + 1):
+            pygame.draw.line(grid_surface, (0, 0, 0), (col*ratio, 0),
+                             (col*ratio, self.config['height']-1),
+                             self.config['pixel_spacing'])
 
-        self.decorate()
-        return True  # since the virtual DMD is always dirty
+        return grid_surface
 
 display_element_class = VirtualDMD
 create_asset_manager = False
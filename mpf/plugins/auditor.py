@@ -7,17 +7,98 @@ etc."""
 
 # Documentation and more info at http://missionpinball.com/mpf
 
+from array import array
+from collections import deque
 import logging
+import os
+import time
+
 from mpf.system.config import Config
 from mpf.system.data_manager import DataManager
+from mpf.system.file_manager import FileManager
+from mpf.system.timing import Timer
 from mpf.devices.shot import Shot
 
 
+class AuditCounters(object):
+    """A set of named counters which are stored in an array.
+
+    Each name gets a fixed slot in the array the first time it's used, so
+    incrementing a counter whose slot is known is just an array update.
+
+    Args:
+        counts: Optional dictionary of names and their initial counts.
+
+    """
+
+    def __init__(self, counts=None):
+        self.slots = dict()
+        self.names = list()
+        self.counts = array('L')
+
+        if counts:
+            for name, count in counts.iteritems():
+                self.add(name, count)
+
+    def add(self, name, count=0):
+        """Adds a counter (if it doesn't exist already).
+
+        Args:
+            name: String name of the counter.
+            count: Initial value of the counter if it's new.
+
+        Returns:
+            The slot of this counter in the counts array.
+
+        """
+        try:
+            return self.slots[name]
+        except KeyError:
+            slot = len(self.names)
+            self.slots[name] = slot
+            self.names.append(name)
+            self.counts.append(count)
+            return slot
+
+    def increment(self, name):
+        try:
+            self.counts[self.slots[name]] += 1
+        except KeyError:
+            self.counts[self.add(name)] += 1
+
+    def get(self, name):
+        try:
+            return self.counts[self.slots[name]]
+        except KeyError:
+            return 0
+
+    def copy_names(self):
+        """Returns a new AuditCounters instance with the same names (and
+        slots) as this one, with all the counts set to 0."""
+        counters = AuditCounters()
+        counters.slots = self.slots.copy()
+        counters.names = list(self.names)
+        counters.counts = array('L', [0]) * len(self.names)
+        return counters
+
+    def to_dict(self):
+        return dict(zip(self.names, self.counts))
+
+
 class Auditor(object):
 
+    counter_classes = ('switches', 'events', 'shots')
+
     def __init__(self, machine):
         """Base class for the auditor.
 
+        Counts are kept in memory in AuditCounters arrays and written to the
+        audits data file on a timer (and on the save_events), rather than the
+        whole audit dictionary being rebuilt on every change.
+
+        If a bucket_period is configured, the counts are also collected per
+        day or per game. Only the last bucket_count buckets are kept.
+
         Args:
             machine: A refence to the machine controller object.
         """
@@ -40,6 +121,18 @@ class Auditor(object):
         disable() methods.
         """
 
+        self.counters = dict()
+        self.bucket_counters = None
+        self.bucket_key = None
+        self.buckets = None
+        self.switch_counts = None
+        self.bucket_switch_counts = None
+        self.switch_slots = dict()
+        self.games_started = 0
+        self.changes = 0
+        self.saved_changes = 0
+        self.snapshot_timer = None
+
         self.data_manager = DataManager(self.machine, 'audits')
 
         self.machine.events.add_handler('init_phase_4', self._initialize)
@@ -57,35 +150,48 @@ class Auditor(object):
                     events: list|None
                     player: list|None
                     num_player_top_records: int|10
+                    snapshot_interval: secs|5m
+                    bucket_period: string|None
+                    bucket_count: int|30
                     '''
 
         self.config = Config.process_config(config,
                                             self.machine.config['auditor'])
 
-        self.current_audits = self.data_manager.get_data()
+        if self.config['bucket_period'] not in (None, 'day', 'game'):
+            raise ValueError("Invalid auditor bucket_period: {}. Valid "
+                             "values are day, game or None".format(
+                                self.config['bucket_period']))
 
-        if not self.current_audits:
-            self.current_audits = dict()
+        self.current_audits = self._load_audits()
 
         # Make sure we have all the sections we need in our audit dict
-        if 'switches' not in self.current_audits:
-            self.current_audits['switches'] = dict()
-
-        if 'events' not in self.current_audits:
-            self.current_audits['events'] = dict()
-
         if 'player' not in self.current_audits:
             self.current_audits['player'] = dict()
 
+        self.games_started = self.current_audits.get('games_started', 0)
+
+        for audit_class in self.counter_classes:
+            self.counters[audit_class] = AuditCounters(
+                self.current_audits.get(audit_class))
+
         # Make sure we have all the switches in our audit dict
         for switch in self.machine.switches:
-            if (switch.name not in self.current_audits['switches'] and
-                    'no_audit' not in switch.tags):
-                self.current_audits['switches'][switch.name] = 0
+            if 'no_audit' not in switch.tags:
+                self.counters['switches'].add(switch.name)
 
         # build the list of switches we should audit
         self.switchnames_to_audit = {x.name for x in self.machine.switches
                                      if 'no_audit' not in x.tags}
+        self.switch_slots = dict((name, self.counters['switches'].slots[name])
+                                 for name in self.switchnames_to_audit)
+        self.switch_counts = self.counters['switches'].counts
+
+        if 'events' in self.config['audit']:
+            for event in self.config['events']:
+                self.counters['events'].add(event)
+
+        self._setup_buckets()
 
         # Make sure we have all the player stuff in our audit dict
         if 'player' in self.config['audit']:
@@ -102,6 +208,15 @@ class Auditor(object):
         if 'player' in self.config['audit']:
             self.machine.events.add_handler('game_ending', self.audit_player)
 
+        # save before the data manager flushes its writes at shutdown
+        self.machine.events.add_handler('shutdown', self._snapshot,
+                                        priority=10000)
+
+        if self.config['snapshot_interval']:
+            self.snapshot_timer = Timer(
+                self._snapshot, frequency=self.config['snapshot_interval'])
+            self.machine.timing.add(self.snapshot_timer)
+
         # Enable the shots monitor
         Shot.monitor_enabled = True
         self.machine.register_monitor('shots', self.audit_shot)
@@ -109,6 +224,86 @@ class Auditor(object):
         # Add the switches monitor
         self.machine.switch_controller.add_monitor(self.audit_switch)
 
+    def _load_audits(self):
+        audits = self.data_manager.get_data()
+
+        if not audits:
+            # audits used to be stored in a YAML file. Pick up the old counts
+            # if the data file has a different format now.
+            legacy_file = os.path.splitext(self.data_manager.filename)[0] + \
+                '.yaml'
+
+            if (legacy_file != self.data_manager.filename and
+                    os.path.isfile(legacy_file)):
+                self.log.info("Importing audits from %s", legacy_file)
+                audits = FileManager.load(legacy_file)
+
+        return audits or dict()
+
+    def _setup_buckets(self):
+        if not self.config['bucket_period']:
+            return
+
+        self.buckets = deque(
+            (bucket for bucket in self.current_audits.get('buckets', ())
+             if bucket.get('period') == self.config['bucket_period']),
+            maxlen=self.config['bucket_count'])
+
+        bucket_key = self._get_bucket_key()
+
+        if self.buckets and self.buckets[-1]['key'] == bucket_key:
+            bucket = self.buckets.pop()
+        else:
+            bucket = dict()
+
+        self._start_bucket(bucket_key, bucket)
+
+    def _get_bucket_key(self):
+        if self.config['bucket_period'] == 'day':
+            return time.strftime('%Y-%m-%d', time.localtime(time.time()))
+        else:
+            return self.games_started
+
+    def _start_bucket(self, bucket_key, bucket=None):
+        # Makes a new bucket the current one. Its counters have the same slots
+        # as the main counters so switch hits can update both by slot.
+        if self.bucket_counters:
+            self.buckets.append(self._get_bucket_data())
+
+        self.bucket_key = bucket_key
+        self.bucket_counters = dict()
+
+        for audit_class in self.counters:
+            counters = self.counters[audit_class].copy_names()
+
+            if bucket:
+                for name, count in bucket.get(audit_class, dict()).iteritems():
+                    counters.counts[counters.add(name)] = count
+
+            self.bucket_counters[audit_class] = counters
+
+        self.bucket_switch_counts = self.bucket_counters['switches'].counts
+
+    def _check_bucket(self):
+        if not self.bucket_counters:
+            return
+
+        bucket_key = self._get_bucket_key()
+
+        if bucket_key != self.bucket_key:
+            self.log.debug("Starting audit bucket %s", bucket_key)
+            self._start_bucket(bucket_key)
+            self.changes += 1
+
+    def _get_bucket_data(self):
+        bucket = dict(period=self.config['bucket_period'],
+                      key=self.bucket_key)
+
+        for audit_class, counters in self.bucket_counters.iteritems():
+            bucket[audit_class] = counters.to_dict()
+
+        return bucket
+
     def audit(self, audit_class, event, **kwargs):
         """Called to log an auditable event.
 
@@ -120,17 +315,33 @@ class Auditor(object):
                 might include random kwargs.
         """
 
-        if audit_class not in self.current_audits:
-            self.current_audits[audit_class] = dict()
+        self.changes += 1
+
+        if audit_class not in self.counters:
+            self.counters[audit_class] = AuditCounters()
 
-        if event not in self.current_audits[audit_class]:
-            self.current_audits[audit_class][event] = 0
+            if self.bucket_counters:
+                self.bucket_counters[audit_class] = AuditCounters()
 
-        self.current_audits[audit_class][event] += 1
+        self.counters[audit_class].increment(event)
+
+        if self.bucket_counters:
+            self.bucket_counters[audit_class].increment(event)
 
     def audit_switch(self, switch_name, state):
-        if state and switch_name in self.switchnames_to_audit:
-            self.audit('switches', switch_name)
+        if not state:
+            return
+
+        try:
+            slot = self.switch_slots[switch_name]
+        except KeyError:
+            return
+
+        self.changes += 1
+        self.switch_counts[slot] += 1
+
+        if self.bucket_switch_counts is not None:
+            self.bucket_switch_counts[slot] += 1
 
     def audit_shot(self, name, profile, state):
         self.audit('shots', name)
@@ -144,7 +355,22 @@ class Auditor(object):
                 kwargs.
         """
 
-        self.current_audits['events'][eventname] += 1
+        self.audit('events', eventname)
+
+    def get_audits(self):
+        """Returns a dictionary of all the current audits, in the same format
+        as the audits data file."""
+        audits = dict(player=self.current_audits['player'],
+                      games_started=self.games_started)
+
+        for audit_class, counters in self.counters.iteritems():
+            audits[audit_class] = counters.to_dict()
+
+        if self.bucket_counters:
+            audits['buckets'] = list(self.buckets)
+            audits['buckets'].append(self._get_bucket_data())
+
+        return audits
 
     def audit_player(self, **kwargs):
         """Called to write player data to the audit log. Typically this is only
@@ -154,6 +380,8 @@ class Auditor(object):
             **kwargs, not used, but included since some types of events include
                 kwargs.
         """
+        self.changes += 1
+
         for item in self.config['player']:
             for player in self.machine.game.player_list:
 
@@ -196,6 +424,9 @@ class Auditor(object):
         self.log.debug("Enabling the Auditor")
         self.enabled = True
 
+        self.games_started += 1
+        self._check_bucket()
+
         # Register for the events we're auditing
         if 'events' in self.config['audit']:
             for event in self.config['events']:
@@ -203,16 +434,22 @@ class Auditor(object):
                                                 self.audit_event,
                                                 eventname=event,
                                                 priority=2)
-                # Make sure we have an entry in our audit file for this event
-                if event not in self.current_audits['events']:
-                    self.current_audits['events'][event] = 0
 
         for event in self.config['save_events']:
             self.machine.events.add_handler(event, self._save_audits,
                                             priority=0)
 
-    def _save_audits(self, delay_secs=3):
-        self.data_manager.save_all(data=self.current_audits,
+    def _snapshot(self, **kwargs):
+        # Writes the audits if anything has changed. Called by the snapshot
+        # timer and at shutdown.
+        self._check_bucket()
+
+        if self.changes != self.saved_changes:
+            self._save_audits(delay_secs=0)
+
+    def _save_audits(self, delay_secs=3, **kwargs):
+        self.saved_changes = self.changes
+        self.data_manager.save_all(data=self.get_audits(),
                                    delay_secs=delay_secs)
 
     def disable(self, **kwargs):
@@ -21,8 +21,12 @@
 
 import logging
 import socket
+import sys
 import threading
+import traceback
 import locale
+import Queue
+from collections import OrderedDict
 
 from mpf.system.config import Config
 
@@ -59,6 +63,7 @@ class OSC(object):
         config_spec = '''
                         client_port: int|8000
                         debug_messages: boolean|False
+                        max_bundle_messages: int|64
                         '''
 
         self.config = Config.process_config(config_spec,
@@ -75,12 +80,16 @@ class OSC(object):
             self.config['client_updates'] = None
 
         self.OSC_clients = dict()
+        self.client_last_sent = dict()
         self.client_needs_sync = False
         self.client_last_update_time = None
         self.last_loop_time = 1
         self.client_mode = 'name'
-        self.clients_to_delete = list()
-        self.clients_to_add = list()
+
+        # Everything that touches the OSC clients happens in the sending
+        # thread. The queue holds (method, args) tuples for it to call.
+        self.sending_queue = Queue.Queue()
+        self.sending_thread = None
 
         # If this machine uses WPC driver boards then we can drive devices by #
         if self.machine.config['hardware']['driverboards'][0:3] == 'wpc':
@@ -106,6 +115,10 @@ class OSC(object):
         self.server_thread.daemon = True  # needed so OSC thread shuts down
         self.server_thread.start()
 
+        self.sending_thread = threading.Thread(target=self.sending_loop)
+        self.sending_thread.daemon = True
+        self.sending_thread.start()
+
         if 'switches' in self.config['client_updates']:
             self.register_switches()
 
@@ -146,7 +159,10 @@ class OSC(object):
         if cat.upper() == 'SW':
             self.process_switch(name, data)
         elif cat.upper() == 'REFRESH':
-            self.client_needs_sync = True  # is this used anymore?
+            # forget what we sent this client so it gets everything again
+            self.sending_queue.put((self._clear_client_state,
+                                    (client_address, )))
+            self.client_update_all()
         elif cat.upper() == 'LIGHT':
             self.process_light(name, data)
         elif cat.upper() == 'COIL':
@@ -160,10 +176,14 @@ class OSC(object):
         elif cat.upper() == 'SYNC':
             if data[0] == 1:
                 self.client_mode = 'name'
+                self.sending_queue.put((self._clear_client_state,
+                                        (client_address, )))
                 self.client_update_all()
         elif cat.upper() == 'WPCSYNC':
             if data[0] == 1:
                 self.client_mode = 'wpc'
+                self.sending_queue.put((self._clear_client_state,
+                                        (client_address, )))
                 self.client_update_all()
         elif cat.upper() == 'FLIPPER':
             self.process_flipper(name, data)
@@ -280,12 +300,13 @@ class OSC(object):
         if not hasattr(self.machine, 'auditor'):
             return
 
-        for category in self.machine.auditor.current_audits:
-            for entry in self.machine.auditor.current_audits[category]:
-                if category != 'Player':
-                    self.client_send_osc_message(category="audits",
-                        name=category + '/' + entry,
-                        data=self.machine.auditor.current_audits[category][entry])
+        audits = self.machine.auditor.get_audits()
+
+        for category in self.machine.auditor.counters:
+            for entry in audits[category]:
+                self.client_send_osc_message(category="audits",
+                    name=category + '/' + entry,
+                    data=audits[category][entry])
 
         if 'Player' in self.machine.auditor.current_audits:
             for entry in self.machine.auditor.current_audits['Player']:
@@ -338,22 +359,22 @@ class OSC(object):
     def client_update_all_switches(self):
         """ Updates all the switch states on the OSC client."""
 
-        if self.client_mode == 'name':
-            for switch in self.machine.switches:
-                if self.machine.switch_controller.is_active(switch.name):
-                    data = 1
-                else:
-                    data = 0
-                self.client_send_osc_message("sw", switch.name, data)
-
-        elif self.client_mode == 'wpc':
-            for switch in self.machine.switches:
-                if self.machine.switch_controller.is_active(switch.name):
-                    data = 1
-                else:
-                    data = 0
-                self.client_send_osc_message("sw", switch.config[
-                                             'number_str'].lower(), data)
+        messages = list()
+
+        for switch in self.machine.switches:
+            if self.machine.switch_controller.is_active(switch.name):
+                data = 1
+            else:
+                data = 0
+
+            if self.client_mode == 'wpc':
+                name = switch.config['number_str'].lower()
+            else:
+                name = switch.name
+
+            messages.append(("/sw/" + name, data))
+
+        self.sending_queue.put((self.send_osc_messages, (messages, )))
 
     def client_send_osc_message(self, category, name, data):
         """Sends an OSC message to the client to update it
@@ -361,46 +382,123 @@ class OSC(object):
         category - type of update, sw, coil, lamp, led, etc.
         name - the name of the object we're updating
         data - the data we're sending
+
+        The message is queued and sent by the sending thread, so this never
+        blocks.
         """
-        if self.OSC_clients:
-            self.OSC_message = OSCmodule.OSCMessage("/" + str(category) + "/" +
-                                                    name)
-            self.OSC_message.append(data)
+        self.sending_queue.put((self.send_osc_messages,
+                                ([("/" + str(category) + "/" + name, data)],)))
+
+    def sending_loop(self):
+        """Sending loop which sends everything in the sending queue to the
+        OSC clients.
+
+        This method is run as a thread. Consecutive messages in the queue are
+        combined so they can go out in as few bundles as possible.
+        """
+        try:
+            while True:
+                messages = list()
+                method, args = self.sending_queue.get()  # this will block
+
+                while True:
+                    if method == self.send_osc_messages:
+                        messages.extend(args[0])
+                    else:
+                        if messages:
+                            self.send_osc_messages(messages)
+                            messages = list()
+
+                        method(*args)
+
+                    try:
+                        method, args = self.sending_queue.get(False)
+                    except Queue.Empty:
+                        break
+
+                if messages:
+                    self.send_osc_messages(messages)
+
+        except Exception:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value,
+                                               exc_traceback)
+            msg = ''.join(line for line in lines)
+            self.machine.crash_queue.put(msg)
+
+    def send_osc_messages(self, messages):
+        """Sends OSC messages to all the connected clients. Called from the
+        sending thread.
+
+        Args:
+            messages: A list of (address, data) tuples.
+
+        Each client only gets the messages whose data is different from what
+        was last sent to that client for that address, and if there are
+        several messages for the same address only the last one is sent.
+        Multiple messages are sent as OSC bundles of up to the
+        'max_bundle_messages' setting.
+        """
+        messages = OrderedDict(messages)
+
+        for address, client in self.OSC_clients.items():
+            last_sent = self.client_last_sent[address]
+
+            changes = [(path, data) for path, data in messages.iteritems()
+                       if path not in last_sent or last_sent[path] != data]
+
+            try:
+                for i in xrange(0, len(changes),
+                                self.config['max_bundle_messages']):
+                    chunk = changes[i:i + self.config['max_bundle_messages']]
+
+                    if len(chunk) == 1:
+                        osc_message = self._create_osc_message(*chunk[0])
+                    else:
+                        osc_message = OSCmodule.OSCBundle()
+                        for path, data in chunk:
+                            osc_message.append(
+                                self._create_osc_message(path, data))
 
-            for k in self.OSC_clients.items():
-                try:
                     if self.config['debug_messages']:
-                            self.log.info("Sending OSC Message to client:%s: "
-                                           "%s", k, self.OSC_message, )
-                    k[1].send(self.OSC_message)
+                        self.log.info("Sending OSC Message to client:%s: %s",
+                                      address, osc_message)
+
+                    client.send(osc_message)
 
-                except OSCmodule.OSCClientError:
-                    self.log.info("OSC client at address %s disconnected",
-                                   k[0])
-                    # todo mark for deletion
-                    self.clients_to_delete.append(k)
-                    break
+                    for path, data in chunk:
+                        last_sent[path] = data
 
-        for client in self.clients_to_delete:
-            if client in self.OSC_clients:
-                del self.OSC_clients[client]
-        self.clients_to_delete = []
+            except OSCmodule.OSCClientError:
+                self.log.info("OSC client at address %s disconnected",
+                              address[0])
+                del self.OSC_clients[address]
+                del self.client_last_sent[address]
 
-        for client in self.clients_to_add:
-            self.setup_osc_client(client)
+    def _create_osc_message(self, path, data):
+        osc_message = OSCmodule.OSCMessage(path)
+        osc_message.append(data)
+        return osc_message
+
+    def _clear_client_state(self, address):
+        # Called from the sending thread
+        if address in self.client_last_sent:
+            self.client_last_sent[address] = dict()
 
     def found_new_osc_client(self, address):
         if address not in self.OSC_clients:
-            self.clients_to_add.append(address)
+            self.sending_queue.put((self.setup_osc_client, (address, )))
 
     def setup_osc_client(self, address):
-        """Setup a new OSC client"""
+        """Setup a new OSC client. Called from the sending thread."""
+        if address in self.OSC_clients:
+            return
+
         self.log.info("OSC client at address %s connected", address[0])
         self.OSC_clients[address] = OSCmodule.OSCClient()
         self.OSC_clients[address].connect((address[0],
                                            self.config['client_port']))
-        if address in self.clients_to_add:
-            self.clients_to_add.remove(address)
+        self.client_last_sent[address] = dict()
 
 
 plugin_class = OSC
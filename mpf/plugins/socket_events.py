@@ -7,6 +7,13 @@
 # Documentation and more info at http://missionpinball.com/mpf
 import logging
 import socket
+import sys
+import threading
+import time
+import traceback
+import Queue
+
+from mpf.system.config import Config
 
 
 class SocketClient(object):
@@ -18,24 +25,53 @@ class SocketClient(object):
         if 'socketserver' not in self.machine.config:
             return
 
-        self.client_socket = None
-        self.server_name = 'localhost'
-        self.server_port = 5050
+        self.senders = list()
         self.config = None
 
-        if 'host' in self.machine.config['socketserver']:
-            self.server_name = self.machine.config['socketserver']['host']
-        if 'port' in self.machine.config['socketserver']:
-            self.server_port = self.machine.config['socketserver']['port']
-
-        self.setup_client(self.server_name, self.server_port)
+        config_spec = '''
+                        host: string|localhost
+                        port: int|5050
+                        queue_size: int|1000
+                        reconnect_max_secs: secs|30s
+                        '''
+
+        # these settings are options for the plugin itself. Everything else
+        # in the socketserver: section is an event to send.
+        self.settings = Config.process_config(config_spec, dict(
+            (k, v) for k, v in self.machine.config['socketserver'].iteritems()
+            if k in ('host', 'port', 'queue_size', 'reconnect_max_secs')))
+
+        destinations = self.machine.config['socketserver'].get(
+            'destinations')
+
+        if destinations:
+            for name, settings in destinations.iteritems():
+                self.add_destination(name, settings.get('host', 'localhost'),
+                                     settings.get('port', 5050))
+        else:
+            self.add_destination('default', self.settings['host'],
+                                 self.settings['port'])
 
         self.machine.events.add_handler('shutdown', self.stop_client)
 
-        if not self.client_socket:
-            return
+        self.process_config(dict(
+            (k, v) for k, v in self.machine.config['socketserver'].iteritems()
+            if k not in self.settings and k != 'destinations'))
 
-        self.process_config(self.machine.config['socketserver'])
+    def add_destination(self, name, host, port):
+        """Adds a remote socket server which all the socket events will be
+        sent to.
+
+        Args:
+            name: String name of this destination, used in the log.
+            host: String of the host name.
+            port: Int of the port number.
+        """
+        sender = SocketSender(self.machine, name, host, port,
+                              self.settings['queue_size'],
+                              self.settings['reconnect_max_secs'])
+        sender.start()
+        self.senders.append(sender)
 
     def process_config(self, config):
         """Processes the SocketEvents from the config.
@@ -51,27 +87,24 @@ class SocketClient(object):
             self.machine.events.add_handler(event, self._event_callback,
                                             settings=settings)
 
-    def setup_client(self, host, port):
-        """Sets up the socket client.
-
-        Args:
-            host: String of the host name.
-            port: Int of the port name.
-        """
-        try:
-            self.client_socket = socket.socket(socket.AF_INET,
-                                               socket.SOCK_STREAM)
-            self.client_socket.connect((host, port))
-
-        except IOError:
-            self.log.error('Could not connect to remote socket server. %s:%s',
-                           host, port)
-
     def stop_client(self):
         """Stops and shuts down the socket client."""
         self.log.info("Stopping socket client")
-        self.client_socket.close()
-        self.client_socket = None
+
+        for sender in self.senders:
+            stats = sender.get_stats()
+            self.log.info("Destination '%s': sent: %s, dropped: %s, "
+                          "reconnects: %s, queued: %s", sender.name,
+                          stats['sent'], stats['dropped'],
+                          stats['reconnects'], stats['queue_depth'])
+            sender.stop()
+
+    def get_stats(self):
+        """Returns a dictionary of the stats of each destination. Keys are
+        destination names, values are dicts from SocketSender.get_stats().
+        """
+        return dict((sender.name, sender.get_stats())
+                    for sender in self.senders)
 
     def _event_callback(self, settings, **kwargs):
 
@@ -95,28 +128,189 @@ class SocketClient(object):
         self.send_message(string)
 
     def send_message(self, message):
-        """Sends a message to the remote socket host.
+        """Sends a message to the remote socket host(s).
 
         Args:
             message: String of the message to send.
+
+        This method never blocks. The message is queued for each destination's
+        sending thread, and if a destination's queue is full the message is
+        dropped for that destination.
         """
 
-        self.log.info("SOCKET SENDING: %s", message)
+        self.log.debug("SOCKET SENDING: %s", message)
+
+        for sender in self.senders:
+            sender.send(message + '\n')
+
+
+class SocketSender(threading.Thread):
+    """Sending thread for one remote socket server.
+
+    Args:
+        machine: The main MachineController object.
+        name: String name of this destination.
+        host: String of the host name.
+        port: Int of the port number.
+        queue_size: Int of the max number of messages that can be waiting to be
+            sent. Messages sent while the queue is full are dropped.
+        reconnect_max_secs: The max number of seconds to wait between
+            reconnection attempts. The wait starts small and doubles after
+            each failed attempt up to this limit.
+
+    All the messages waiting in the queue are sent together in a single write.
 
-        prepped_message = message + '\n'
+    """
 
+    def __init__(self, machine, name, host, port, queue_size=1000,
+                 reconnect_max_secs=30.0):
+
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.machine = machine
+        self.name = name
+        self.host = host
+        self.port = port
+        self.reconnect_max_secs = reconnect_max_secs
+        self.log = logging.getLogger('SocketEvents.' + name)
+
+        self.queue = Queue.Queue(maxsize=queue_size)
+        self.client_socket = None
+        self.done = False
+
+        self.sent = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self._dropping = False
+        self._connected_before = False
+        self._connect_failed = False
+
+    def __repr__(self):
+        return '<SocketSender.{}:{}>'.format(self.host, self.port)
+
+    def send(self, message):
+        """Queues a message to be sent. Called from the main thread.
+
+        Args:
+            message: String of the message to send.
+        """
         try:
-            self.client_socket.send(prepped_message)
+            self.queue.put_nowait(message)
+            self._dropping = False
+
+        except Queue.Full:
+            self.dropped += 1
 
-        except IOError:
-            # maybe we got disconnected? Attempt to connect and send.
-            self.setup_client(self.server_name, self.server_port)
+            # only log the first drop of a run so we don't flood the log
+            if not self._dropping:
+                self.log.warning("Sending queue for %s:%s is full. Dropping "
+                                 "messages.", self.host, self.port)
+                self._dropping = True
 
+    def stop(self):
+        """Stops the sending thread once the messages already queued have
+        been sent."""
+        try:
+            self.queue.put_nowait(None)
+        except Queue.Full:
+            # no room for the sentinel, so stop after the current batch
+            self.done = True
+
+    def get_stats(self):
+        """Returns a dictionary with the counts of sent, dropped and queued
+        messages and the number of reconnects."""
+        return dict(sent=self.sent, dropped=self.dropped,
+                    reconnects=self.reconnects,
+                    queue_depth=self.queue.qsize())
+
+    def run(self):
+        """The sending thread's run loop."""
+        try:
+            backoff = 0.1
+            self._connect()
+
+            stopping = False
+
+            while not stopping:
+                messages = [self.queue.get()]  # this will block
+
+                while True:
+                    try:
+                        messages.append(self.queue.get_nowait())
+                    except Queue.Empty:
+                        break
+
+                # the None from stop() ends the loop once this batch is sent
+                if None in messages:
+                    stopping = True
+                    messages = [x for x in messages if x is not None]
+
+                while messages:
+                    if not self.client_socket and not self._connect():
+                        time.sleep(backoff)
+                        backoff = min(backoff * 2, self.reconnect_max_secs)
+                        continue
+
+                    backoff = 0.1
+
+                    try:
+                        self.client_socket.sendall(''.join(messages))
+                        self.sent += len(messages)
+                        messages = list()
+
+                    except (IOError, socket.error):
+                        # maybe we got disconnected? Reconnect and resend.
+                        self.log.warning("Lost connection to %s:%s",
+                                         self.host, self.port)
+                        self._close()
+
+                # stop() couldn't queue the None, so stop once it's all sent
+                if self.done and self.queue.empty():
+                    stopping = True
+
+            self._close()
+
+        except Exception:
+            exc_type, exc_value, exc_traceback = sys.exc_info()
+            lines = traceback.format_exception(exc_type, exc_value,
+                                               exc_traceback)
+            msg = ''.join(line for line in lines)
+            self.machine.crash_queue.put(msg)
+
+    def _connect(self):
+        try:
+            self.client_socket = socket.socket(socket.AF_INET,
+                                               socket.SOCK_STREAM)
+            self.client_socket.connect((self.host, self.port))
+
+        except (IOError, socket.error):
+            # only log the first failure until we connect again
+            if not self._connect_failed:
+                self.log.error('Could not connect to remote socket server. '
+                               '%s:%s', self.host, self.port)
+                self._connect_failed = True
+
+            self.client_socket = None
+            return False
+
+        self.log.info("Connected to remote socket server %s:%s", self.host,
+                      self.port)
+
+        if self._connected_before:
+            self.reconnects += 1
+
+        self._connected_before = True
+        self._connect_failed = False
+        return True
+
+    def _close(self):
+        if self.client_socket:
             try:
-                self.client_socket.send(prepped_message)
-            except:
-                self.log.error('Unable to send %s to remote socket server',
-                               prepped_message)
+                self.client_socket.close()
+            except (IOError, socket.error):
+                pass
+
+        self.client_socket = None
 
 
 plugin_class = SocketClient
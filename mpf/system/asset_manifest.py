@@ -0,0 +1,273 @@
+"""Contains the AssetManifest class."""
+# asset_manifest.py
+# Mission Pinball Framework
+# Written by Brian Madden & Gabe Knuth
+# Released under the MIT License. (See license info at the end of this file.)
+
+# Documentation and more info at http://missionpinball.com/mpf
+
+import cPickle as pickle
+import errno
+import hashlib
+import logging
+import os
+
+import version
+
+
+class AssetManifest(object):
+    """Caches the results of scanning the asset folders on disk, so MPF
+    doesn't have to walk the asset folders and rebuild every asset's config
+    on each boot.
+
+    The manifest stores the contents of each folder it has scanned, along
+    with the folder's mtime. (Adding, removing or renaming a file changes the
+    mtime of its folder.) Only the folders whose mtime changed are listed
+    again. It also stores the finished asset configs of each asset folder,
+    which are used as long as none of the folders changed and the asset
+    defaults and config entries they were built from are the same.
+
+    Each asset also gets an integer id which stays the same between boots.
+
+    Args:
+        filename: The file (with path) of the manifest file.
+        rebuild: Boolean which ignores the existing manifest file.
+
+    """
+
+    def __init__(self, filename, rebuild=False):
+        self.log = logging.getLogger('AssetManifest')
+        self.filename = filename
+        self.folders = dict()
+        self.assets = dict()
+        self.ids = dict()
+        self.dirty = False
+
+        if rebuild:
+            self.dirty = True
+        else:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.filename, 'rb') as f:
+                manifest = pickle.load(f)
+        except IOError:
+            self.log.debug("No asset manifest at %s", self.filename)
+            return
+        except Exception:
+            self.log.warning("Asset manifest %s is not readable. Rebuilding "
+                             "it.", self.filename)
+            self.dirty = True
+            return
+
+        if (not isinstance(manifest, dict) or
+                manifest.get('version') != version.__version__):
+            self.dirty = True
+            return
+
+        self.folders = manifest['folders']
+        self.assets = manifest['assets']
+        self.ids = manifest['ids']
+
+    def walk(self, root_path, folders=None):
+        """Walks a folder tree like os.walk(root_path, followlinks=True), but
+        only lists the folders which changed since the last scan.
+
+        Args:
+            root_path: The folder to walk.
+            folders: Optional list which each folder that was walked is
+                appended to.
+
+        Returns:
+            A generator of (path, file_names) tuples, in the same order as
+            os.walk().
+
+        """
+        try:
+            mtime = os.stat(root_path).st_mtime
+        except OSError:
+            return
+
+        if folders is not None:
+            folders.append((root_path, mtime))
+
+        try:
+            cached_mtime, dirs, files = self.folders[root_path]
+        except KeyError:
+            cached_mtime = None
+
+        if cached_mtime != mtime:
+            try:
+                names = os.listdir(root_path)
+            except OSError:
+                return
+
+            dirs = list()
+            files = list()
+
+            for name in names:
+                if os.path.isdir(os.path.join(root_path, name)):
+                    dirs.append(name)
+                else:
+                    files.append(name)
+
+            self.folders[root_path] = (mtime, dirs, files)
+            self.dirty = True
+
+        yield root_path, files
+
+        for name in dirs:
+            for result in self.walk(os.path.join(root_path, name), folders):
+                yield result
+
+    @staticmethod
+    def get_fingerprint(*args):
+        """Returns a hash of the (picklable) objects passed, or None if they
+        can't be pickled."""
+        try:
+            return hashlib.md5(pickle.dumps(args,
+                                            pickle.HIGHEST_PROTOCOL)).digest()
+        except (pickle.PicklingError, TypeError):
+            return None
+
+    def get_assets(self, name, root_path, fingerprint):
+        """Returns the cached asset configs of a folder.
+
+        Args:
+            name: String name of the asset type, e.g. 'images'.
+            root_path: The asset folder.
+            fingerprint: The fingerprint (from :meth:`get_fingerprint`) of the
+                settings the configs were built from.
+
+        Returns:
+            A new copy of the configs dictionary, or None if it's not cached,
+            the fingerprint is different or any of the folders has changed.
+
+        """
+        try:
+            cached_fingerprint, folders, data = self.assets[(name, root_path)]
+        except KeyError:
+            return None
+
+        if not fingerprint or fingerprint != cached_fingerprint:
+            return None
+
+        for path, mtime in folders:
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return None
+            except OSError:
+                return None
+
+        if not folders and os.path.exists(root_path):
+            return None
+
+        return pickle.loads(data)
+
+    def add_assets(self, name, root_path, fingerprint, config, folders):
+        """Adds the asset configs of a folder to the manifest.
+
+        Args:
+            name: String name of the asset type, e.g. 'images'.
+            root_path: The asset folder.
+            fingerprint: The fingerprint of the settings the configs were
+                built from.
+            config: The dictionary of asset configs.
+            folders: The list of (path, mtime) tuples of the folders which
+                were walked, from :meth:`walk`.
+
+        """
+        if not fingerprint:
+            return
+
+        try:
+            data = pickle.dumps(config, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError):
+            return
+
+        self.assets[(name, root_path)] = (fingerprint, folders, data)
+        self.dirty = True
+
+    def get_id(self, name, asset):
+        """Returns the integer id of an asset, adding a new one if this asset
+        doesn't have one yet.
+
+        Args:
+            name: String name of the asset type, e.g. 'images'.
+            asset: String name of the asset.
+
+        """
+        try:
+            return self.ids[(name, asset)]
+        except KeyError:
+            asset_id = len(self.ids) + 1
+            self.ids[(name, asset)] = asset_id
+            self.dirty = True
+            return asset_id
+
+    def save(self, **kwargs):
+        """Writes the manifest file to disk if anything changed.
+
+        Args:
+            **kwargs: Not used. Included so this method can be used as an
+                event handler.
+
+        """
+        if not self.dirty:
+            return
+
+        manifest = dict(version=version.__version__,
+                        folders=self.folders,
+                        assets=self.assets,
+                        ids=self.ids)
+
+        temp_file = self.filename + '.tmp'
+
+        try:
+            try:
+                os.makedirs(os.path.dirname(self.filename))
+            except OSError as exception:
+                if exception.errno != errno.EEXIST:
+                    raise
+
+            with open(temp_file, 'wb') as f:
+                pickle.dump(manifest, f, pickle.HIGHEST_PROTOCOL)
+
+            if os.path.exists(self.filename):
+                # Windows can't rename over an existing file
+                os.remove(self.filename)
+
+            os.rename(temp_file, self.filename)
+
+        except (IOError, OSError) as e:
+            self.log.warning("Could not write asset manifest %s: %s",
+                             self.filename, e)
+            return
+
+        self.log.debug("Saved asset manifest to %s", self.filename)
+        self.dirty = False
+
+
+
+# The MIT License (MIT)
+
+# Copyright (c) 2013-2015 Brian Madden and Gabe Knuth
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
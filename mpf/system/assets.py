@@ -10,63 +10,66 @@ import logging
 import os
 import threading
 import copy
+from collections import OrderedDict
 from Queue import PriorityQueue
 import sys
+import time
 import traceback
 
 from mpf.system.config import CaseInsensitiveDict
+from mpf.system.file_manager import FileManager
+from mpf.system.utility_functions import Util
 
 
 class AssetLoader(threading.Thread):
     """Base class for the Asset Loader with runs as a separate thread and
     actually loads the assets from disk.
 
+    Several loaders share the same queue, so one slow asset (like a long
+    sound) doesn't hold up the others.
+
     Args:
-        name: String name of what this loader will be called. (Only really used
-            to give a friendly name to it in logs.)
         queue: A reference to the asset loader ``Queue`` which holds assets
             waiting to be loaded.
-        machine: The main ``MachineController`` object.
+        name: String name of what this loader will be called. (Only really used
+            to give a friendly name to it in logs.)
 
     """
 
-    def __init__(self, queue):
+    def __init__(self, queue, name='Asset Loader'):
 
-        threading.Thread.__init__(self)
-        self.log = logging.getLogger('Asset Loader')
+        threading.Thread.__init__(self, name=name)
+        self.log = logging.getLogger(name)
         self.queue = queue
+        self.exception_queue = None
 
     def run(self):
         """Run loop for the loader thread."""
 
         try:
             while True:
-                asset = self.queue.get()
+                request = self.queue.get()[2]
+
+                # The same request can be in the queue more than once if it
+                # was added again with a higher priority, and requests can be
+                # cancelled while they're waiting.
+                if not request.start():
+                    continue
 
-                if not asset[1].loaded:
-                    self.log.debug("Loading Asset: %s. Callback: %s", asset[1],
-                                   asset[2])
-                    asset[1].do_load(asset[2])
+                asset = request.asset
+
+                if not asset.loaded:
+                    self.log.debug("Loading Asset: %s", asset)
+                    asset.do_load(None)
                     self.log.debug("Asset Finished Loading: %s. Remaining: %s",
-                                   asset[1], self.queue.qsize())
-
-                # If the asset is already loaded and we don't need to load it
-                # again, we still need to call the callback.
-                elif asset[2]:
-                    self.log.debug("Calling callback for asset %s since it's "
-                                   "already loaded. Callback: %s", asset[1],
-                                   asset[2])
-                    asset[2]()
-
-                # AssetManager.remove_asset_to_load()
-
-                # If the asset is already loaded, just ignore it and move on.
-                # I thought about trying to make sure that an asset isn't
-                # in the queue before it gets added. But since this is separate
-                # threads that would require all sorts of work. It's actually
-                # more efficient to add it to the queue anyway and then just
-                # skip it if it's already loaded by the time the loader gets to
-                # it.
+                                   asset, AssetManager.get_pending_count())
+
+                    if asset.loaded:
+                        asset.asset_manager.asset_loaded(asset)
+
+                # If the asset is already loaded, we still need to call the
+                # callbacks.
+                request.finish()
 
         except Exception:
             exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -75,6 +78,116 @@ class AssetLoader(threading.Thread):
             self.exception_queue.put(msg)
 
 
+class AssetLoadRequest(object):
+    """A request to load an asset, which may be shared by several callers who
+    want the same asset loaded while it's still waiting in the loader queue.
+
+    Args:
+        asset: The Asset object to load.
+
+    """
+
+    def __init__(self, asset):
+        self.asset = asset
+        self.callbacks = list()
+        self.groups = set()
+        self.priority = None
+        self.started = False
+        self.cancelled = False
+        self.on_demand = False
+
+    def start(self):
+        # Called by a loader thread. Returns False if this request shouldn't
+        # be loaded (anymore).
+        with AssetManager.loader_lock:
+            if self.started or self.cancelled:
+                return False
+
+            self.started = True
+            return True
+
+    def finish(self):
+        # Called by a loader thread once the asset is loaded.
+        with AssetManager.loader_lock:
+            if AssetManager.pending_loads.get(self.asset) is self:
+                del AssetManager.pending_loads[self.asset]
+
+            AssetManager.loaded_assets += 1
+            callbacks = self.callbacks
+            groups = self.groups
+
+        if self.asset.loaded:
+            for callback in callbacks:
+                callback()
+
+        for group in groups:
+            group.remove(self.asset)
+
+    def cancel(self):
+        # Must be called with the loader lock held.
+        self.cancelled = True
+        AssetManager.cancelled_assets += 1
+
+        if AssetManager.pending_loads.get(self.asset) is self:
+            del AssetManager.pending_loads[self.asset]
+
+
+class AssetLoadGroup(object):
+    """Tracks a group of assets which are loaded together, e.g. the assets
+    which are loaded when a mode starts, so something can be called once all
+    of them are loaded.
+
+    Get a group with :meth:`AssetManager.get_load_group`. The completion
+    callbacks are called from the loader thread which loaded the last asset
+    of the group (or right away if the group is already complete).
+
+    Args:
+        name: String name of the group, e.g. the name of a mode.
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.pending = set()
+        self.callbacks = list()
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return '<AssetLoadGroup: {} ({} pending)>'.format(self.name,
+                                                         len(self.pending))
+
+    @property
+    def complete(self):
+        return not self.pending
+
+    def add(self, asset):
+        with self.lock:
+            self.pending.add(asset)
+
+    def remove(self, asset):
+        with self.lock:
+            self.pending.discard(asset)
+
+            if self.pending:
+                return
+
+            callbacks = self.callbacks
+            self.callbacks = list()
+
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback):
+        """Adds a callback which is called once all the assets in this group
+        are loaded (or cancelled)."""
+        with self.lock:
+            if self.pending:
+                self.callbacks.append(callback)
+                return
+
+        callback()
+
+
 class AssetManager(object):
     """Base class for an Asset Manager.
 
@@ -96,16 +209,80 @@ class AssetManager(object):
     There will be one Asset Manager for each different type of asset. (e.g. one
     for images, one for movies, one for sounds, etc.)
 
-    All asset managers share a single loader thread.
+    All asset managers share a pool of loader threads.
+
+    Loaded assets are reference counted. Each mode which loads an asset and
+    each display element which shows it holds a reference, and the asset is
+    only unloaded once nothing references it anymore. If there's a memory
+    budget for this asset type (in the ``asset_memory:`` config section),
+    unreferenced assets stay loaded and the least recently used ones are
+    unloaded when the loaded assets go over the budget.
 
     """
     total_assets = 0
+    loaded_assets = 0
+    cancelled_assets = 0
 
     loader_queue = PriorityQueue()
+    loader_lock = threading.RLock()
+    loader_threads = list()
+    num_loader_threads = 2
+
+    pending_loads = dict()
+    """Dictionary of the AssetLoadRequests of the assets which are waiting to
+    be loaded, keyed by asset."""
+
+    load_groups = dict()
+    _load_count = 0
 
-    loader_thread = AssetLoader(loader_queue)
-    loader_thread.daemon = True
-    loader_thread.start()
+    @classmethod
+    def start_loader_threads(cls, exception_queue):
+        """Starts the loader threads (if they're not running yet).
+
+        Args:
+            exception_queue: Queue which the loader threads post the
+                traceback to if they crash.
+
+        """
+        while len(cls.loader_threads) < max(1, cls.num_loader_threads):
+            loader_thread = AssetLoader(
+                cls.loader_queue,
+                name='Asset Loader {}'.format(len(cls.loader_threads) + 1))
+            loader_thread.daemon = True
+            cls.loader_threads.append(loader_thread)
+            loader_thread.start()
+
+        for loader_thread in cls.loader_threads:
+            loader_thread.exception_queue = exception_queue
+
+    @classmethod
+    def get_pending_count(cls):
+        """Returns the number of assets which are waiting to be loaded."""
+        return len(cls.pending_loads)
+
+    @classmethod
+    def get_loader_stats(cls):
+        """Returns a dictionary of the asset loader progress counters."""
+        return dict(total=cls.total_assets,
+                    pending=len(cls.pending_loads),
+                    loaded=cls.loaded_assets,
+                    cancelled=cls.cancelled_assets,
+                    threads=len(cls.loader_threads))
+
+    @classmethod
+    def get_load_group(cls, name):
+        """Returns the AssetLoadGroup with this name, creating it if there
+        isn't one which still has assets to load.
+
+        """
+        with cls.loader_lock:
+            group = cls.load_groups.get(name)
+
+            if not group or group.complete:
+                group = AssetLoadGroup(name)
+                cls.load_groups[name] = group
+
+            return group
 
     def __init__(self, machine, config_section, path_string, asset_class,
                  asset_attribute, file_extensions):
@@ -114,8 +291,7 @@ class AssetManager(object):
         self.log.debug("Initializing...")
 
         self.machine = machine
-        self.loader_thread.exception_queue = self.machine.crash_queue
-        self.max_memory = None
+        self.start_loader_threads(self.machine.crash_queue)
         self.registered_assets = set()
         self.path_string = path_string
         self.config_section = config_section
@@ -124,6 +300,11 @@ class AssetManager(object):
 
         self.machine.asset_managers[config_section] = self
 
+        # the machine's AssetManifest, if it uses one
+        self.manifest = getattr(self.machine, 'asset_manifest', None)
+        self.assets_by_id = dict()
+        self._next_asset_id = 1
+
         if not hasattr(self.machine, asset_attribute):
             setattr(self.machine, asset_attribute, CaseInsensitiveDict())
 
@@ -145,6 +326,22 @@ class AssetManager(object):
                                         priority=self.asset_class.load_priority)
 
         self.defaults = self.setup_defaults(self.machine.config)
+        self._flat_defaults = dict()
+
+        try:
+            self.max_memory = Util.string_to_bytes(
+                self.machine.config['asset_memory'][config_section])
+        except (KeyError, TypeError):
+            self.max_memory = None
+
+        self.memory_used = 0
+        self.unreferenced = OrderedDict()
+        """Loaded assets which nothing references, in least recently used
+        order. These are the ones which can be evicted."""
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
     def process_assets_from_disk(self, config, path=None):
         """Looks at a path and finds all the assets in the folder.
@@ -176,7 +373,31 @@ class AssetManager(object):
 
         self.log.debug("Processing assets from base folder: %s", root_path)
 
-        for path, _, files in os.walk(root_path, followlinks=True):
+        if self.manifest:
+            fingerprint = self.manifest.get_fingerprint(
+                self.defaults, config, self.file_extensions)
+
+            cached_config = self.manifest.get_assets(self.config_section,
+                                                     root_path, fingerprint)
+            if cached_config is not None:
+                return cached_config
+
+            folders = list()
+            walk = self.manifest.walk(root_path, folders)
+
+        else:
+            walk = ((path, files) for path, _, files in
+                    os.walk(root_path, followlinks=True))
+
+        # index the config entries by file name so we don't have to search
+        # the whole config for each file
+        config_files = dict()
+
+        for k, v in config.iteritems():
+            if 'file' in v:
+                config_files.setdefault(v['file'], k)
+
+        for path, files in walk:
 
             valid_files = [f for f in files if f.endswith(self.file_extensions)]
 
@@ -190,25 +411,13 @@ class AssetManager(object):
                 else:
                     default_string = folder
 
-                #print "------"
-                #print "path:", path
-                #print "full_path", full_file_path
-                #print "file:", file_name
-                #print "name:", name
-                #print "folder:", folder
-                #print "default settings name:", default_string
-                #print "default settings:", self.defaults[default_string]
+                built_up_config = self._copy_defaults(default_string)
 
-                built_up_config = copy.deepcopy(self.defaults[default_string])
-
-                for k, v in config.iteritems():
-
-                    if ('file' in v and v['file'] == file_name) or name == k:
-                        if name != k:
-                            name = k
-                            #print "NEW NAME:", name
-                        built_up_config.update(config[k])
-                        break
+                if file_name in config_files:
+                    name = config_files[file_name]
+                    built_up_config.update(config[name])
+                elif name in config:
+                    built_up_config.update(config[name])
 
                 built_up_config['file'] = full_file_path
 
@@ -218,8 +427,26 @@ class AssetManager(object):
                                " %s, Final Config: %s", name, file_name,
                                default_string, built_up_config)
 
+        if self.manifest:
+            self.manifest.add_assets(self.config_section, root_path,
+                                     fingerprint, config, folders)
+
         return config
 
+    def _copy_defaults(self, default_string):
+        # Returns a copy of a section of the asset defaults. Most sections only
+        # have simple values, so a shallow copy is enough for those.
+        defaults = self.defaults[default_string]
+
+        if default_string not in self._flat_defaults:
+            self._flat_defaults[default_string] = not any(
+                isinstance(v, (dict, list, set)) for v in defaults.values())
+
+        if self._flat_defaults[default_string]:
+            return copy.copy(defaults)
+        else:
+            return copy.deepcopy(defaults)
+
     def register_and_load_machine_assets(self):
         """Called on MPF boot to register any assets found in the machine-wide
         configuration files. (i.e. any assets not specified in mode config
@@ -236,14 +463,17 @@ class AssetManager(object):
         else:
             config = None
 
-        self.machine.config[self.config_section] = self.register_assets(
-            config=config)
+        with self.machine.startup_profiler.profile(self.config_section,
+                                                   'assets'):
+            self.machine.config[self.config_section] = self.register_assets(
+                config=config)
 
-        self.log.debug("Loading machine-wide 'preload' %s", self.config_section)
+            self.log.debug("Loading machine-wide 'preload' %s",
+                           self.config_section)
 
-        # Load preload systemwide assets
-        self.load_assets(self.machine.config[self.config_section],
-                         load_key='preload')
+            # Load preload systemwide assets
+            self.load_assets(self.machine.config[self.config_section],
+                             load_key='preload')
 
     def setup_defaults(self, config):
         """Processed the ``asset_defaults`` section of the machine config
@@ -329,14 +559,26 @@ class AssetManager(object):
         # actually loads assets from a config file. Assumes that they've
         # aleady been registered.
 
-        asset_set = set()
+        assets = [self.asset_list[asset] for asset in config
+                  if self.asset_list[asset].config['load'] == load_key]
 
-        for asset in config:
-            if self.asset_list[asset].config['load'] == load_key:
-                self.asset_list[asset].load(callback=callback)
-                asset_set.add(self.asset_list[asset])
+        if load_key == 'preload':
+            # preload assets are loaded at boot, so parse all their files at
+            # once instead of one at a time in the loader thread
+            FileManager.preload([asset.file_name for asset in assets
+                                 if asset.file_manager_asset and
+                                 not asset.loaded])
+
+        if mode:
+            group = self.get_load_group(mode.name)
+        else:
+            group = None
 
-        return self.unload_assets, asset_set
+        for asset in assets:
+            self.add_ref(asset)
+            self.load_asset(asset, callback, group=group)
+
+        return self.unload_assets, set(assets)
 
     def register_asset(self, asset, config):
         """Registers an asset with the Asset Manager.
@@ -358,25 +600,161 @@ class AssetManager(object):
         #this_config = copy.deepcopy(self.defaults[default_config_name])
         #this_config.update(config)
 
-        self.asset_list[asset] = self.asset_class(self.machine, config,
-                                                  config['file'], self)
+        asset_object = self.asset_class(self.machine, config, config['file'],
+                                        self)
+
+        if self.manifest:
+            asset_object.id = self.manifest.get_id(self.config_section, asset)
+        else:
+            asset_object.id = self._next_asset_id
+            self._next_asset_id += 1
+
+        self.asset_list[asset] = asset_object
+        self.assets_by_id[asset_object.id] = asset_object
+
+    def get_asset_by_id(self, asset_id):
+        """Returns the asset with this integer id, or None if there isn't
+        one.
+
+        Asset ids stay the same between boots when the machine uses an asset
+        manifest, so they can be stored or sent instead of the asset names.
+
+        """
+        return self.assets_by_id.get(asset_id)
 
     def unload_assets(self, asset_set):
-        """Unloads assets from memory.
+        """Releases the references to a set of assets which were loaded with
+        :meth:`load_assets`.
 
         Args:
             asset_set: A set (or any iterable) of Asset objects which will be
-                unloaded.
+                released.
 
-        Unloading an asset does not de-register it. It's still available to be
-        used, but it's just unloaded from memory to save on memory.
+        Assets which are still referenced (e.g. by another mode) stay loaded.
+        The others are unloaded, or kept until they're evicted if this asset
+        type has a memory budget. Unloading an asset does not de-register it.
 
         """
         for asset in asset_set:
-            self.log.debug("Unloading asset: %s", asset.file_name)
+            self.release(asset)
+
+    def add_ref(self, asset):
+        """Adds a reference to an asset, which keeps it from being unloaded
+        until the reference is released.
+
+        This doesn't load the asset. Counts a hit if the asset is already
+        loaded and a miss if it isn't.
+
+        """
+        with self.loader_lock:
+            asset.ref_count += 1
+            asset.last_used = time.time()
+
+            if asset.loaded:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+            self.unreferenced.pop(asset, None)
+
+    def release(self, asset):
+        """Releases a reference to an asset which was added with
+        :meth:`add_ref`.
+
+        When the last reference is released, a load which hasn't started yet
+        is cancelled (unless someone who doesn't hold a reference is waiting
+        for it, see :meth:`Asset.load`), and the asset is unloaded (or kept in
+        the cache if there's a memory budget).
+
+        """
+        with self.loader_lock:
+            if asset.ref_count:
+                asset.ref_count -= 1
+
+            if asset.ref_count:
+                return
+
+            # a mode which stops before its assets are loaded cancels them
+            request = self.pending_loads.get(asset)
+
+            if request and not request.started and not request.on_demand:
+                self.log.debug("Cancelling load of asset: %s", asset.file_name)
+                request.cancel()
+
+                for group in request.groups:
+                    group.remove(asset)
+
+            if not asset.loaded:
+                return
+
+            if self.max_memory is None:
+                self.log.debug("Unloading asset: %s", asset.file_name)
+                asset.unload()
+            else:
+                self.unreferenced[asset] = None
+                self._enforce_budget()
+
+    def asset_loaded(self, asset):
+        """Called by the loader thread once an asset is loaded, so its memory
+        can be accounted for."""
+        with self.loader_lock:
+            asset.memory_size = asset.get_memory_size()
+            self.memory_used += asset.memory_size
+
+            if not asset.ref_count and not asset.on_demand:
+                # nothing wants it anymore, so it's evictable right away
+                self.unreferenced[asset] = None
+
+            if self.max_memory is not None:
+                self._enforce_budget()
+
+    def asset_unloaded(self, asset):
+        """Called when an asset is unloaded."""
+        with self.loader_lock:
+            self.memory_used -= asset.memory_size
+            asset.memory_size = 0
+            asset.on_demand = False
+            self.unreferenced.pop(asset, None)
+
+    def _enforce_budget(self):
+        # evicts the least recently used unreferenced assets until the loaded
+        # assets fit into the budget again
+        while self.memory_used > self.max_memory and self.unreferenced:
+            asset = self.unreferenced.popitem(last=False)[0]
+            self.log.debug("Evicting asset: %s (%s bytes)", asset.file_name,
+                           asset.memory_size)
+            self.evictions += 1
             asset.unload()
 
-    def load_asset(self, asset, callback, priority=10):
+    def get_memory_stats(self):
+        """Returns a dictionary of the memory accounting of this asset type.
+
+        The keys are ``used`` and ``max`` (bytes, max is None if there's no
+        budget), ``loaded``, ``referenced`` and ``unreferenced`` (number of
+        assets), and the ``hits``, ``misses`` and ``evictions`` counters.
+
+        """
+        with self.loader_lock:
+            loaded = [x for x in self.asset_list.values() if x.loaded]
+
+            return dict(used=self.memory_used,
+                        max=self.max_memory,
+                        loaded=len(loaded),
+                        referenced=len([x for x in loaded if x.ref_count]),
+                        unreferenced=len(self.unreferenced),
+                        hits=self.hits,
+                        misses=self.misses,
+                        evictions=self.evictions)
+
+    @staticmethod
+    def get_all_memory_stats(machine):
+        """Returns a dictionary of the memory stats of all the asset managers
+        of a machine (or media controller), keyed by asset type."""
+        return dict((name, manager.get_memory_stats()) for name, manager in
+                    machine.asset_managers.iteritems())
+
+    def load_asset(self, asset, callback, priority=10, group=None,
+                   on_demand=False):
         """Loads an asset into memory.
 
         Args:
@@ -386,13 +764,49 @@ class AssetManager(object):
             priority: The relative loading priority of the asset. If there's a
                 queue of assets waiting to be loaded, this load request will be
                 inserted into the queue in a position based on its priority.
+            group: Optional AssetLoadGroup this asset is part of.
+            on_demand: Boolean which is True if the caller doesn't hold a
+                reference to the asset. These loads aren't cancelled when the
+                last reference is released, and the asset isn't evicted
+                until a reference to it has been added and released again.
+
+        If the asset is already waiting to be loaded, it isn't queued again.
+        The callback is just added to the pending request (and the request is
+        moved up if this priority is higher).
 
         """
-        self.loader_queue.put((-priority, asset, callback))
-        # priority above is negative so this becomes a LIFO queue
+        with self.loader_lock:
+            request = self.pending_loads.get(asset)
+
+            if not request:
+                request = AssetLoadRequest(asset)
+                self.pending_loads[asset] = request
+                AssetManager.total_assets += 1
+
+            if callback:
+                request.callbacks.append(callback)
+
+            if on_demand:
+                request.on_demand = True
+                asset.on_demand = True
+                self.unreferenced.pop(asset, None)
+
+            if group:
+                group.add(asset)
+                request.groups.add(group)
+
+            if request.priority is None or priority > request.priority:
+                request.priority = priority
+                AssetManager._load_count += 1
+
+                # priority is negative so higher priorities load first, and
+                # requests with the same priority load in the order they were
+                # added
+                self.loader_queue.put((-priority, AssetManager._load_count,
+                                       request))
+
         self.log.debug("Adding %s to loader queue at priority %s. New queue "
-                       "size: %s", asset, priority, self.loader_queue.qsize())
-        AssetManager.total_assets += 1
+                       "size: %s", asset, priority, self.get_pending_count())
 
     def locate_asset_file(self, file_name, path=None):
         """Takes a file name and a root path and returns a link to the absolute
@@ -436,17 +850,31 @@ class Asset(object):
     first. (e.g. images, sounds, and videos need to be loaded before shows.).
     """
 
+    file_manager_asset = False
+    """Set to True for assets whose files are loaded with the FileManager, so
+    their files can be parsed in parallel when several of them are loaded at
+    once."""
+
     def __init__(self, machine, config, file_name, asset_manager):
         self.machine = machine
         self.config = config
         self.file_name = file_name
         self.asset_manager = asset_manager
         self.loaded = False
+        self.id = None
+
+        self.ref_count = 0
+        self.memory_size = 0
+        self.last_used = None
+        self.on_demand = False
 
         self._initialize_asset()
 
     def load(self, callback=None):
-        self.asset_manager.load_asset(self, callback)
+        """Loads this asset without holding a reference to it, e.g. to play
+        a show or a sound. It stays loaded until a mode (or anything else
+        which references it) has used and released it."""
+        self.asset_manager.load_asset(self, callback, on_demand=True)
 
     def do_load(self, callback):
         pass
@@ -454,6 +882,16 @@ class Asset(object):
     def unload(self):
         self._unload()
         self.loaded = False
+        self.asset_manager.asset_unloaded(self)
+
+    def get_memory_size(self):
+        """Returns the approximate number of bytes this asset uses when it's
+        loaded. The default is the size of its file, so asset classes which
+        decompress their files should override this."""
+        try:
+            return os.path.getsize(self.file_name)
+        except (OSError, TypeError):
+            return 0
 
 
 # The MIT License (MIT)
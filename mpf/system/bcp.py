@@ -13,10 +13,13 @@
 
 # Documentation and more info at http://missionpinball.com/mpf
 
+import bisect
 import logging
 import socket
+import struct
 import threading
 import sys
+import time
 import traceback
 import urllib
 import urlparse
@@ -25,6 +28,7 @@ import copy
 
 from mpf.system.player import Player
 from mpf.system.utility_functions import Util
+from mpf.system.timing import Timer
 from mpf.devices.shot import Shot
 from mpf.system.light_controller import ExternalShow
 import version
@@ -60,11 +64,15 @@ def decode_command_string(bcp_string):
                 for k,v in kwargs.iteritems()))
 
 
-def encode_command_string(bcp_command, **kwargs):
+def encode_command_string(bcp_command, payload=None, **kwargs):
     """Encodes a BCP command and kwargs into a valid BCP command string.
 
     Args:
         bcp_command: String of the BCP command name.
+        payload: Optional raw byte string which will be sent as-is after the
+            command. The length is added as a 'payload_bytes' parameter so the
+            receiver knows how many bytes to read, and the payload is followed
+            by the usual newline separator.
         **kwargs: Optional pair(s) of kwargs which will be appended to the
             command.
 
@@ -83,6 +91,9 @@ def encode_command_string(bcp_command, **kwargs):
 
     kwarg_string = ''
 
+    if payload is not None:
+        kwargs['payload_bytes'] = len(payload)
+
     try:
         for k, v in kwargs.iteritems():
             kwarg_string += (urllib.quote(k.lower(), '') + '=' +
@@ -93,8 +104,89 @@ def encode_command_string(bcp_command, **kwargs):
     except (TypeError, AttributeError):
         pass
 
-    return unicode(urlparse.urlunparse((None, None, bcp_command.lower(), None,
-                                        kwarg_string, None)), 'utf-8')
+    bcp_string = unicode(urlparse.urlunparse((None, None, bcp_command.lower(),
+                                              None, kwarg_string, None)),
+                         'utf-8')
+
+    if payload is not None:
+        # The payload is binary, so it can't be part of the unicode string
+        bcp_string = bcp_string.encode('utf-8') + '\n' + payload
+
+    return bcp_string
+
+
+RTT_HISTOGRAM_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+"""Upper bounds (in ms) of the buckets of the BCP round trip time histogram.
+Round trips longer than the last bucket are counted in an extra overflow bucket.
+"""
+
+DMD_DELTA_SPAN = struct.Struct('<II')
+DMD_DELTA_LENGTH = struct.Struct('<I')
+
+
+def encode_dmd_delta(prev_frame, frame, row_length, runs=False):
+    """Encodes the changes between two raw DMD frames into the payload of a
+    BCP 'dmd_delta' command.
+
+    Args:
+        prev_frame: The raw byte string of the frame the remote side already
+            has.
+        frame: The raw byte string of the new frame. Must be the same length as
+            prev_frame.
+        row_length: Integer number of bytes in one row of the frame (width *
+            bytes per pixel).
+        runs: Boolean which controls whether changed rows are trimmed down to
+            the run of bytes that actually changed. If False, whole rows are
+            sent. Default is False.
+
+    Returns:
+        A raw byte string made up of spans. Each span is an 8-byte header (the
+        unsigned 32-bit little-endian offset and length of the span) followed
+        by the new bytes for that span. An empty string is returned if the
+        frames are identical.
+
+    Adjacent changed spans (or runs separated by fewer unchanged bytes than a
+    span header costs) are merged into a single span.
+
+    """
+    spans = list()
+
+    for start in xrange(0, len(frame), row_length):
+        end = start + row_length
+
+        if frame[start:end] == prev_frame[start:end]:
+            continue
+
+        if runs:
+            while frame[start] == prev_frame[start]:
+                start += 1
+            while frame[end - 1] == prev_frame[end - 1]:
+                end -= 1
+
+        if spans and start - spans[-1][1] <= DMD_DELTA_SPAN.size:
+            spans[-1][1] = end
+        else:
+            spans.append([start, end])
+
+    return ''.join(DMD_DELTA_SPAN.pack(start, end - start) + frame[start:end]
+                   for start, end in spans)
+
+
+def apply_dmd_delta(frame, delta):
+    """Applies the payload of a BCP 'dmd_delta' command to a DMD frame.
+
+    Args:
+        frame: A bytearray of the current frame which will be updated in place.
+        delta: The raw byte string payload created by encode_dmd_delta().
+
+    """
+    offset = 0
+
+    while offset < len(delta):
+        start, length = DMD_DELTA_SPAN.unpack_from(delta, offset)
+        offset += DMD_DELTA_SPAN.size
+        frame[start:start + length] = delta[offset:offset + length]
+        offset += length
 
 
 class BCP(object):
@@ -116,10 +208,12 @@ class BCP(object):
         hello?version=xxx&controller_name=xxx&controller_version=xxx
         mode_start?name=xxx&priority=xxx
         mode_stop?name=xxx
+        ping?timestamp=x
         player_added?player_num=x
         player_score?value=x&prev_value=x&change=x&player_num=x
         player_turn_start?player_num=x
         player_variable?name=x&value=x&prev_value=x&change=x&player_num=x
+        pong?timestamp=x&receive_queue=x&send_queue=x
         set
         shot?name=x
         switch?name=x&state=x
@@ -252,6 +346,8 @@ class BCP(object):
                                         self.disable_volume_keys)
         self.machine.events.add_handler('bcp_get_led_coordinates',
                                         self.get_led_coordinates)
+        self.machine.events.add_handler('bcp_get_light_coordinates',
+                                        self.get_light_coordinates)
 
         self.machine.mode_controller.register_start_method(self.bcp_mode_start, 'mode')
         self.machine.mode_controller.register_start_method(self.register_triggers,
@@ -878,6 +974,18 @@ class BCP(object):
 
         self.send('set', led_coordinates=';'.join(coordinates))
 
+    def get_light_coordinates(self):
+        """Creates a list of all matrix lights with their corresponding x and y
+        coordinates, in the same format as get_led_coordinates():
+            light_coordinates=light_01:x,y;light_02:x,y;...
+        """
+        coordinates = []
+        for light in self.machine.lights:
+            if light.config['x'] is not None and light.config['y'] is not None:
+                coordinates.append(light.name + ':' + str(light.config['x']) + ',' + str(light.config['y']))
+
+        self.send('set', light_coordinates=';'.join(coordinates))
+
     def external_show_start(self, name, **kwargs):
         # Called by worker thread
         self.machine.light_controller.add_external_show_start_command_to_queue(name, **kwargs)
@@ -886,9 +994,11 @@ class BCP(object):
         # Called by worker thread
         self.machine.light_controller.add_external_show_stop_command_to_queue(name)
 
-    def external_show_frame(self, name, **kwargs):
-        # Called by worker thread
-        self.machine.light_controller.add_external_show_frame_command_to_queue(name, **kwargs)
+    def external_show_frame(self, name, payload=None, **kwargs):
+        # Called by worker thread. If there's a binary payload, it's the raw
+        # RGB bytes for the show's LEDs (used instead of hex led_data)
+        self.machine.light_controller.add_external_show_frame_command_to_queue(
+            name, led_bytes=payload, **kwargs)
 
 
 class BCPClientSocket(object):
@@ -923,11 +1033,46 @@ class BCPClientSocket(object):
         self.connection_attempts = 0
         self.attempt_socket_connection = True
         self.send_goodbye = True
+        self.dmd_frame = None
+        self.dmd_stats = None
+        self._reset_dmd_stats()
+
+        self.ping_enabled = False
+        self.ping_timer = None
+        self.stats_timer = None
+        self.rtt_last = 0.0
+        self.remote_receive_queue = 0
+        self.remote_send_queue = 0
+        # the stats are updated by the receive and sending threads too
+        self.stats_lock = threading.Lock()
+        self.stats = None
+        self._reset_stats()
 
         self.bcp_commands = {'hello': self.receive_hello,
                              'goodbye': self.receive_goodbye,
+                             'ping': self.receive_ping,
+                             'pong': self.receive_pong,
+                             # the light controller queues these for the main
+                             # thread itself, so there's no need to pass them
+                             # through the BCP receive queue too
+                             'external_show_start':
+                                self.machine.bcp.external_show_start,
+                             'external_show_stop':
+                                self.machine.bcp.external_show_stop,
+                             'external_show_frame':
+                                self.machine.bcp.external_show_frame,
                             }
 
+        if self.config['ping_interval']:
+            self.ping_timer = Timer(self.send_ping,
+                frequency=self.config['ping_interval'] / 1000.0)
+            self.machine.timing.add(self.ping_timer)
+
+        if self.config['stats_interval']:
+            self.stats_timer = Timer(self.sample_stats,
+                frequency=self.config['stats_interval'] / 1000.0)
+            self.machine.timing.add(self.stats_timer)
+
         self.setup_client_socket()
 
     def setup_client_socket(self):
@@ -1005,6 +1150,12 @@ class BCPClientSocket(object):
             BCP.active_connections -= 1
             self.socket = None  # Socket threads will exit on this
 
+        if self.ping_timer:
+            self.machine.timing.remove(self.ping_timer)
+
+        if self.stats_timer:
+            self.machine.timing.remove(self.stats_timer)
+
     def send(self, message):
         """Sends a message to the BCP host.
 
@@ -1030,6 +1181,9 @@ class BCPClientSocket(object):
 
         if 'dmd' in self.machine.config:
 
+            # a new connection has to start with a keyframe
+            self.dmd_frame = None
+
             bytes_per_pixel = 1
 
             try:
@@ -1053,34 +1207,52 @@ class BCPClientSocket(object):
 
                     socket_bytes += self.get_from_socket()
 
-                    if socket_bytes:
+                    # process everything we have, since one read can hold
+                    # several messages
+                    while socket_bytes:
+
+                        if socket_bytes.startswith(('dmd_frame',
+                                                    'dmd_delta')):
+                            delta = socket_bytes.startswith('dmd_delta')
 
-                        while socket_bytes.startswith('dmd_frame'):
-                            # trim the `dmd_frame?` so we have just the data
+                            # trim the `dmd_frame?` or `dmd_delta?` so we have
+                            # just the data
                             socket_bytes = socket_bytes[10:]
 
-                            while len(socket_bytes) < dmd_byte_length:
+                            if delta:
+                                # deltas are variable length, so they're
+                                # prefixed with their length
+                                while (len(socket_bytes) <
+                                        DMD_DELTA_LENGTH.size):
+                                    socket_bytes += self.get_from_socket()
+
+                                data_length = DMD_DELTA_LENGTH.unpack_from(
+                                    socket_bytes)[0]
+                                socket_bytes = (
+                                    socket_bytes[DMD_DELTA_LENGTH.size:])
+
+                            else:
+                                data_length = dmd_byte_length
+
+                            while len(socket_bytes) < data_length:
                                 # If we don't have the full data, loop until we
                                 # have it.
                                 socket_bytes += self.get_from_socket()
 
                             # trim the dmd bytes for the dmd data
-                            dmd_data = socket_bytes[:dmd_byte_length]
+                            dmd_data = socket_bytes[:data_length]
                             # Save the rest. This is +1 over the last step
                             # since we need to skip the \n separator
-                            socket_bytes = socket_bytes[dmd_byte_length+1:]
-                            self.machine.bcp.dmd.update(dmd_data)
+                            socket_bytes = socket_bytes[data_length+1:]
+                            self.receive_dmd_data(dmd_data, delta)
 
-                        if '\n' in socket_bytes:
+                        elif '\n' in socket_bytes:
                             message, socket_bytes = socket_bytes.split('\n', 1)
+                            socket_bytes = self.process_received_message(
+                                message, socket_bytes)
 
-                            self.log.debug('Received "%s"', message)
-                            cmd, kwargs = decode_command_string(message)
-
-                            if cmd in self.bcp_commands:
-                                self.bcp_commands[cmd](**kwargs)
-                            else:
-                                self.receive_queue.put((cmd, kwargs))
+                        else:
+                            break
 
             except Exception:
                 exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -1095,16 +1267,10 @@ class BCPClientSocket(object):
 
                     socket_bytes += self.get_from_socket()
 
-                    if socket_bytes and '\n' in socket_bytes:
-                            message, socket_bytes = socket_bytes.split('\n', 1)
-
-                            self.log.debug('Received "%s"', message)
-                            cmd, kwargs = decode_command_string(message)
-
-                            if cmd in self.bcp_commands:
-                                self.bcp_commands[cmd](**kwargs)
-                            else:
-                                self.receive_queue.put((cmd, kwargs))
+                    while socket_bytes and '\n' in socket_bytes:
+                        message, socket_bytes = socket_bytes.split('\n', 1)
+                        socket_bytes = self.process_received_message(
+                            message, socket_bytes)
 
             except Exception:
                 exc_type, exc_value, exc_traceback = sys.exc_info()
@@ -1114,6 +1280,107 @@ class BCPClientSocket(object):
                 self.machine.crash_queue.put(msg)
 
 
+    def process_received_message(self, message, socket_bytes):
+        """Decodes a received BCP message and either processes it right away
+        (for the commands this socket handles in its receive thread) or puts
+        it onto the receive queue for the main thread.
+
+        Args:
+            message: The BCP command string, without the trailing newline.
+            socket_bytes: The data received after the message.
+
+        Returns:
+            The remaining socket bytes after any binary payload that belongs to
+            this message has been removed.
+
+        If the message has a 'payload_bytes=n' parameter, then the n bytes
+        after the message's newline are raw binary data which is passed to the
+        command as its 'payload' kwarg. (See encode_command_string().)
+
+        This method is called from the receive thread.
+
+        """
+        self.log.debug('Received "%s"', message)
+        self._add_stat('received')
+        cmd, kwargs = decode_command_string(message)
+
+        if 'payload_bytes' in kwargs:
+            payload_length = int(kwargs.pop('payload_bytes'))
+
+            # +1 since the payload is followed by a \n separator
+            while len(socket_bytes) < payload_length + 1:
+                socket_bytes += self.get_from_socket()
+
+            kwargs['payload'] = socket_bytes[:payload_length]
+            socket_bytes = socket_bytes[payload_length + 1:]
+
+        if cmd in self.bcp_commands:
+            self.bcp_commands[cmd](**kwargs)
+        else:
+            self.receive_queue.put((cmd, kwargs))
+
+        return socket_bytes
+
+    def receive_dmd_data(self, data, delta=False):
+        """Rebuilds a full DMD frame from incoming 'dmd_frame' or 'dmd_delta'
+        data and forwards it to the physical DMD.
+
+        Args:
+            data: The raw byte string that followed the BCP command.
+            delta: Boolean which is True if data is a 'dmd_delta' payload and
+                False if it's a full (key) frame.
+
+        This method is called from the receive thread.
+
+        """
+        start_time = time.time()
+
+        if delta:
+            if self.dmd_frame is None:
+                # we can't rebuild a frame until we've had a keyframe
+                self.dmd_stats['dropped'] += 1
+                return
+
+            apply_dmd_delta(self.dmd_frame, data)
+            self.machine.bcp.dmd.update(str(self.dmd_frame))
+            self.dmd_stats['deltas'] += 1
+            self.dmd_stats['bytes'] += DMD_DELTA_LENGTH.size
+
+        else:
+            self.dmd_frame = bytearray(data)
+            self.machine.bcp.dmd.update(data)
+            self.dmd_stats['keyframes'] += 1
+
+        self._add_stat('received')
+        self.dmd_stats['bytes'] += len(data) + 11
+        self.dmd_stats['secs'] += time.time() - start_time
+
+        self._report_dmd_stats()
+
+    def _report_dmd_stats(self):
+        # Logs the DMD stream bandwidth & CPU use once per second
+
+        elapsed = time.time() - self.dmd_stats['start_time']
+
+        if elapsed < 1.0:
+            return
+
+        self.log.debug("DMD stream: %.1f frames/sec (%.1f key, %.1f delta), "
+                       "%s dropped, %d bytes/sec, %.2fms CPU/sec",
+                       (self.dmd_stats['keyframes'] +
+                        self.dmd_stats['deltas']) / elapsed,
+                       self.dmd_stats['keyframes'] / elapsed,
+                       self.dmd_stats['deltas'] / elapsed,
+                       self.dmd_stats['dropped'],
+                       self.dmd_stats['bytes'] / elapsed,
+                       self.dmd_stats['secs'] * 1000 / elapsed)
+
+        self._reset_dmd_stats()
+
+    def _reset_dmd_stats(self):
+        self.dmd_stats = dict(keyframes=0, deltas=0, dropped=0, bytes=0,
+                              secs=0.0, start_time=time.time())
+
     def get_from_socket(self, num_bytes=8192):
         """Reads and returns whatever data is sitting in the receiving socket.
 
@@ -1145,6 +1412,7 @@ class BCPClientSocket(object):
                 try:
                     self.log.debug('Sending "%s"', message)
                     self.socket.sendall(message + '\n')
+                    self._add_stat('sent')
 
                 except (IOError, AttributeError):
                     # MPF is probably in the process of shutting down
@@ -1160,6 +1428,52 @@ class BCPClientSocket(object):
         """Processes incoming BCP 'hello' command."""
         self.log.debug('Received BCP Hello from host with kwargs: %s', kwargs)
 
+        # Only start pinging once the host has answered our hello, otherwise
+        # the pings would just pile up in the sending queue
+        self.ping_enabled = True
+
+    def receive_ping(self, timestamp, **kwargs):
+        """Processes incoming BCP 'ping' command by sending back a 'pong' with
+        the same timestamp and the depths of our queues.
+
+        """
+        self.send(encode_command_string(
+            'pong', timestamp=timestamp,
+            receive_queue=self.receive_queue.qsize(),
+            send_queue=self.sending_queue.qsize()))
+
+    def receive_pong(self, timestamp, receive_queue=0, send_queue=0,
+                     **kwargs):
+        """Processes incoming BCP 'pong' command which the remote host sends
+        in response to our 'ping'.
+
+        Args:
+            timestamp: String of the time.time() value we sent with the ping.
+            receive_queue: The number of messages waiting in the remote host's
+                receive queue when it processed the ping.
+            send_queue: The number of messages waiting in the remote host's
+                sending queue when it processed the ping.
+
+        Since the remote host processes the ping in order with everything else
+        we've sent it, the round trip time includes however far behind it is.
+
+        """
+        try:
+            rtt = (time.time() - float(timestamp)) * 1000.0
+        except ValueError:
+            return
+
+        self.rtt_last = rtt
+        self.remote_receive_queue = int(receive_queue)
+        self.remote_send_queue = int(send_queue)
+
+        with self.stats_lock:
+            self.stats['pongs'] += 1
+            self.stats['rtt_total'] += rtt
+            self.stats['rtt_max'] = max(self.stats['rtt_max'], rtt)
+            self.stats['rtt_histogram'][
+                bisect.bisect_left(RTT_HISTOGRAM_BUCKETS, rtt)] += 1
+
     def receive_goodbye(self):
         """Processes incoming BCP 'goodbye' command."""
         self.send_goodbye = False
@@ -1181,6 +1495,114 @@ class BCPClientSocket(object):
         """Sends BCP 'goodbye' command."""
         self.send('goodbye')
 
+    def send_ping(self):
+        """Sends BCP 'ping' command with the current time. The remote host
+        sends it back in a 'pong' command so we can measure the round trip.
+
+        """
+        if not self.socket or not self.ping_enabled:
+            return
+
+        self._add_stat('pings')
+        self.send(encode_command_string('ping',
+                                        timestamp='%.6f' % time.time()))
+
+    def get_stats(self):
+        """Returns the statistics of this connection since the last time this
+        method was called, and starts a new sampling period.
+
+        Returns:
+            A dictionary with the following keys:
+                send_queue: Messages waiting in our sending queue.
+                receive_queue: Messages waiting in the shared BCP receive
+                    queue.
+                remote_receive_queue: Messages waiting in the remote host's
+                    receive queue as of the last pong.
+                remote_send_queue: Messages waiting in the remote host's sending
+                    queue as of the last pong.
+                sent_per_sec: Messages sent per second.
+                received_per_sec: Messages received per second.
+                pings: Pings sent.
+                pongs: Pongs received.
+                rtt_last: The most recent round trip time in ms.
+                rtt_avg: The average round trip time in ms.
+                rtt_max: The longest round trip time in ms.
+                rtt_histogram: A list of (upper bound in ms, count) tuples. The
+                    upper bound of the last (overflow) bucket is None.
+
+        """
+        with self.stats_lock:
+            stats = self.stats
+            self._reset_stats()
+
+        elapsed = max(time.time() - stats['start_time'], 0.001)
+
+        if stats['pongs']:
+            rtt_avg = stats['rtt_total'] / stats['pongs']
+        else:
+            rtt_avg = 0.0
+
+        return dict(send_queue=self.sending_queue.qsize(),
+                    receive_queue=self.receive_queue.qsize(),
+                    remote_receive_queue=self.remote_receive_queue,
+                    remote_send_queue=self.remote_send_queue,
+                    sent_per_sec=stats['sent'] / elapsed,
+                    received_per_sec=stats['received'] / elapsed,
+                    pings=stats['pings'],
+                    pongs=stats['pongs'],
+                    rtt_last=self.rtt_last,
+                    rtt_avg=rtt_avg,
+                    rtt_max=stats['rtt_max'],
+                    rtt_histogram=zip(RTT_HISTOGRAM_BUCKETS + (None, ),
+                                      stats['rtt_histogram']))
+
+    def sample_stats(self):
+        """Logs the statistics of this connection, and optionally sets them
+        as machine variables named bcp_<connection>_<stat>. Called periodically
+        based on the connection's 'stats_interval' setting.
+
+        """
+        stats = self.get_stats()
+
+        self.log.info("Sent: %.1f/sec, Received: %.1f/sec, Send queue: %s, "
+                      "Receive queue: %s, Remote receive queue: %s, Remote "
+                      "send queue: %s, Pings/Pongs: %s/%s, RTT last/avg/max: "
+                      "%.1f/%.1f/%.1fms, RTT histogram: %s",
+                      stats['sent_per_sec'], stats['received_per_sec'],
+                      stats['send_queue'], stats['receive_queue'],
+                      stats['remote_receive_queue'],
+                      stats['remote_send_queue'], stats['pings'],
+                      stats['pongs'], stats['rtt_last'], stats['rtt_avg'],
+                      stats['rtt_max'],
+                      ' '.join('{}:{}'.format(
+                          '<={}ms'.format(bucket) if bucket else 'more',
+                          count) for bucket, count in stats['rtt_histogram']))
+
+        if not self.config['stats_machine_vars']:
+            return
+
+        for stat in ('send_queue', 'receive_queue', 'remote_receive_queue',
+                     'remote_send_queue', 'sent_per_sec', 'received_per_sec',
+                     'rtt_last', 'rtt_avg', 'rtt_max'):
+
+            var_name = 'bcp_{}_{}'.format(self.name, stat)
+            value = round(stats[stat], 1)
+
+            if not self.machine.is_machine_var(var_name):
+                self.machine.create_machine_var(var_name, value, silent=True)
+            else:
+                self.machine.set_machine_var(var_name, value)
+
+    def _add_stat(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def _reset_stats(self):
+        self.stats = dict(sent=0, received=0, pings=0, pongs=0, rtt_total=0.0,
+                          rtt_max=0.0,
+                          rtt_histogram=[0] * (len(RTT_HISTOGRAM_BUCKETS) + 1),
+                          start_time=time.time())
+
 
 # The MIT License (MIT)
 
@@ -56,17 +56,45 @@ class Config(object):
         self.machine = machine
         self.log = logging.getLogger('ConfigProcessor')
 
+        # compiled versions of the config_validator specs, built on first use
+        self._compiled_validator = None
+        self._compiled_sections = dict()
+        self._compiled_items = dict()
+        self._validators = dict()
+
     @staticmethod
-    def load_config_file(filename, verify_version=True, halt_on_error=True):
+    def load_config_file(filename, verify_version=True, halt_on_error=True,
+                         loaded_files=None):
+        """Loads a config file and merges in any other config files it lists
+        in its config: section.
+
+        Args:
+            filename: The config file (with path) to load.
+            verify_version: Boolean which specifies whether the config file
+                version should be checked.
+            halt_on_error: Boolean which specifies whether MPF should exit if
+                the file can't be loaded.
+            loaded_files: Optional list. The name of every file that's loaded
+                (including the included ones) is appended to it. This is used
+                by the config cache to know which files a config depends on.
+
+        Returns:
+            The merged config dictionary.
+
+        """
         config = FileManager.load(filename, verify_version, halt_on_error)
 
+        if loaded_files is not None:
+            loaded_files.append(FileManager.locate_file(filename) or filename)
+
         if 'config' in config:
             path = os.path.split(filename)[0]
 
             for file in Util.string_to_list(config['config']):
                 full_file = os.path.join(path, file)
                 config = Util.dict_merge(config,
-                                           Config.load_config_file(full_file))
+                    Config.load_config_file(full_file,
+                                            loaded_files=loaded_files))
         return config
 
     @staticmethod
@@ -213,81 +241,124 @@ class Config(object):
 
         validation_failure_info = (config_spec, section_name)
 
-        orig_spec = config_spec
-
-        config_spec = config_spec.split(':')
-        this_spec = self.machine.config['config_validator']
-
-        for i in range(len(config_spec)):
-            this_spec = this_spec[config_spec[i]]
+        this_spec, entries = self._get_compiled_section(config_spec)
 
         self.check_for_invalid_sections(this_spec, source,
                                         validation_failure_info)
 
         processed_config = source
 
-        for k in this_spec.keys():
+        for k, item_spec in entries:
             if k in source:  # validate the entry that exists
 
-                if type(this_spec[k]) is dict:
+                if item_spec is None:
                     # This means we're looking for a list of dicts
 
                     final_list = list()
-                    if k in source:
-                        for i in source[k]:  # individual step
-                            final_list.append(self.process_config2(
-                                orig_spec + ':' + k, source=i, section_name=k))
+                    for i in source[k]:  # individual step
+                        final_list.append(self.process_config2(
+                            config_spec + ':' + k, source=i, section_name=k))
 
                     processed_config[k] = final_list
 
                 elif result_type == 'list':
                     # spec is dict
                     # item is source
-                    processed_config = self.validate_config_item2(
-                        spec=this_spec[k], item=source[k],
-                        validation_failure_info=(validation_failure_info, k))
+                    processed_config = self._validate_compiled_item(
+                        item_spec, (validation_failure_info, k), source[k])
 
                 else:
-                    processed_config[k] = self.validate_config_item2(
-                        this_spec[k], item=source[k],
-                        validation_failure_info=(validation_failure_info, k))
+                    processed_config[k] = self._validate_compiled_item(
+                        item_spec, (validation_failure_info, k), source[k])
 
             else:  # create the default entry
 
-                if type(this_spec[k]) is dict:
+                if item_spec is None:
                     processed_config[k] = list()
 
-                else:
-                    if result_type == 'list':
-                        processed_config = self.validate_config_item2(
-                            this_spec[k],
-                            validation_failure_info=(validation_failure_info,
-                                                     k))
+                elif result_type == 'list':
+                    processed_config = self._validate_compiled_item(
+                        item_spec, (validation_failure_info, k))
 
-                    else:
-                        processed_config[k] = self.validate_config_item2(
-                            this_spec[k],
-                            validation_failure_info=(validation_failure_info,
-                                                     k))
+                else:
+                    processed_config[k] = self._validate_compiled_item(
+                        item_spec, (validation_failure_info, k))
 
         if target:
             processed_config = Util.dict_merge(target, processed_config)
 
-        #if result_type == 'list':
-            #quit()
-
         return processed_config
 
-    def validate_config_item2(self, spec, validation_failure_info,
-                              item='item not in config!@#',):
+    def _get_compiled_section(self, config_spec):
+        # Returns a tuple of (spec dict, entries) for a config_spec string like
+        # "device:shot". Entries is a list of (key, compiled item spec) tuples
+        # in the order of the spec dict. The compiled item spec is None for
+        # keys which hold a list of dicts.
 
-        default = 'default required!@#'
+        config_validator = self.machine.config['config_validator']
+
+        if config_validator is not self._compiled_validator:
+            # the config_validator was replaced, so start over
+            self._compiled_validator = config_validator
+            self._compiled_sections = dict()
+
+        try:
+            return self._compiled_sections[config_spec]
+        except KeyError:
+            pass
+
+        this_spec = config_validator
+
+        for section in config_spec.split(':'):
+            this_spec = this_spec[section]
+
+        entries = list()
+
+        for k in this_spec.keys():
+            if type(this_spec[k]) is dict:
+                entries.append((k, None))
+            else:
+                entries.append((k, self._compile_item_spec(this_spec[k])))
+
+        self._compiled_sections[config_spec] = this_spec, entries
+
+        return this_spec, entries
+
+    def _compile_item_spec(self, spec):
+        # Compiles a "type|validator|default" spec string into a tuple of
+        # (item_type, validator callable, default)
+
+        try:
+            return self._compiled_items[spec]
+        except KeyError:
+            pass
 
         item_type, validation, default = spec.split('|')
 
         if default.lower() == 'none':
             default = None
 
+        if item_type in ('single', 'list', 'set', 'dict'):
+            compiled = item_type, self._get_validator(validation), default
+
+        else:
+            compiled = item_type, None, default
+
+        self._compiled_items[spec] = compiled
+
+        return compiled
+
+    def validate_config_item2(self, spec, validation_failure_info,
+                              item='item not in config!@#',):
+
+        return self._validate_compiled_item(self._compile_item_spec(spec),
+                                            validation_failure_info, item)
+
+    def _validate_compiled_item(self, compiled_spec, validation_failure_info,
+                                item='item not in config!@#'):
+
+        item_type, validator, default = compiled_spec
+
         if item == 'item not in config!@#':
             if default == 'default required!@#':
                 log.error('Required setting missing from config file. Run with '
@@ -299,34 +370,18 @@ class Config(object):
                 item = default
 
         if item_type == 'single':
-            item = self.validate_item(item, validation, validation_failure_info)
-
+            item = validator(item, validation_failure_info)
 
         elif item_type == 'list':
-            item = Util.string_to_list(item)
-
-            new_list = list()
-
-            for i in item:
-                new_list.append(
-                    self.validate_item(i, validation, validation_failure_info))
-
-            item = new_list
+            item = [validator(i, validation_failure_info)
+                    for i in Util.string_to_list(item)]
 
         elif item_type == 'set':
-            item = set(Util.string_to_list(item))
-
-            new_set = set()
-
-            for i in item:
-                new_set.add(
-                    self.validate_item(i, validation, validation_failure_info))
-
-            item = new_set
+            item = set(validator(i, validation_failure_info)
+                       for i in set(Util.string_to_list(item)))
 
         elif item_type == 'dict':
-            item = self.validate_item(item, validation,
-                                               validation_failure_info)
+            item = validator(item, validation_failure_info)
 
             if not item:
                 item = dict()
@@ -376,93 +431,151 @@ class Config(object):
                         sys.exit()
 
     def validate_item(self, item, validator, validation_failure_info):
+        return self._get_validator(validator)(item, validation_failure_info)
+
+    def _get_validator(self, validator):
+        # Returns a callable which takes (item, validation_failure_info) and
+        # returns the validated item. Validators are compiled once per
+        # validator string.
 
         try:
-            if item.lower() == 'none':
-                item = None
-        except AttributeError:
+            return self._validators[validator]
+        except KeyError:
             pass
 
+        validate = self._compile_validator(validator)
+
+        def validate_item(item, validation_failure_info):
+            try:
+                if item.lower() == 'none':
+                    item = None
+            except AttributeError:
+                pass
+
+            return validate(item, validation_failure_info)
+
+        self._validators[validator] = validate_item
+
+        return validate_item
+
+    def _compile_validator(self, validator):
+
         if ':' in validator:
             validator = validator.split(':')
-            # item could be str, list, or list of dicts
-            item = Util.event_config_to_dict(item)
+            key_validator = self._get_validator(validator[0])
+            value_validator = self._get_validator(validator[1])
+
+            def validate(item, validation_failure_info):
+                # item could be str, list, or list of dicts
+                item = Util.event_config_to_dict(item)
 
-            return_dict = dict()
+                return_dict = dict()
 
-            for k, v in item.iteritems():
-                return_dict[self.validate_item(k, validator[0],
-                                               validation_failure_info)] = (
-                    self.validate_item(v, validator[1], validation_failure_info)
-                    )
+                for k, v in item.iteritems():
+                    return_dict[key_validator(k, validation_failure_info)] = (
+                        value_validator(v, validation_failure_info))
 
-            item = return_dict
+                return return_dict
 
         elif '%' in validator:
+            attributes = self._device_collection_path(validator)
 
-            if type(item) is str:
+            def validate(item, validation_failure_info):
+                if type(item) is not str:
+                    return None
 
                 try:
-                    item = eval(validator.replace('%', "'" + item + "'"))
+                    if attributes:
+                        collection = self
+                        for attribute in attributes:
+                            collection = getattr(collection, attribute)
+
+                        return collection[item]
+
+                    else:
+                        return eval(validator.replace('%', "'" + item + "'"))
+
                 except KeyError:
                     self.validation_error(item, validation_failure_info)
-            else:
-                item = None
+
+                return item
 
         elif validator == 'str':
-            if item is not None:
-                item = str(item)
-            else:
-                item = None
+            def validate(item, validation_failure_info):
+                if item is not None:
+                    return str(item)
 
         elif validator == 'float':
-            try:
-                item = float(item)
-            except (TypeError, ValueError):
-                # TODO error
-                pass
+            def validate(item, validation_failure_info):
+                try:
+                    return float(item)
+                except (TypeError, ValueError):
+                    # TODO error
+                    return item
 
         elif validator == 'int':
-            try:
-                item = int(item)
-            except (TypeError, ValueError):
-                # TODO error
-                pass
+            def validate(item, validation_failure_info):
+                try:
+                    return int(item)
+                except (TypeError, ValueError):
+                    # TODO error
+                    return item
 
         elif validator in ('bool', 'boolean'):
-            if type(item) is str:
-                if item.lower() in ['false', 'f', 'no', 'disable', 'off']:
-                    item = False
+            def validate(item, validation_failure_info):
+                if type(item) is str:
+                    if item.lower() in ['false', 'f', 'no', 'disable', 'off']:
+                        return False
+                    return item
 
-            elif not item:
-                item = False
-
-            else:
-                item = True
+                return bool(item)
 
         elif validator == 'ms':
-            item = Timing.string_to_ms(item)
+            def validate(item, validation_failure_info):
+                return Timing.string_to_ms(item)
 
         elif validator == 'secs':
-            item = Timing.string_to_secs(item)
+            def validate(item, validation_failure_info):
+                return Timing.string_to_secs(item)
 
         elif validator == 'ticks':
-            item = Timing.string_to_ticks(item)
+            def validate(item, validation_failure_info):
+                return Timing.string_to_ticks(item)
 
         elif validator == 'ticks_int':
-            item = int(Timing.string_to_ticks(item))
+            def validate(item, validation_failure_info):
+                return int(Timing.string_to_ticks(item))
 
         elif validator == 'list':
-            item = Util.string_to_list(item)
+            def validate(item, validation_failure_info):
+                return Util.string_to_list(item)
 
         else:
-            self.log.error("Invalid Validator '%s' in config spec %s:%s",
-                           validator,
-                           validation_failure_info[0][0],
-                           validation_failure_info[1])
-            sys.exit()
+            def validate(item, validation_failure_info):
+                self.log.error("Invalid Validator '%s' in config spec %s:%s",
+                               validator,
+                               validation_failure_info[0][0],
+                               validation_failure_info[1])
+                sys.exit()
 
-        return item
+        return validate
+
+    @staticmethod
+    def _device_collection_path(validator):
+        # Returns the list of attribute names for validators in the form
+        # "self.machine.switches[%]", or None if the validator is something
+        # else (in which case it's eval'd for each item).
+        if not validator.startswith('self.') or not validator.endswith('[%]'):
+            return None
+
+        attributes = validator[5:-3].split('.')
+
+        for attribute in attributes:
+            if not attribute or not all(c.isalnum() or c == '_'
+                                        for c in attribute):
+                return None
+
+        return attributes
 
     def validation_error(self, item, validation_failure_info):
         self.log.error("Config validation error: Entry %s:%s:%s:%s is not valid",
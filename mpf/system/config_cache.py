@@ -0,0 +1,217 @@
+"""Contains the ConfigCache class."""
+# config_cache.py
+# Mission Pinball Framework
+# Written by Brian Madden & Gabe Knuth
+# Released under the MIT License. (See license info at the end of this file.)
+
+# Documentation and more info at http://missionpinball.com/mpf
+
+import cPickle as pickle
+import errno
+import hashlib
+import logging
+import os
+
+import version
+
+
+class ConfigCache(object):
+    """Stores merged config dictionaries in a binary cache file so MPF can
+    skip parsing the YAML config files on the next boot.
+
+    Each cached config is stored along with the list of files (and folders)
+    it was built from. An entry is only used if every one of those files still
+    has the same size and mtime, or the same content hash if the mtime
+    changed. The whole cache is thrown away if the MPF version or the cache
+    key (typically the command line config options) changes.
+
+    Args:
+        filename: The file (with path) of the cache file.
+        key: Any picklable object which identifies this set of config files.
+            If it doesn't match the key of the existing cache file, the cache
+            is ignored.
+        rebuild: Boolean which forces all the entries to be rebuilt, even if
+            they're still valid.
+
+    """
+
+    def __init__(self, filename, key=None, rebuild=False):
+        self.log = logging.getLogger('ConfigCache')
+        self.filename = filename
+        self.key = key
+        self.entries = dict()
+        self.dirty = False
+
+        if rebuild:
+            self.log.info("Rebuilding the config cache")
+            self.dirty = True
+        else:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.filename, 'rb') as f:
+                cache = pickle.load(f)
+        except IOError:
+            self.log.debug("No config cache at %s", self.filename)
+            return
+        except Exception:
+            self.log.warning("Config cache %s is not readable. Rebuilding it.",
+                             self.filename)
+            self.dirty = True
+            return
+
+        if (not isinstance(cache, dict) or
+                cache.get('version') != version.__version__ or
+                cache.get('key') != self.key):
+            self.log.info("Config cache is from a different MPF version or "
+                          "config. Rebuilding it.")
+            self.dirty = True
+            return
+
+        self.entries = cache['entries']
+
+    def get(self, name):
+        """Returns a cached config.
+
+        Args:
+            name: String name of the entry.
+
+        Returns:
+            A new copy of the config dictionary which was added with this
+            name, or None if there's no entry or if any of the files it was
+            built from have changed.
+
+        """
+        if name not in self.entries:
+            return None
+
+        data, files = self.entries[name]
+
+        for path, (stats, file_hash) in files.iteritems():
+            current_stats = self._get_stats(path)
+
+            if current_stats == stats:
+                continue
+
+            if (current_stats and stats and file_hash and
+                    current_stats[1] == stats[1] and
+                    self._get_hash(path) == file_hash):
+                # touched but not changed
+                files[path] = (current_stats, file_hash)
+                self.dirty = True
+                continue
+
+            self.log.info("Config file %s has changed. Reloading entry '%s'",
+                          path, name)
+            del self.entries[name]
+            self.dirty = True
+            return None
+
+        self.log.debug("Using cached config for '%s'", name)
+        return pickle.loads(data)
+
+    def add(self, name, config, files):
+        """Adds (or replaces) a config in the cache.
+
+        The config is serialized right away, so it's fine for the caller to
+        modify it afterwards.
+
+        Args:
+            name: String name of the entry.
+            config: The config dictionary to cache.
+            files: List of files and folders which were used to build this
+                config. Folders are checked by mtime only, so include a folder
+                if adding a new file to it would change the config. Paths that
+                don't exist can be included too, in which case the entry is
+                invalidated if they're created.
+
+        """
+        file_dict = dict()
+
+        for path in files:
+            path = os.path.abspath(path)
+            stats = self._get_stats(path)
+
+            if stats and os.path.isfile(path):
+                file_hash = self._get_hash(path)
+            else:
+                file_hash = None
+
+            file_dict[path] = (stats, file_hash)
+
+        self.entries[name] = (pickle.dumps(config, pickle.HIGHEST_PROTOCOL),
+                              file_dict)
+        self.dirty = True
+
+    def save(self):
+        """Writes the cache file to disk if anything changed."""
+        if not self.dirty:
+            return
+
+        cache = dict(version=version.__version__,
+                     key=self.key,
+                     entries=self.entries)
+
+        temp_file = self.filename + '.tmp'
+
+        try:
+            try:
+                os.makedirs(os.path.dirname(self.filename))
+            except OSError as exception:
+                if exception.errno != errno.EEXIST:
+                    raise
+
+            with open(temp_file, 'wb') as f:
+                pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+
+            if os.path.exists(self.filename):
+                # Windows can't rename over an existing file
+                os.remove(self.filename)
+
+            os.rename(temp_file, self.filename)
+
+        except (IOError, OSError, pickle.PicklingError) as e:
+            self.log.warning("Could not write config cache %s: %s",
+                             self.filename, e)
+            return
+
+        self.log.debug("Saved config cache to %s", self.filename)
+        self.dirty = False
+
+    @staticmethod
+    def _get_stats(path):
+        try:
+            stats = os.stat(path)
+        except OSError:
+            return None
+
+        return stats.st_mtime, stats.st_size
+
+    @staticmethod
+    def _get_hash(path):
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+
+# The MIT License (MIT)
+
+# Copyright (c) 2013-2015 Brian Madden and Gabe Knuth
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
@@ -7,29 +7,50 @@
 # Documentation and more info at http://missionpinball.com/mpf
 
 import copy
+import cPickle as pickle
 import logging
 import os
 import errno
-import thread
+import sys
+import threading
 import time
+import traceback
+from Queue import Queue
 
-from mpf.system.config import Config
 from mpf.system.file_manager import FileManager
+from mpf.system.tasks import DelayManager
 
 
 class DataManager(object):
 
-    def __init__(self, machine, name):
+    def __init__(self, machine, name, journal=None):
         """
         The DataManager is responsible for reading and writing data to/from a
         file on disk.
 
+        All the disk writes happen in a single writer thread per DataManager.
+        Saves which are requested while another one is pending are coalesced
+        into one write, and each write goes to a temp file which is fsynced
+        and then renamed over the old file, so the file on disk is always
+        complete.
+
+        The file format is based on the file extension of the path in the
+        config, so a data file can be YAML, JSON or pickle (binary).
+
+        If journaling is enabled (mpf:data_manager:journal), save_key() and
+        remove_key() append the changed keys to a journal file instead of
+        rewriting the whole file. The journal is replayed when the file is
+        loaded and compacted into the data file once it reaches
+        mpf:data_manager:journal_compact_entries entries.
+
         Args:
             machine: The main MachineController instance.
             name: A string name that represents what this DataManager instance
                 is for. This name is used to lookup the configuration option
                 in the machine config in the mpf:paths:<name> location. That's
                 how you specify the file name this DataManager will use.
+            journal: Optional boolean which overrides the
+                mpf:data_manager:journal setting for this file.
 
         """
         self.machine = machine
@@ -37,12 +58,35 @@ class DataManager(object):
         self.filename = os.path.join(self.machine.machine_path,
                                      self.machine.config['mpf']['paths'][name])
 
+        root, ext = os.path.splitext(self.filename)
+        self.temp_filename = root + '.tmp' + ext
+        self.journal_filename = self.filename + '.journal'
+
         self.log = logging.getLogger('DataInterface')
 
+        config = self.machine.config['mpf']['data_manager']
+        if journal is None:
+            self.journal = config['journal']
+        else:
+            self.journal = journal
+        self.journal_compact_entries = config['journal_compact_entries']
+        self.journal_entries = 0
+
         self.data = dict()
 
+        self.delay = DelayManager()
+        self.write_time = None
+        self.write_queue = Queue()
+
         self._setup_file()
 
+        self.writer_thread = threading.Thread(target=self._writer_loop,
+                                              name='DataManager.' + name)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+
+        self.machine.events.add_handler('shutdown', self.flush)
+
     def _setup_file(self):
         self._make_sure_path_exists(os.path.dirname(self.filename))
 
@@ -64,6 +108,41 @@ class DataManager(object):
             self.log.debug("Didn't find the %s file. No prob. We'll create "
                           "it when we save.", self.name)
 
+        if os.path.isfile(self.journal_filename):
+            self._replay_journal()
+
+    def _replay_journal(self):
+        entries = 0
+
+        with open(self.journal_filename, 'rb') as f:
+            while True:
+                try:
+                    action, key, value = pickle.load(f)
+                except EOFError:
+                    break
+                except Exception:
+                    # an entry which was only partially written when MPF
+                    # stopped. Everything before it is fine.
+                    self.log.warning("Ignoring incomplete entry at the end of "
+                                     "%s", self.journal_filename)
+                    break
+
+                if action == 'set':
+                    self.data[key] = value
+                else:
+                    self.data.pop(key, None)
+
+                entries += 1
+
+        self.log.debug("Replayed %s journal entries for %s", entries,
+                       self.name)
+
+        if entries:
+            # write them into the data file so the journal starts over
+            self.save_all()
+        elif not self.journal:
+            os.remove(self.journal_filename)
+
     def get_data(self, section=None):
         """Returns the value of this DataManager's data.
 
@@ -90,6 +169,9 @@ class DataManager(object):
                 occur when MPF is busy, so you can delay them by a few seconds
                 so they don't slow down MPF. Default is 0.
 
+        If a save is already pending, only one write happens, at the earlier
+        of the two times.
+
         """
         self.log.debug("Will write %s to disk in %s sec(s)", self.name,
                        delay_secs)
@@ -97,36 +179,168 @@ class DataManager(object):
         if data:
             self.data = data
 
-        thread.start_new_thread(self._writing_thread, (delay_secs, ))
+        if not delay_secs:
+            self._queue_write()
+            return
+
+        write_time = time.time() + delay_secs
+
+        if not self.write_time or write_time < self.write_time:
+            self.write_time = write_time
+            self.delay.reset(name='write', ms=delay_secs * 1000,
+                             callback=self._queue_write)
 
     def save_key(self, key, value, delay_secs=0):
         """Updates an individual key and then writes the entire dictionary to
-        disk.
+        disk (or appends the key to the journal if journaling is enabled).
 
         Args:
             key: String name of the key to add/update.
             value: Value of the key
             delay_secs: Optional number of seconds to wait before writing the
-                data to disk. Default is 0.
+                data to disk. Default is 0. Not used with journaling.
 
         """
         self.data[key] = value
-        self.save_all(delay_secs=delay_secs)
+
+        if self.journal:
+            self._queue_journal_entry('set', key, value)
+        else:
+            self.save_all(delay_secs=delay_secs)
 
     def remove_key(self, key):
         try:
             del self.data[key]
-            self.save_all()
         except KeyError:
-            pass
+            return
 
-    def _writing_thread(self, delay_secs=0):
+        if self.journal:
+            self._queue_journal_entry('remove', key)
+        else:
+            self.save_all()
+
+    def save_keys(self, data, removed_keys=None, delay_secs=0):
+        """Updates and removes several keys with a single disk write (or one
+        journal entry per key if journaling is enabled).
+
+        Args:
+            data: Dictionary of the keys to add/update.
+            removed_keys: Optional list of keys to remove.
+            delay_secs: Optional number of seconds to wait before writing the
+                data to disk. Default is 0. Not used with journaling.
 
-        if delay_secs:
-            time.sleep(delay_secs)
+        """
+        self.data.update(data)
+
+        for key in removed_keys or ():
+            self.data.pop(key, None)
+
+        if not self.journal:
+            self.save_all(delay_secs=delay_secs)
+            return
+
+        for key, value in data.iteritems():
+            self._queue_journal_entry('set', key, value)
+
+        for key in removed_keys or ():
+            self._queue_journal_entry('remove', key)
+
+    def flush(self, **kwargs):
+        """Writes any pending changes to disk right away and waits for the
+        writer thread to finish."""
+        if self.write_time:
+            self._queue_write()
+
+        self.write_queue.join()
+
+    def _queue_write(self):
+        # Hands a snapshot of the data to the writer thread. Pickling it here
+        # is much quicker than a deepcopy, and lets the writer thread work on
+        # its own copy while the data keeps changing.
+        self.delay.remove('write')
+        self.write_time = None
+        self.journal_entries = 0
+
+        self.write_queue.put(('write', pickle.dumps(self.data,
+                                                    pickle.HIGHEST_PROTOCOL)))
+
+    def _queue_journal_entry(self, action, key, value=None):
+        self.journal_entries += 1
+
+        if self.journal_entries >= self.journal_compact_entries:
+            self.log.debug("Compacting the %s journal", self.name)
+            self._queue_write()
+        else:
+            self.write_queue.put(('journal', pickle.dumps(
+                (action, key, value), pickle.HIGHEST_PROTOCOL)))
+
+    def _writer_loop(self):
+        while True:
+            items = [self.write_queue.get()]
+
+            while not self.write_queue.empty():
+                items.append(self.write_queue.get_nowait())
+
+            try:
+                # Only the most recent full write matters, and any journal
+                # entries queued before it are already part of its data.
+                for i in range(len(items) - 1, -1, -1):
+                    if items[i][0] == 'write':
+                        self._write_file(pickle.loads(items[i][1]))
+                        journal_entries = items[i + 1:]
+                        break
+                else:
+                    journal_entries = items
+
+                if journal_entries:
+                    self._write_journal([x[1] for x in journal_entries])
+
+            except Exception:
+                # report it, but keep the thread alive so flush() doesn't
+                # wait forever
+                exc_type, exc_value, exc_traceback = sys.exc_info()
+                lines = traceback.format_exception(exc_type, exc_value,
+                                                   exc_traceback)
+                msg = ''.join(line for line in lines)
+                self.machine.crash_queue.put(msg)
+
+            finally:
+                for _ in items:
+                    self.write_queue.task_done()
+
+    def _write_file(self, data):
         self.log.debug("Writing %s to: %s", self.name, self.filename)
 
-        FileManager.save(self.filename, self.data)
+        try:
+            FileManager.save(self.temp_filename, data)
+
+            with open(self.temp_filename, 'ab') as f:
+                os.fsync(f.fileno())
+
+            if sys.platform == 'win32' and os.path.isfile(self.filename):
+                # Windows can't rename over an existing file
+                os.remove(self.filename)
+
+            os.rename(self.temp_filename, self.filename)
+
+            # everything in the journal is in the data file now
+            if os.path.isfile(self.journal_filename):
+                os.remove(self.journal_filename)
+
+        except (IOError, OSError) as e:
+            self.log.error("Error writing %s: %s", self.filename, e)
+
+    def _write_journal(self, entries):
+        try:
+            with open(self.journal_filename, 'ab') as f:
+                for entry in entries:
+                    f.write(entry)
+
+                f.flush()
+                os.fsync(f.fileno())
+
+        except (IOError, OSError) as e:
+            self.log.error("Error writing %s: %s", self.journal_filename, e)
 
 
 # The MIT License (MIT)
@@ -49,7 +49,9 @@ class DeviceManager(object):
 
             # create the devices
             if config:
-                self.create_devices(collection_name, config)
+                with self.machine.startup_profiler.profile(collection_name,
+                                                           'devices'):
+                    self.create_devices(collection_name, config)
 
             # create the default control events
             try:
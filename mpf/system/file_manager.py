@@ -7,8 +7,10 @@
 # Documentation and more info at http://missionpinball.com/mpf
 
 import logging
+import multiprocessing
 import os
 import sys
+import time
 import mpf.file_interfaces
 
 
@@ -67,11 +69,49 @@ class FileInterface(object):
         raise NotImplementedError
 
 
+def _init_load_worker():
+    # Runs in each worker process of the parallel file loader. Errors are
+    # reported by loading the file again in the main process, so there's no
+    # need to log anything here.
+    logging.disable(logging.CRITICAL)
+
+    if not FileManager.file_interfaces:
+        FileManager.init()
+
+
+def _load_in_worker(args):
+    # Loads a file in a worker process. Returns a tuple of (filename, config,
+    # secs), with config set to None if the file couldn't be loaded.
+    filename, verify_version = args
+    start_time = time.time()
+
+    try:
+        config = FileManager.load(filename, verify_version,
+                                  halt_on_error=True)
+    except (Exception, SystemExit):
+        return filename, None, 0
+
+    return filename, config, time.time() - start_time
+
+
 class FileManager(object):
 
     log = logging.getLogger('FileManager')
     file_interfaces = dict()
 
+    preloaded = dict()
+    """Dictionary of files which have been parsed ahead of time by
+    :meth:`preload`, keyed by absolute path. Values are tuples of (config,
+    verify_version). Entries are removed the first time they're loaded."""
+
+    processes = 0
+    """Number of processes used to parse files in parallel. 0 means one per
+    CPU."""
+
+    min_parallel_files = 4
+    """Minimum number of files for :meth:`preload` and :meth:`load_many` to
+    start a process pool. Fewer files are loaded one after the other."""
+
     @classmethod
     def init(cls):
         # Needs to be a separate method to prevent circular import
@@ -122,6 +162,15 @@ class FileManager(object):
         file = FileManager.locate_file(filename)
 
         if file:
+            try:
+                config, verified = FileManager.preloaded.pop(
+                    os.path.abspath(file))
+            except KeyError:
+                pass
+            else:
+                if verified or not verify_version:
+                    return config
+
             ext = os.path.splitext(file)[1]
 
             try:
@@ -142,6 +191,127 @@ class FileManager(object):
         else:
             return dict()
 
+    @staticmethod
+    def load_many(filenames, verify_version=False, halt_on_error=False):
+        """Loads several files, parsing them in parallel in a pool of worker
+        processes if there are enough of them.
+
+        Args:
+            filenames: List of files to load.
+            verify_version: Boolean which specifies whether the config file
+                version of each file should be checked.
+            halt_on_error: Boolean which controls what happens if a file can't
+                be loaded. Works the same way as in :meth:`load`.
+
+        Returns:
+            A dictionary of the loaded configs, keyed by the file names that
+            were passed.
+
+        Files which fail to load in a worker process are loaded again in this
+        process, so errors are logged (and handled) exactly like they would be
+        by :meth:`load`.
+
+        """
+        start_time = time.time()
+        load_times = dict()
+        configs = dict()
+
+        for filename, (config, secs) in FileManager._load_in_pool(
+                filenames, verify_version).iteritems():
+            configs[filename] = config
+            load_times[filename] = secs
+
+        for filename in filenames:
+            if filename not in configs:
+                file_start_time = time.time()
+                configs[filename] = FileManager.load(filename, verify_version,
+                                                     halt_on_error)
+                load_times[filename] = time.time() - file_start_time
+
+        FileManager._report_load_times(load_times, time.time() - start_time)
+
+        return configs
+
+    @staticmethod
+    def preload(filenames, verify_version=False):
+        """Parses files in parallel ahead of time so that the next
+        :meth:`load` of each of them returns right away.
+
+        This lets code which loads its files one by one (mode configs, shows,
+        etc.) benefit from parallel parsing without changing how it loads
+        them. Nothing happens if there are fewer than
+        :attr:`min_parallel_files` files.
+
+        Args:
+            filenames: List of files to parse.
+            verify_version: Boolean which specifies whether the config file
+                version of each file should be checked. A file which is
+                preloaded without being verified is loaded again if it's
+                later loaded with verify_version=True.
+
+        """
+        start_time = time.time()
+        load_times = dict()
+
+        for filename, (config, secs) in FileManager._load_in_pool(
+                filenames, verify_version).iteritems():
+            FileManager.preloaded[os.path.abspath(filename)] = (config,
+                                                                verify_version)
+            load_times[filename] = secs
+
+        if load_times:
+            FileManager._report_load_times(load_times,
+                                           time.time() - start_time)
+
+    @staticmethod
+    def _load_in_pool(filenames, verify_version):
+        # Returns a dictionary of filename: (config, secs) for the files that
+        # were loaded successfully by the worker processes
+        filenames = list(set(f for f in filenames if FileManager.locate_file(f)))
+
+        processes = FileManager.processes or multiprocessing.cpu_count()
+        processes = min(processes, len(filenames))
+
+        if (processes < 2 or
+                len(filenames) < max(FileManager.min_parallel_files, 2)):
+            return dict()
+
+        try:
+            pool = multiprocessing.Pool(processes, _init_load_worker)
+        except (OSError, ImportError) as e:
+            FileManager.log.warning("Could not start file loader processes. "
+                                    "Loading files one at a time. %s", e)
+            return dict()
+
+        results = dict()
+
+        try:
+            for filename, config, secs in pool.imap_unordered(
+                    _load_in_worker,
+                    [(f, verify_version) for f in filenames]):
+
+                if config is not None:
+                    results[filename] = config, secs
+
+        finally:
+            pool.close()
+            pool.join()
+
+        FileManager.log.debug("Parsed %s of %s files using %s processes",
+                              len(results), len(filenames), processes)
+
+        return results
+
+    @staticmethod
+    def _report_load_times(load_times, total_secs):
+        FileManager.log.info("Loaded %s files in %.3fs (%.3fs of parse time)",
+                             len(load_times), total_secs,
+                             sum(load_times.values()))
+
+        for filename, secs in sorted(load_times.iteritems(),
+                                     key=lambda x: x[1], reverse=True):
+            FileManager.log.debug("%7.1fms %s", secs * 1000, filename)
+
     @staticmethod
     def save(filename, data):
         ext = os.path.splitext(filename)[1]
@@ -541,6 +541,23 @@ class LightController(object):
                                      'priority': priority,
                                      'blend': blend})
 
+    def _add_leds_to_update_list(self, leds, colors, fade_ms, priority, blend):
+        # Same as _add_to_led_update_list() but for many LEDs at once, so we
+        # only walk the update list once rather than once per LED
+        leds = leds[:len(colors)]
+        led_set = set(leds)
+
+        self.led_update_list = [item for item in self.led_update_list
+                                if item['led'] not in led_set or
+                                item['priority'] > priority]
+
+        self.led_update_list.extend({'led': led,
+                                     'color': color,
+                                     'fade_ms': fade_ms,
+                                     'priority': priority,
+                                     'blend': blend}
+                                    for led, color in zip(leds, colors))
+
     def _add_to_event_queue(self, event):
         # Since events don't blend, this is easy
         self.event_queue.add(event)
@@ -850,7 +867,9 @@ class LightController(object):
         self.external_show_command_queue.put((self._process_external_show_stop_command, (name,)))
 
     def add_external_show_frame_command_to_queue(self, name, led_data=None, light_data=None,
-                                                 flasher_data=None, gi_data=None):
+                                                 flasher_data=None, gi_data=None,
+                                                 led_bytes=None, led_indexes=None,
+                                                 light_indexes=None):
         """Called by BCP worker thread when an external show frame command is received
         via BCP.  Adds the command to a thread-safe queue where it will be processed
         by the main thread.
@@ -861,10 +880,30 @@ class LightController(object):
             light_data: A string of concatenated hex brightness values for the lights in the show.
             flasher_data: A string of concatenated pulse time (ms) values for the flashers in the show.
             gi_data: A string of concatenated hex brightness values for the GI in the show.
+            led_bytes: A raw byte string of RGB values (3 bytes per led) for the leds in the
+                show. If present, this is used instead of led_data. It's converted to color
+                lists here so that work happens in the BCP worker thread rather than in the
+                main thread.
+            led_indexes: Optional comma-separated string of the positions (in the show's
+                list of leds) of the leds in led_data or led_bytes, if the frame only
+                contains the leds which changed. Default is None, which means all of them.
+            light_indexes: Same as led_indexes, but for the lights in light_data.
         """
+        led_colors = None
+
+        if led_bytes:
+            led_colors = Util.bytes_to_list_of_lists(led_bytes)
+
+        if led_indexes:
+            led_indexes = [int(x) for x in led_indexes.split(',')]
+
+        if light_indexes:
+            light_indexes = [int(x) for x in light_indexes.split(',')]
+
         self.external_show_command_queue.put((self._process_external_show_frame_command,
                                               (name, led_data, light_data,
-                                               flasher_data, gi_data)))
+                                               flasher_data, gi_data, led_colors,
+                                               led_indexes, light_indexes)))
 
     def _update_external_shows(self):
         """Processes any pending BCP external show commands.  This function is called
@@ -913,7 +952,8 @@ class LightController(object):
         # remove it.
 
     def _process_external_show_frame_command(self, name, led_data, light_data,
-                                             flasher_data, gi_data):
+                                             flasher_data, gi_data, led_colors=None,
+                                             led_indexes=None, light_indexes=None):
         """Processes an external show frame command.  Runs in the main processing thread.
 
         Args:
@@ -921,15 +961,27 @@ class LightController(object):
             led_data: A string of concatenated hex color values for the leds in the show.
             light_data: A string of concatenated hex brightness values for the lights in the show.
             flasher_data: A string of concatenated pulse time (ms) values for the flashers in the show.
-            gi_data: A string of concatenated hex brightness values for the GI in the show.        """
+            gi_data: A string of concatenated hex brightness values for the GI in the show.
+            led_colors: A list of color lists for the leds in the show, decoded from a binary
+                frame. If present, led_data is ignored.
+            led_indexes: Optional list of the positions of the leds in led_colors or
+                led_data in the show's list of leds. None means all of them.
+            light_indexes: Optional list of the positions of the lights in light_data.
+        """
         if name not in self.running_external_show_keys:
             return
 
-        if led_data:
-            self.running_external_show_keys[name].update_leds(led_data)
+        if led_colors:
+            self.running_external_show_keys[name].update_led_colors(led_colors,
+                                                                    led_indexes)
+
+        elif led_data:
+            self.running_external_show_keys[name].update_leds(led_data,
+                                                              led_indexes)
 
         if light_data:
-            self.running_external_show_keys[name].update_lights(light_data)
+            self.running_external_show_keys[name].update_lights(light_data,
+                                                                light_indexes)
 
         if flasher_data:
             self.running_external_show_keys[name].update_gis(flasher_data)
@@ -940,6 +992,8 @@ class LightController(object):
 
 class Show(Asset):
 
+    file_manager_asset = True
+
     def __init__(self, machine, config, file_name, asset_manager, actions=None):
         if not actions:
             super(Show, self).__init__(machine, config, file_name,
@@ -1913,14 +1967,21 @@ class ExternalShow(object):
             self.gis = Util.string_to_list(gis)
             self.gis = [self.machine.gis[x] for x in self.gis]
 
-    def update_leds(self, data):
-        for led, color in zip(self.leds, Util.chunker(data, 6)):
+    def update_leds(self, data, indexes=None):
+        for led, color in zip(self._select(self.leds, indexes),
+                              Util.chunker(data, 6)):
             self.machine.light_controller._add_to_led_update_list(
                 led, Util.hex_string_to_list(color), 0, self.priority,
                 self.blend)
 
-    def update_lights(self, data):
-        for light, brightness in zip(self.lights, Util.chunker(data, 2)):
+    def update_led_colors(self, colors, indexes=None):
+        self.machine.light_controller._add_leds_to_update_list(
+            self._select(self.leds, indexes), colors, 0, self.priority,
+            self.blend)
+
+    def update_lights(self, data, indexes=None):
+        for light, brightness in zip(self._select(self.lights, indexes),
+                                     Util.chunker(data, 2)):
             self.machine.light_controller._add_to_light_update_list(
                 light, Util.hex_string_to_int(brightness), self.priority, self.blend)
 
@@ -1934,6 +1995,14 @@ class ExternalShow(object):
             if flash:
                 self.machine.light_controller._add_to_flasher_queue(flasher)
 
+    @staticmethod
+    def _select(devices, indexes):
+        # the devices a frame with only the changed ones is for
+        if indexes is None:
+            return devices
+
+        return [devices[i] for i in indexes if i < len(devices)]
+
     def stop(self):
         for led in self.leds:
             if led.cache['priority'] <= self.priority:
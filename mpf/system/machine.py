@@ -6,6 +6,7 @@
 
 # Documentation and more info at http://missionpinball.com/mpf
 
+import hashlib
 import logging
 import os
 import time
@@ -14,9 +15,12 @@ import Queue
 
 from mpf.system import *
 from mpf.system.config import Config, CaseInsensitiveDict
+from mpf.system.asset_manifest import AssetManifest
+from mpf.system.config_cache import ConfigCache
+from mpf.system.startup_profiler import StartupProfiler
 from mpf.system.tasks import Task, DelayManager
 from mpf.system.data_manager import DataManager
-from mpf.system.timing import Timing
+from mpf.system.timing import Timing, Timer
 from mpf.system.assets import AssetManager
 from mpf.system.utility_functions import Util
 from mpf.system.file_manager import FileManager
@@ -53,6 +57,9 @@ class MachineController(object):
         self.log.debug("Command line arguments: {}".format(self.options))
         self.verify_system_info()
 
+        self.startup_profiler = StartupProfiler(
+            enabled=bool(self.options.get('profile_startup')))
+
         self.loop_start_time = 0
         self.tick_num = 0
         self.done = False
@@ -67,6 +74,10 @@ class MachineController(object):
         self.machine_vars = CaseInsensitiveDict()
         self.machine_var_monitor = False
         self.machine_var_data_manager = None
+        self.machine_var_changes = dict()
+        self.machine_var_expire_timer = None
+        self.config_cache = None
+        self.asset_manifest = None
 
         self.flag_bcp_reset_complete = False
         self.asset_loader_complete = False
@@ -78,9 +89,22 @@ class MachineController(object):
 
         FileManager.init()
         self.config = dict()
-        self._load_mpf_config()
-        self._set_machine_path()
-        self._load_machine_config()
+
+        with self.startup_profiler.profile('load_config'):
+            self._load_config()
+
+        if self.options.get('config_cache', True):
+            self.asset_manifest = AssetManifest(
+                filename=os.path.join('cache', 'assets_{}.cache'.format(
+                    hashlib.md5(self.machine_path).hexdigest()[:12])),
+                rebuild=self.options.get('rebuild_config_cache', False))
+
+        FileManager.processes = (
+            self.config['mpf']['parallel_file_loading']['processes'])
+        FileManager.min_parallel_files = (
+            self.config['mpf']['parallel_file_loading']['min_files'])
+        AssetManager.num_loader_threads = (
+            self.config['mpf']['asset_loader_threads'])
 
         self.configure_debugger()
 
@@ -106,13 +130,15 @@ class MachineController(object):
 
         self.create_machine_var('credits_string', credit_string, silent=True)
 
-        self._load_system_modules()
+        with self.startup_profiler.profile('system_modules'):
+            self._load_system_modules()
 
         # This is called so hw platforms have a change to register for events,
         # and/or anything else they need to do with system modules since
         # they're not set up yet when the hw platforms are constructed.
-        for platform in self.hardware_platforms.values():
-            platform.initialize()
+        with self.startup_profiler.profile('platform_initialize'):
+            for platform in self.hardware_platforms.values():
+                platform.initialize()
 
         self.validate_machine_config_section('machine')
         self.validate_machine_config_section('timing')
@@ -120,21 +146,40 @@ class MachineController(object):
         self.validate_machine_config_section('game')
 
         self._register_system_events()
-        self._load_machine_vars()
-        self.events.post("init_phase_1")
-        self.events._process_event_queue()
-        self.events.post("init_phase_2")
-        self.events._process_event_queue()
-        self._load_plugins()
-        self.events.post("init_phase_3")
-        self.events._process_event_queue()
-        self._load_scriptlets()
-        self.events.post("init_phase_4")
-        self.events._process_event_queue()
-        self.events.post("init_phase_5")
-        self.events._process_event_queue()
 
-        self.reset()
+        with self.startup_profiler.profile('machine_vars'):
+            self._load_machine_vars()
+
+        self._run_init_phase(1)
+        self._run_init_phase(2)
+
+        with self.startup_profiler.profile('plugins'):
+            self._load_plugins()
+
+        self._run_init_phase(3)
+
+        with self.startup_profiler.profile('scriptlets'):
+            self._load_scriptlets()
+
+        self._run_init_phase(4)
+        self._run_init_phase(5)
+
+        if self.config_cache:
+            self.config_cache.save()
+
+        if self.asset_manifest:
+            self.asset_manifest.save()
+
+            # modes loaded later can add more assets
+            self.events.add_handler('shutdown', self.asset_manifest.save)
+
+        with self.startup_profiler.profile('reset'):
+            self.reset()
+
+    def _run_init_phase(self, phase):
+        with self.startup_profiler.profile('init_phase_{}'.format(phase)):
+            self.events.post('init_phase_{}'.format(phase))
+            self.events._process_event_queue()
 
     def validate_machine_config_section(self, section):
         if section not in self.config['config_validator']:
@@ -156,7 +201,10 @@ class MachineController(object):
         self.events.add_handler('timer_tick', self._loading_tick)
 
     def _load_machine_vars(self):
-        self.machine_var_data_manager = DataManager(self, 'machine_vars')
+        config = self.config['mpf']['machine_vars']
+
+        self.machine_var_data_manager = DataManager(
+            self, 'machine_vars', journal=config['journal'] or None)
 
         current_time = time.time()
 
@@ -169,6 +217,68 @@ class MachineController(object):
                 settings['value'] = 0
 
             self.create_machine_var(name=name, value=settings['value'])
+            self.machine_vars[name]['expire'] = settings.get('expire')
+
+        # Persisted vars are written in batches. The ones still pending are
+        # written before the data manager flushes its own writes at shutdown.
+        self.events.add_handler('shutdown', self._save_machine_vars,
+                                priority=10000)
+        self.events.add_handler('ball_ended', self._save_machine_vars,
+                                priority=10000)
+
+        interval = config['expire_check_interval']
+
+        if interval and str(interval).lower() != 'none':
+            self.machine_var_expire_timer = Timer(
+                self._expire_machine_vars,
+                frequency=Timing.string_to_secs(interval))
+            self.timing.add(self.machine_var_expire_timer)
+
+    def _queue_machine_var_save(self, name, disk_var):
+        # Adds a change to the next batch of persisted machine vars. A
+        # disk_var of None removes the var from disk.
+        self.machine_var_changes[name] = disk_var
+
+        save_interval = Timing.string_to_ms(
+            self.config['mpf']['machine_vars']['save_interval'])
+
+        if not save_interval:
+            self._save_machine_vars()
+        elif not self.delay.check('save_machine_vars'):
+            self.delay.add(ms=save_interval, callback=self._save_machine_vars,
+                           name='save_machine_vars')
+
+    def _save_machine_vars(self, **kwargs):
+        self.delay.remove('save_machine_vars')
+
+        if not self.machine_var_changes:
+            return
+
+        changes = self.machine_var_changes
+        self.machine_var_changes = dict()
+
+        data = dict()
+        removed_keys = list()
+
+        for name, disk_var in changes.iteritems():
+            if disk_var is not None:
+                data[name] = disk_var
+            elif name in self.machine_var_data_manager.data:
+                removed_keys.append(name)
+
+        if data or removed_keys:
+            self.machine_var_data_manager.save_keys(data, removed_keys)
+
+    def _expire_machine_vars(self):
+        # Timer callback which sets machine vars whose expiration time has
+        # passed back to 0.
+        current_time = time.time()
+
+        for name, var in self.machine_vars.items():
+            if var.get('expire') and var['expire'] < current_time:
+                self.log.debug("Machine var '%s' has expired", name)
+                self.set_machine_var(name, 0)
+                var['expire'] = None
 
     def _check_crash_queue(self):
         try:
@@ -180,8 +290,38 @@ class MachineController(object):
             self.log.critical("Crash details: %s", crash)
             self.done = True
 
-    def _load_mpf_config(self):
-        self.config = Config.load_config_file(self.options['mpfconfigfile'])
+    def _load_config(self):
+        # Loads the MPF and machine configs, using the config cache if it's
+        # enabled and none of the config files have changed since it was built
+        if self.options.get('config_cache', True):
+            key = (os.path.abspath(self.options['mpfconfigfile']),
+                   self.options['machine_path'],
+                   tuple(self.options['configfile']))
+
+            self.config_cache = ConfigCache(
+                filename=os.path.join('cache', 'config_{}.cache'.format(
+                    hashlib.md5(repr(key)).hexdigest()[:12])),
+                key=key,
+                rebuild=self.options.get('rebuild_config_cache', False))
+
+            config = self.config_cache.get('machine')
+
+            if config:
+                self.config = config
+                self._set_machine_path()
+                return
+
+        loaded_files = list()
+        self._load_mpf_config(loaded_files)
+        self._set_machine_path()
+        self._load_machine_config(loaded_files)
+
+        if self.config_cache:
+            self.config_cache.add('machine', self.config, loaded_files)
+
+    def _load_mpf_config(self, loaded_files=None):
+        self.config = Config.load_config_file(self.options['mpfconfigfile'],
+                                              loaded_files=loaded_files)
 
     def _set_machine_path(self):
         # If the machine folder value passed starts with a forward or
@@ -201,7 +341,7 @@ class MachineController(object):
         # Add the machine folder to sys.path so we can import modules from it
         sys.path.append(self.machine_path)
 
-    def _load_machine_config(self):
+    def _load_machine_config(self, loaded_files=None):
         for num, config_file in enumerate(self.options['configfile']):
 
             if not (config_file.startswith('/') or
@@ -213,7 +353,8 @@ class MachineController(object):
             self.log.info("Machine config file #%s: %s", num+1, config_file)
 
             self.config = Util.dict_merge(self.config,
-                Config.load_config_file(config_file))
+                Config.load_config_file(config_file,
+                                        loaded_files=loaded_files))
 
     def verify_system_info(self):
         """Dumps information about the Python installation to the log.
@@ -240,7 +381,10 @@ class MachineController(object):
         self.log.info("Loading system modules...")
         for module in self.config['mpf']['system_modules']:
             self.log.debug("Loading '%s' system module", module[1])
-            m = self.string_to_class(module[1])(self)
+
+            with self.startup_profiler.profile(module[0], 'system_module'):
+                m = self.string_to_class(module[1])(self)
+
             setattr(self, module[0], m)
 
     def _load_plugins(self):
@@ -255,7 +399,9 @@ class MachineController(object):
 
             self.log.debug("Loading '%s' plugin", plugin)
 
-            pluginObj = self.string_to_class(plugin)(self)
+            with self.startup_profiler.profile(plugin, 'plugin'):
+                pluginObj = self.string_to_class(plugin)(self)
+
             self.plugins.append(pluginObj)
 
     def _load_scriptlets(self):
@@ -268,12 +414,14 @@ class MachineController(object):
 
                 self.log.debug("Loading '%s' scriptlet", scriptlet)
 
-                i = __import__(self.config['mpf']['paths']['scriptlets'] + '.'
-                               + scriptlet.split('.')[0], fromlist=[''])
+                with self.startup_profiler.profile(scriptlet, 'scriptlet'):
+                    i = __import__(self.config['mpf']['paths']['scriptlets'] +
+                                   '.' + scriptlet.split('.')[0],
+                                   fromlist=[''])
 
-                self.scriptlets.append(getattr(i, scriptlet.split('.')[1])
-                                       (machine=self,
-                                        name=scriptlet.split('.')[1]))
+                    self.scriptlets.append(getattr(i, scriptlet.split('.')[1])
+                                           (machine=self,
+                                            name=scriptlet.split('.')[1]))
 
     def _prepare_to_reset(self):
         pass
@@ -311,11 +459,12 @@ class MachineController(object):
         """
 
         if name not in self.hardware_platforms:
-            hardware_platform = __import__('mpf.platform.%s' % name,
-                                           fromlist=["HardwarePlatform"])
+            with self.startup_profiler.profile(name, 'platform'):
+                hardware_platform = __import__('mpf.platform.%s' % name,
+                                               fromlist=["HardwarePlatform"])
 
-            self.hardware_platforms[name] = (
-                hardware_platform.HardwarePlatform(self))
+                self.hardware_platforms[name] = (
+                    hardware_platform.HardwarePlatform(self))
 
     def set_default_platform(self, name):
         """Sets the default platform which is used if a device class-specific or
@@ -472,13 +621,13 @@ class MachineController(object):
     def _loading_tick(self):
         if not self.asset_loader_complete:
 
-            if AssetManager.loader_queue.qsize():
+            if AssetManager.get_pending_count():
                 self.log.debug("Holding Attract start while MPF assets load. "
                                "Remaining: %s",
-                               AssetManager.loader_queue.qsize())
+                               AssetManager.get_pending_count())
                 self.bcp.bcp_trigger('assets_to_load',
                      total=AssetManager.total_assets,
-                     remaining=AssetManager.loader_queue.qsize())
+                     remaining=AssetManager.get_pending_count())
             else:
                 self.bcp.bcp_trigger('assets_to_load',
                      total=AssetManager.total_assets,
@@ -501,6 +650,9 @@ class MachineController(object):
         self.events.post('reset_complete')
         self.events.remove_handler(self._loading_tick)
 
+        if self.startup_profiler.enabled:
+            self.startup_profiler.finish(self.options['profile_startup'])
+
     def configure_debugger(self):
         pass
 
@@ -557,8 +709,9 @@ class MachineController(object):
                 if self.machine_vars[name]['expire_secs']:
                     disk_var['expire'] = (time.time() +
                         self.machine_vars[name]['expire_secs'])
+                    self.machine_vars[name]['expire'] = disk_var['expire']
 
-                self.machine_var_data_manager.save_key(name, disk_var)
+                self._queue_machine_var_save(name, disk_var)
 
             self.log.debug("Setting machine_var '%s' to: %s, (prior: %s, "
                            "change: %s)", name, value, prev_value,
@@ -607,8 +760,10 @@ class MachineController(object):
             expire_secs: Optional number of seconds you'd like this variable
                 to persist on disk for. When MPF boots, if the expiration time
                 of the variable is in the past, it will be loaded with a value
-                of 0. For example, this lets you write the number of credits on
-                the machine to disk to persist even during power off, but you
+                of 0. It's also set to 0 if it expires while MPF is running.
+                (Checked every mpf:machine_vars:expire_check_interval.) For
+                example, this lets you write the number of credits on the
+                machine to disk to persist even during power off, but you
                 could set it so that those only stay persisted for an hour.
 
         """
@@ -617,6 +772,7 @@ class MachineController(object):
         var['value'] = value
         var['persist'] = persist
         var['expire_secs'] = expire_secs
+        var['expire'] = None
 
         self.machine_vars[name] = var
 
@@ -633,9 +789,10 @@ class MachineController(object):
         """
         try:
             del self.machine_vars[name]
-            self.machine_var_data_manager.remove_key(name)
         except KeyError:
-            pass
+            return
+
+        self._queue_machine_var_save(name, None)
 
     def remove_machine_var_search(self, startswith='', endswith=''):
         """Removes a machine variable by matching parts of its name.
@@ -651,7 +808,7 @@ class MachineController(object):
         for var in self.machine_vars.keys():
             if var.startswith(startswith) and var.endswith(endswith):
                 del self.machine_vars[var]
-                self.machine_var_data_manager.remove_key(var)
+                self._queue_machine_var_save(var, None)
 
 
 
@@ -7,11 +7,15 @@
 # Documentation and more info at http://missionpinball.com/mpf
 
 
+import copy
 import logging
 import os
+import time
 from collections import namedtuple
 
 from mpf.system.config import Config
+from mpf.system.file_manager import FileManager
+from mpf.system.timing import Timing, Timer
 from mpf.system.utility_functions import Util
 
 
@@ -51,6 +55,7 @@ class ModeController(object):
 
         self.active_modes = list()
         self.mode_stop_count = 0
+        self.warm_up_timer = None
 
         # The following two lists hold namedtuples of any remote components
         # that need to be notified when a mode object is created and/or
@@ -79,25 +84,125 @@ class ModeController(object):
                                         self._player_turn_stop,
                                         priority=1000000)
 
+        self.machine.events.add_handler('reset_complete',
+                                        self._start_warm_up)
+
     def _load_modes(self):
         # Loads the modes from the modes: section of the machine configuration
         # file.
 
-        for mode in set(self.machine.config['modes']):
-            self.machine.modes.append(self._load_mode(mode))
+        modes = set(self.machine.config['modes'])
+        configs = dict()
+
+        if self.machine.config_cache:
+            for mode in modes:
+                configs[mode] = self.machine.config_cache.get('mode.' + mode)
+
+        # parse the config files of all the modes that aren't cached in
+        # parallel, rather than one after the other as each mode loads
+        files = list()
+        for mode in modes:
+            if not configs.get(mode):
+                files.extend(self._locate_mode_config_files(mode)[0])
+
+        FileManager.preload(files, verify_version=True)
+
+        lazy_loading = self.machine.config['mpf']['lazy_mode_loading']
+
+        for mode in modes:
+            config = self._get_mode_config(mode, configs.get(mode))
+
+            if lazy_loading:
+                settings = self.machine.config_processor.process_config2(
+                    config_spec='mode',
+                    source=copy.deepcopy(config.get('mode', dict())),
+                    section_name='mode')
+
+                if settings['lazy_load']:
+                    self.machine.modes.append(
+                        ModeStub(self, mode, config, settings))
+                    continue
+
+            with self.machine.startup_profiler.profile(mode, 'mode'):
+                self.machine.modes.append(self._load_mode(mode, config))
+
+    def _get_mode_config(self, mode_string, config=None):
+        # Returns the config for a mode, loading it from disk (and adding it to
+        # the config cache) if it wasn't passed.
+
+        if not config:
+            loaded_files = list()
+            config = self._load_mode_config(mode_string, loaded_files)
+
+            if self.machine.config_cache:
+                self.machine.config_cache.add('mode.' + mode_string, config,
+                                              loaded_files)
+
+        return config
+
+    def load_mode_stub(self, stub):
+        """Fully loads a mode which was registered as a :class:`ModeStub` at
+        boot and replaces the stub with the Mode object.
+
+        Args:
+            stub: The ModeStub of the mode to load.
+
+        Returns:
+            The Mode object.
+
+        """
+        if stub.mode:
+            return stub.mode
+
+        self.machine.events.remove_handler(stub.start)
+
+        stub.mode = self._load_mode(stub.mode_string, stub.config)
+        stub.mode.player = stub.player
+
+        self.machine.modes[self.machine.modes.index(stub)] = stub.mode
+
+        return stub.mode
+
+    def _start_warm_up(self, **kwargs):
+        # Starts loading the mode stubs in the background, one at a time,
+        # after the machine has finished booting.
+
+        if self.warm_up_timer or not any(isinstance(mode, ModeStub)
+                                         for mode in self.machine.modes):
+            return
+
+        delay = self.machine.config['mpf']['lazy_mode_warm_up_delay']
+
+        if delay and str(delay).lower() != 'none':
+            self.warm_up_timer = Timer(self._warm_up,
+                                       frequency=Timing.string_to_secs(delay))
+            self.machine.timing.add(self.warm_up_timer)
+
+    def _warm_up(self):
+        # Timer callback which loads one mode stub each time it's called
+
+        for mode in self.machine.modes:
+            if isinstance(mode, ModeStub):
+                self.load_mode_stub(mode)
+                return
+
+        self.log.debug("All modes are loaded")
+        self.machine.timing.remove(self.warm_up_timer)
 
-    def _load_mode(self, mode_string):
+    def _load_mode(self, mode_string, config=None):
         """Loads a mode, reads in its config, and creates the Mode object.
 
         Args:
             mode: String name of the mode you're loading. This is the name of
                 the mode's folder in your game's machine_files/modes folder.
+            config: Optional config dictionary for this mode, e.g. from the
+                config cache. If None, the mode's config files are loaded.
 
         """
         if self.debug:
             self.log.debug('Processing mode: %s', mode_string)
 
-        config = dict()
+        start_time = time.time()
 
         # Find the folder for this mode. First check the machine folder/modes,
         # if that's not a valid folder, check the mpf/modes folder.
@@ -108,37 +213,7 @@ class ModeController(object):
             mode_path = os.path.abspath(os.path.join('mpf',
                 self.machine.config['mpf']['paths']['modes'], mode_string))
 
-        # Is there an MPF default config for this mode? If so, load it first
-        mpf_mode_config = os.path.join(
-            'mpf',
-            self.machine.config['mpf']['paths']['modes'],
-            mode_string,
-            'config',
-            mode_string + '.yaml')
-
-        if os.path.isfile(mpf_mode_config):
-            config = Config.load_config_file(mpf_mode_config)
-
-        # Now figure out if there's a machine-specific config for this mode,
-        # and if so, merge it into the config
-
-        mode_config_folder = os.path.join(self.machine.machine_path,
-            self.machine.config['mpf']['paths']['modes'],
-            mode_string, 'config')
-
-        found_file = False
-        for path, _, files in os.walk(mode_config_folder):
-            for file in files:
-                file_root, file_ext = os.path.splitext(file)
-
-                if file_root == mode_string:
-                    config = Util.dict_merge(config,
-                        Config.load_config_file(os.path.join(path, file)))
-                    found_file = True
-                    break
-
-            if found_file:
-                break
+        config = self._get_mode_config(mode_string, config)
 
         # Figure out where the code is for this mode.
 
@@ -184,8 +259,88 @@ class ModeController(object):
                 self.log.debug("Loading default Mode class code")
             mode_object = Mode(self.machine, config, mode_string, mode_path)
 
+        self.log.info("Loaded mode %s in %.1fms", mode_string,
+                      (time.time() - start_time) * 1000)
+
         return mode_object
 
+    def _load_mode_config(self, mode_string, loaded_files):
+        """Reads in and merges the MPF and machine config files for a mode.
+
+        Args:
+            mode_string: String name of the mode.
+            loaded_files: List that the names of all the files and folders the
+                config depends on are appended to.
+
+        Returns:
+            The mode's config dictionary.
+
+        """
+        config = dict()
+
+        files, watched_paths = self._locate_mode_config_files(mode_string)
+        loaded_files.extend(watched_paths)
+
+        # The MPF default config (if there is one) is first, so the machine-
+        # specific config is merged into it
+        for file in files:
+            config = Util.dict_merge(config,
+                Config.load_config_file(file, loaded_files=loaded_files))
+
+        return config
+
+    def _locate_mode_config_files(self, mode_string):
+        """Finds the config files for a mode.
+
+        Args:
+            mode_string: String name of the mode.
+
+        Returns:
+            A tuple of two lists. The first is the mode's config files in the
+            order they should be merged. The second is the list of files and
+            folders to watch for changes, which includes the ones that don't
+            exist so the config cache notices when they're added.
+
+        """
+        files = list()
+
+        # Is there an MPF default config for this mode? If so, load it first
+        mpf_mode_config = os.path.join(
+            'mpf',
+            self.machine.config['mpf']['paths']['modes'],
+            mode_string,
+            'config',
+            mode_string + '.yaml')
+
+        if os.path.isfile(mpf_mode_config):
+            files.append(mpf_mode_config)
+
+        # Now figure out if there's a machine-specific config for this mode,
+        # and if so, merge it into the config
+
+        mode_config_folder = os.path.join(self.machine.machine_path,
+            self.machine.config['mpf']['paths']['modes'],
+            mode_string, 'config')
+
+        watched_paths = [mpf_mode_config, mode_config_folder]
+
+        found_file = False
+        for path, _, folder_files in os.walk(mode_config_folder):
+            watched_paths.append(path)
+
+            for file in folder_files:
+                file_root, file_ext = os.path.splitext(file)
+
+                if file_root == mode_string:
+                    files.append(os.path.join(path, file))
+                    found_file = True
+                    break
+
+            if found_file:
+                break
+
+        return files, watched_paths
+
     def _player_added(self, player, num):
         player.uvars['_restart_modes_on_next_ball'] = list()
 
@@ -342,6 +497,49 @@ class ModeController(object):
             return False
 
 
+class ModeStub(object):
+    """Lightweight placeholder for a mode whose code and Mode object are only
+    loaded when it's first started (or by the warm-up task after boot).
+
+    It registers the mode's start events, and loads the real mode and starts
+    it when one of them is posted.
+
+    Args:
+        mode_controller: The ModeController.
+        mode_string: String name of the mode (the name of its folder).
+        config: The mode's config dictionary.
+        settings: The mode's validated mode: config section.
+
+    """
+
+    def __init__(self, mode_controller, mode_string, config, settings):
+        self.mode_controller = mode_controller
+        self.mode_string = mode_string
+        self.name = mode_string.lower()
+        self.config = config
+        self.priority = settings['priority']
+        self.active = False
+        self.player = None
+        self.mode = None  # the Mode object once it's been loaded
+
+        for event in settings['start_events']:
+            mode_controller.machine.events.add_handler(event=event,
+                handler=self.start,
+                priority=settings['priority'] + settings['start_priority'])
+
+    def __repr__(self):
+        return '<ModeStub.{}>'.format(self.name)
+
+    def start(self, **kwargs):
+        """Loads the mode and starts it.
+
+        Args:
+            **kwargs: Passed to the mode's start() method.
+
+        """
+        self.mode_controller.load_mode_stub(self).start(**kwargs)
+
+
 # The MIT License (MIT)
 
 # Copyright (c) 2013-2015 Brian Madden and Gabe Knuth
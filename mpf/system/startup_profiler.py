@@ -0,0 +1,182 @@
+"""Contains the StartupProfiler class."""
+# startup_profiler.py
+# Mission Pinball Framework
+# Written by Brian Madden & Gabe Knuth
+# Released under the MIT License. (See license info at the end of this file.)
+
+# Documentation and more info at http://missionpinball.com/mpf
+
+from contextlib import contextmanager
+import gc
+import json
+import logging
+import os
+import timeit
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import version
+
+
+class StartupProfiler(object):
+    """Records the wall time and the allocations of each phase of MPF's boot
+    process, and of each device collection, mode, plugin, etc. which is set
+    up during those phases.
+
+    Allocations are measured as the change in the number of objects tracked
+    by the garbage collector, plus the change in the process's peak memory
+    (where the resource module is available). Counting the objects is slow,
+    so this is only done when profiling is enabled.
+
+    Args:
+        enabled: Boolean which controls whether anything is recorded. If
+            False, :meth:`profile` does nothing.
+
+    """
+
+    def __init__(self, enabled=False):
+        self.log = logging.getLogger('StartupProfiler')
+        self.enabled = enabled
+        self.entries = list()
+        self.stack = list()
+        self.start_time = timeit.default_timer()
+        self.total_secs = None
+
+    @contextmanager
+    def profile(self, name, category='phase'):
+        """Context manager which records the code run inside it as one entry
+        of the profile.
+
+        Entries can be nested, e.g. each device collection inside the phase
+        which creates the devices.
+
+        Args:
+            name: String name of this entry.
+            category: String category of this entry, e.g. 'phase', 'devices',
+                'mode', 'plugin' or 'assets'.
+
+        """
+        if not self.enabled:
+            yield
+            return
+
+        entry = dict(name=name, category=category, depth=len(self.stack),
+                     parent=self.stack[-1]['name'] if self.stack else None)
+
+        self.stack.append(entry)
+        objects = len(gc.get_objects())
+        max_rss = self._get_max_rss()
+        start_time = timeit.default_timer()
+
+        try:
+            yield
+        finally:
+            entry['secs'] = timeit.default_timer() - start_time
+            entry['start'] = start_time - self.start_time
+            entry['objects'] = len(gc.get_objects()) - objects
+
+            if max_rss is not None:
+                entry['max_rss_kb'] = self._get_max_rss() - max_rss
+
+            self.stack.pop()
+            self.entries.append(entry)
+
+    def finish(self, filename=None, num_entries=25):
+        """Stops profiling, logs a report of the slowest entries and
+        optionally writes the full profile to a JSON file.
+
+        Args:
+            filename: Optional file (with path) to write the profile to.
+            num_entries: The number of entries to include in the logged
+                report.
+
+        """
+        if not self.enabled:
+            return
+
+        self.enabled = False
+        self.total_secs = timeit.default_timer() - self.start_time
+
+        for line in self.get_report(num_entries):
+            self.log.info(line)
+
+        if filename:
+            self.save(filename)
+
+    def get_report(self, num_entries=25):
+        """Returns the report as a list of lines, with the entries ranked by
+        wall time (slowest first)."""
+        lines = ["MPF startup took %.3fs. Slowest parts:" %
+                 (self.total_secs or 0)]
+        lines.append("%8s %6s %10s %10s  %s" % ('ms', '%', 'objects',
+                                                 'rss (kB)', 'name'))
+
+        for entry in sorted(self.entries, key=lambda x: x['secs'],
+                            reverse=True)[:num_entries]:
+
+            if self.total_secs:
+                percent = 100 * entry['secs'] / self.total_secs
+            else:
+                percent = 0
+
+            lines.append("%8.1f %6.1f %10d %10s  %s:%s" % (
+                entry['secs'] * 1000, percent, entry['objects'],
+                entry.get('max_rss_kb', '-'), entry['category'],
+                entry['name']))
+
+        return lines
+
+    def save(self, filename):
+        """Writes the profile as JSON, in the order the entries were started,
+        so profiles from different MPF versions can be compared."""
+        profile = dict(mpf_version=version.__version__,
+                       total_secs=self.total_secs,
+                       entries=sorted(self.entries, key=lambda x: x['start']))
+
+        try:
+            path = os.path.dirname(filename)
+
+            if path and not os.path.isdir(path):
+                os.makedirs(path)
+
+            with open(filename, 'w') as f:
+                json.dump(profile, f, indent=2, sort_keys=True)
+
+        except (IOError, OSError) as e:
+            self.log.warning("Could not write the startup profile to %s: %s",
+                             filename, e)
+            return
+
+        self.log.info("Wrote the startup profile to %s", filename)
+
+    @staticmethod
+    def _get_max_rss():
+        if resource:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+
+# The MIT License (MIT)
+
+# Copyright (c) 2013-2015 Brian Madden and Gabe Knuth
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
@@ -66,6 +66,31 @@ class Util(object):
             # if we're passed anything else, just make it into a list
             return [string]
 
+    @staticmethod
+    def string_to_bytes(size_string):
+        """Converts a string of a size in bytes (like 256MB) into an integer
+        number of bytes.
+
+        Args:
+            size_string: The string you'd like to convert. Can end with B, KB,
+                MB or GB. If there's no unit, it's bytes.
+
+        Returns:
+            Integer number of bytes, or None if the string is None or 'None'.
+
+        """
+        if size_string is None or str(size_string).lower() == 'none':
+            return None
+
+        size_string = str(size_string).upper().replace(' ', '')
+
+        for unit, multiplier in (('KB', 1024), ('MB', 1024 ** 2),
+                                 ('GB', 1024 ** 3), ('B', 1)):
+            if size_string.endswith(unit):
+                return int(float(size_string[:-len(unit)]) * multiplier)
+
+        return int(float(size_string))
+
     @staticmethod
     def string_to_lowercase_list(string):
         """ Converts a comma-separated and/or space-separated string into a
@@ -193,6 +218,29 @@ class Util(object):
 
         return output[0:output_length:]
 
+    @staticmethod
+    def bytes_to_list_of_lists(input_bytes, output_length=3):
+        """Takes a raw byte string and returns it as a list of lists of
+        integers.
+
+        This is used for binary color data, so an input of the six bytes
+        ff ff 00 00 00 ff will be returned as [[255, 255, 0], [0, 0, 255]]
+
+        Args:
+            input_bytes: A raw byte string (or bytearray).
+            output_length: Integer value of the number of items in each
+                returned list. Default is 3.
+
+        Returns:
+            List of lists of integers. If the length of input_bytes isn't a
+            multiple of output_length, the last list will be shorter.
+
+        """
+        input_bytes = bytearray(input_bytes)
+
+        return [list(input_bytes[i:i + output_length])
+                for i in xrange(0, len(input_bytes), output_length)]
+
     @staticmethod
     def hex_string_to_int(inputstring, maxvalue=255):
         """Takes a string input of hex numbers and an integer.
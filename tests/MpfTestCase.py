@@ -27,7 +27,8 @@ class MpfTestCase(unittest.TestCase):
             'machine_path': self.getMachinePath(),
             'configfile': Util.string_to_list(self.getConfigFile()),
             'debug': True,
-            'bcp': self.get_use_bcp()
+            'bcp': self.get_use_bcp(),
+            'config_cache': False
                }
 
     def set_time(self, new_time):
@@ -46,7 +47,7 @@ class MpfTestCase(unittest.TestCase):
             next_timer = self.machine.timing.get_next_timer()
 
             wait_until = next_event
-            if wait_until and next_timer and wait_until > next_timer:
+            if next_timer and (not wait_until or wait_until > next_timer):
                 wait_until = next_timer
 
             if wait_until and wait_until <= end_time:
@@ -0,0 +1,23 @@
+import os
+import unittest
+
+try:
+    import pygame
+except ImportError:
+    pygame = None
+
+
+@unittest.skipIf(pygame is None, "Pygame is not installed")
+class PygameTestCase(unittest.TestCase):
+    """Base class for tests which use Pygame surfaces.
+
+    Pygame won't set the palette of a surface until its display is
+    initialized, so the display is initialized once per test class with SDL's
+    dummy video driver (unless another driver was set).
+
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        pygame.display.init()
@@ -0,0 +1,103 @@
+import threading
+import unittest
+from Queue import Queue
+
+from mock import MagicMock
+
+from mpf.system.assets import AssetManager, Asset
+
+
+class SlowAsset(Asset):
+
+    def _initialize_asset(self):
+        self.load_count = 0
+
+    def do_load(self, callback):
+        self.asset_manager.started.put(self)
+        self.asset_manager.proceed.wait(5)
+        self.load_count += 1
+        self.loaded = True
+
+    def _unload(self):
+        pass
+
+
+class TestAssetLoader(unittest.TestCase):
+
+    def setUp(self):
+        machine = MagicMock()
+        machine.asset_managers = dict()
+        machine.images = dict()
+        machine.config = dict()
+        machine.crash_queue = Queue()
+
+        self.asset_manager = AssetManager(machine, 'images', 'images',
+                                          SlowAsset, 'images', ('png',))
+        self.asset_manager.started = Queue()
+        self.asset_manager.proceed = threading.Event()
+
+        for name in ('a', 'b', 'c'):
+            self.asset_manager.register_asset(
+                name, dict(file=name + '.png', load='mode_start'))
+
+        self.assets = self.asset_manager.asset_list
+
+    def tearDown(self):
+        self.asset_manager.proceed.set()
+
+        for _ in range(50):
+            if not AssetManager.get_pending_count():
+                break
+            threading.Event().wait(.05)
+
+    def _wait_until_loaded(self, group):
+        done = threading.Event()
+        group.add_callback(done.set)
+        self.assertTrue(done.wait(5))
+
+    def test_loader_pool(self):
+        self.assertGreaterEqual(len(AssetManager.loader_threads), 2)
+
+    def test_duplicate_loads(self):
+        callback1 = MagicMock()
+        callback2 = MagicMock()
+        group = AssetManager.get_load_group('test_duplicate_loads')
+
+        self.asset_manager.load_asset(self.assets['a'], callback1, group=group)
+        self.asset_manager.load_asset(self.assets['a'], callback2, priority=20,
+                                      group=group)
+        self.assertEqual(1, AssetManager.get_pending_count())
+
+        self.asset_manager.proceed.set()
+        self._wait_until_loaded(group)
+
+        self.assertEqual(1, self.assets['a'].load_count)
+        callback1.assert_called_once_with()
+        callback2.assert_called_once_with()
+        self.assertEqual(0, AssetManager.get_pending_count())
+
+    def test_mode_group_and_cancel(self):
+        mode = MagicMock()
+        mode.name = 'test_cancel'
+        config = dict(a=dict(), b=dict(), c=dict())
+
+        unload_method, assets = self.asset_manager.load_assets(
+            config, mode=mode, load_key='mode_start')
+        group = AssetManager.get_load_group('test_cancel')
+        self.assertEqual(3, len(group.pending))
+
+        # wait until the loaders are busy, so at least one is still queued
+        for _ in AssetManager.loader_threads:
+            self.asset_manager.started.get(timeout=5)
+
+        callback = MagicMock()
+        group.add_callback(callback)
+
+        # the mode stops before all of its assets are loaded
+        unload_method(assets)
+        self.asset_manager.proceed.set()
+        self._wait_until_loaded(group)
+
+        callback.assert_called_once_with()
+        self.assertLess(sum(asset.load_count for asset in assets), 3)
+        self.assertEqual(0, AssetManager.get_pending_count())
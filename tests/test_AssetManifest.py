@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import MagicMock
+
+from MpfTestCase import MpfTestCase
+
+from mpf.system.asset_manifest import AssetManifest
+
+
+class TestAssetManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.filename = os.path.join(self.path, 'cache', 'assets.cache')
+
+        for folder, files in (('images', ['a.png', 'b.png', 'c.txt']),
+                              ('images/big', ['d.png']),
+                              ('images/big/more', ['e.png'])):
+            os.makedirs(os.path.join(self.path, folder))
+            for file_name in files:
+                open(os.path.join(self.path, folder, file_name), 'w').close()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _walk(self, manifest):
+        return sorted((path, sorted(files)) for path, files in
+                      manifest.walk(os.path.join(self.path, 'images')))
+
+    def test_walk(self):
+        root_path = os.path.join(self.path, 'images')
+        expected = sorted((path, sorted(files)) for path, _, files in
+                          os.walk(root_path, followlinks=True))
+
+        manifest = AssetManifest(self.filename)
+        self.assertEqual(expected, self._walk(manifest))
+        manifest.save()
+
+        manifest = AssetManifest(self.filename)
+        manifest.folders[root_path] = (manifest.folders[root_path][0],
+                                       manifest.folders[root_path][1],
+                                       ['cached.png'])
+
+        # unchanged folders aren't listed again
+        self.assertIn((root_path, ['cached.png']), self._walk(manifest))
+
+        # changed ones are
+        os.utime(root_path, (1, 1))
+        self.assertEqual(expected, self._walk(manifest))
+
+    def test_ids(self):
+        manifest = AssetManifest(self.filename)
+        self.assertEqual(1, manifest.get_id('images', 'a'))
+        self.assertEqual(2, manifest.get_id('images', 'b'))
+        self.assertEqual(1, manifest.get_id('images', 'a'))
+        manifest.save()
+
+        manifest = AssetManifest(self.filename)
+        self.assertEqual(2, manifest.get_id('images', 'b'))
+        self.assertEqual(3, manifest.get_id('sounds', 'a'))
+
+
+class TestAssetManifestMachine(MpfTestCase):
+
+    def getConfigFile(self):
+        return 'test_asset_manifest.yaml'
+
+    def getMachinePath(self):
+        return self.path
+
+    def setUp(self):
+        # the test changes the asset folders, so it runs on a copy of them
+        self.temp_path = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_path, 'machine')
+        shutil.copytree(os.path.join(os.path.dirname(__file__),
+                                     'machine_files', 'asset_manifest'),
+                        self.path)
+        self.filename = os.path.join(self.temp_path, 'cache',
+                                     'assets.cache')
+
+        super(TestAssetManifestMachine, self).setUp()
+        self.asset_manager = self.machine.asset_managers['shows']
+
+    def tearDown(self):
+        super(TestAssetManifestMachine, self).tearDown()
+        shutil.rmtree(self.temp_path)
+
+    def _process(self, config, manifest):
+        self.asset_manager.manifest = manifest
+        return self.asset_manager.process_assets_from_disk(dict(config))
+
+    def test_process_assets_from_disk(self):
+        config = dict(a=dict(priority=2), renamed=dict(file='b.yaml'))
+
+        expected = self._process(config, None)
+
+        self.assertEqual(set(['a', 'renamed', 'd', 'e']), set(expected))
+        self.assertEqual('mode_start', expected['a']['load'])
+        self.assertEqual(2, expected['a']['priority'])
+        self.assertEqual(os.path.join(self.path, 'shows', 'a.yaml'),
+                         expected['a']['file'])
+        self.assertEqual('on_demand', expected['d']['load'])
+
+        manifest = AssetManifest(self.filename)
+        self.assertEqual(expected, self._process(config, manifest))
+        manifest.save()
+
+        # the whole result comes from the manifest now
+        manifest = AssetManifest(self.filename)
+        manifest.walk = MagicMock()
+        self.assertEqual(expected, self._process(config, manifest))
+        self.assertFalse(manifest.walk.called)
+
+        # but not if the config is different
+        config['a']['priority'] = 3
+        expected['a']['priority'] = 3
+        del manifest.walk
+        self.assertEqual(expected, self._process(config, manifest))
+
+        # or if a file was added
+        big_path = os.path.join(self.path, 'shows', 'big')
+        open(os.path.join(big_path, 'f.yaml'), 'w').close()
+        os.utime(big_path, (1, 1))
+        self.assertIn('f', self._process(config, manifest))
+
+    def test_asset_ids(self):
+        self.asset_manager.manifest = AssetManifest(self.filename)
+        self.asset_manager.register_assets(dict())
+
+        show = self.machine.shows['a']
+        self.assertIsInstance(show.id, int)
+        self.assertIs(show, self.asset_manager.get_asset_by_id(show.id))
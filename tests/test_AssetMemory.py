@@ -0,0 +1,135 @@
+import time
+
+from MpfTestCase import MpfTestCase
+
+from mpf.system.assets import AssetManager
+from mpf.system.utility_functions import Util
+
+
+class TestAssetMemory(MpfTestCase):
+
+    def getConfigFile(self):
+        return 'test_asset_memory.yaml'
+
+    def getMachinePath(self):
+        return '../tests/machine_files/asset_memory/'
+
+    def setUp(self):
+        super(TestAssetMemory, self).setUp()
+        self.asset_manager = self.machine.asset_managers['shows']
+        self.shows = self.machine.shows
+
+        # all the show files are the same size
+        self.size = self.shows['show_a'].get_memory_size()
+
+    def _wait_for_loads(self):
+        # the loader threads run in real time
+        for _ in range(500):
+            if not AssetManager.get_pending_count():
+                break
+            time.sleep(.01)
+
+        self.assertEqual(0, AssetManager.get_pending_count())
+        self.machine_run()
+
+    def _start_mode(self, name):
+        self.machine.events.post('start_' + name)
+        self.machine_run()
+        self._wait_for_loads()
+
+    def _stop_mode(self, name):
+        self.machine.events.post('stop_' + name)
+        self.machine_run()
+
+    def test_string_to_bytes(self):
+        self.assertEqual(256 * 1024 * 1024, Util.string_to_bytes('256MB'))
+        self.assertEqual(1536, Util.string_to_bytes('1.5 kb'))
+        self.assertEqual(100, Util.string_to_bytes(100))
+        self.assertIsNone(Util.string_to_bytes('None'))
+
+    def test_shared_assets(self):
+        self._start_mode('mode1')
+        self._start_mode('mode2')
+        self.assertEqual(2 * self.size, self.asset_manager.memory_used)
+        self.assertEqual(2, self.shows['show_a'].ref_count)
+
+        # show_a is still used by mode2
+        self._stop_mode('mode1')
+        self.assertTrue(self.shows['show_a'].loaded)
+        self.assertFalse(self.shows['show_b'].loaded)
+        self.assertEqual(self.size, self.asset_manager.memory_used)
+
+        self._stop_mode('mode2')
+        self.assertFalse(self.shows['show_a'].loaded)
+        self.assertEqual(0, self.asset_manager.memory_used)
+
+    def test_lru_eviction(self):
+        self.asset_manager.max_memory = int(2.5 * self.size)
+
+        # unreferenced assets stay loaded while they fit into the budget
+        self._start_mode('mode1')
+        self._stop_mode('mode1')
+        self.assertTrue(self.shows['show_a'].loaded)
+        self.assertTrue(self.shows['show_b'].loaded)
+
+        # show_a is used again, so show_b is the least recently used one
+        self._start_mode('mode2')
+        self._start_mode('mode3')
+
+        self.assertTrue(self.shows['show_a'].loaded)
+        self.assertFalse(self.shows['show_b'].loaded)
+        self.assertTrue(self.shows['show_c'].loaded)
+        self.assertEqual(2 * self.size, self.asset_manager.memory_used)
+
+        stats = self.asset_manager.get_memory_stats()
+        self.assertEqual(int(2.5 * self.size), stats['max'])
+        self.assertEqual(2 * self.size, stats['used'])
+        self.assertEqual(2, stats['referenced'])
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(3, stats['misses'])
+        self.assertEqual(1, stats['evictions'])
+
+        self.assertEqual(stats, AssetManager.get_all_memory_stats(
+            self.machine)['shows'])
+
+    def test_referenced_assets_are_not_evicted(self):
+        self.asset_manager.max_memory = int(1.5 * self.size)
+
+        self._start_mode('mode1')
+
+        # over budget, but both are still in use
+        self.assertTrue(self.shows['show_a'].loaded)
+        self.assertTrue(self.shows['show_b'].loaded)
+        self.assertEqual(0, self.asset_manager.evictions)
+
+    def test_play_show_of_stopped_mode(self):
+        show = self.shows['show_a']
+
+        # keep the loader threads from starting the load until the mode has
+        # stopped again
+        with AssetManager.loader_lock:
+            self.machine.events.post('start_mode1')
+            self.machine_run()
+            show.play()
+            self._stop_mode('mode1')
+
+        self._wait_for_loads()
+
+        # the show still loads and starts
+        self.assertTrue(show.loaded)
+        self.assertIn(show, self.machine.light_controller.running_shows)
+
+    def test_shows_played_on_demand_are_not_evicted(self):
+        self.asset_manager.max_memory = int(2.5 * self.size)
+        show = self.shows['show_d']
+
+        show.play()
+        self._wait_for_loads()
+        self.assertIn(show, self.machine.light_controller.running_shows)
+
+        self._start_mode('mode1')
+        self._stop_mode('mode1')
+
+        self.assertTrue(show.loaded)
+        self.assertEqual(1, self.asset_manager.evictions)
+        self.assertEqual(2 * self.size, self.asset_manager.memory_used)
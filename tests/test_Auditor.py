@@ -0,0 +1,81 @@
+import unittest
+
+from mock import MagicMock
+
+from MpfTestCase import MpfTestCase
+from mpf.plugins.auditor import AuditCounters
+
+
+class TestAuditCounters(unittest.TestCase):
+
+    def test_counters(self):
+        counters = AuditCounters(dict(a=2))
+        counters.increment('a')
+        counters.increment('b')
+
+        self.assertEqual(3, counters.get('a'))
+        self.assertEqual(1, counters.get('b'))
+        self.assertEqual(0, counters.get('c'))
+        self.assertEqual(dict(a=3, b=1), counters.to_dict())
+
+        copy = counters.copy_names()
+        self.assertEqual(dict(a=0, b=0), copy.to_dict())
+        self.assertEqual(counters.slots, copy.slots)
+
+
+class TestAuditor(MpfTestCase):
+
+    def getConfigFile(self):
+        return 'test_ball_device.yaml'
+
+    def getMachinePath(self):
+        return '../tests/machine_files/ball_device/'
+
+    def setUp(self):
+        super(TestAuditor, self).setUp()
+        self.auditor = self.machine.auditor
+        self.auditor.data_manager.save_all = MagicMock()
+
+    def _hit(self, switch_name):
+        self.machine.switch_controller.process_switch(switch_name, 1)
+        self.machine.switch_controller.process_switch(switch_name, 0)
+
+    def test_switch_audits(self):
+        start = self.auditor.counters['switches'].get('s_start')
+        self._hit('s_start')
+        self._hit('s_start')
+
+        self.assertEqual(start + 2,
+                         self.auditor.get_audits()['switches']['s_start'])
+
+    def test_snapshot_timer(self):
+        save_all = self.auditor.data_manager.save_all
+
+        # nothing changed, so nothing is written
+        self.advance_time_and_run(301)
+        self.assertFalse(save_all.called)
+
+        self._hit('s_start')
+        self.advance_time_and_run(301)
+        self.assertEqual(1, save_all.call_count)
+        self.assertEqual(self.auditor.get_audits(),
+                         save_all.call_args[1]['data'])
+
+    def test_game_buckets(self):
+        self.auditor.config['bucket_period'] = 'game'
+        self.auditor.config['bucket_count'] = 2
+        self.auditor._setup_buckets()
+
+        for hits in range(1, 5):
+            self.auditor.enable()
+            for _ in range(hits):
+                self._hit('s_start')
+            self.auditor.disable()
+
+        buckets = self.auditor.get_audits()['buckets']
+
+        # only the last two buckets plus the current one are kept
+        self.assertEqual(3, len(buckets))
+        self.assertEqual([2, 3, 4],
+                         [bucket['switches']['s_start'] for bucket in buckets])
+        self.assertTrue(all(bucket['period'] == 'game' for bucket in buckets))
@@ -0,0 +1,66 @@
+import unittest
+
+from mpf.system.bcp import encode_dmd_delta, apply_dmd_delta
+
+
+class TestBcpDmdDelta(unittest.TestCase):
+
+    def setUp(self):
+        self.width = 16
+        self.height = 4
+        self.frame1 = ''.join(chr(i % 16) for i in range(self.width *
+                                                          self.height))
+
+    def _change(self, frame, changes):
+        frame = bytearray(frame)
+        for offset, value in changes:
+            frame[offset] = value
+        return str(frame)
+
+    def test_identical_frames(self):
+        self.assertEqual('', encode_dmd_delta(self.frame1, self.frame1,
+                                              self.width))
+        self.assertEqual('', encode_dmd_delta(self.frame1, self.frame1,
+                                              self.width, runs=True))
+
+    def test_row_delta(self):
+        frame2 = self._change(self.frame1, [(20, 15), (50, 15)])
+        delta = encode_dmd_delta(self.frame1, frame2, self.width)
+
+        # two rows changed, each sent as a full row with an 8-byte header
+        self.assertEqual(2 * (8 + self.width), len(delta))
+
+        frame = bytearray(self.frame1)
+        apply_dmd_delta(frame, delta)
+        self.assertEqual(frame2, str(frame))
+
+    def test_adjacent_rows_are_merged(self):
+        frame2 = self._change(self.frame1, [(20, 15), (40, 15)])
+        delta = encode_dmd_delta(self.frame1, frame2, self.width)
+
+        self.assertEqual(8 + 2 * self.width, len(delta))
+
+        frame = bytearray(self.frame1)
+        apply_dmd_delta(frame, delta)
+        self.assertEqual(frame2, str(frame))
+
+    def test_run_delta(self):
+        frame2 = self._change(self.frame1, [(20, 15), (22, 15), (50, 15)])
+        delta = encode_dmd_delta(self.frame1, frame2, self.width, runs=True)
+
+        # 20-22 is one run, 50 is another
+        self.assertEqual(8 + 3 + 8 + 1, len(delta))
+
+        frame = bytearray(self.frame1)
+        apply_dmd_delta(frame, delta)
+        self.assertEqual(frame2, str(frame))
+
+    def test_full_change(self):
+        frame2 = ''.join(chr(15 - ord(c)) for c in self.frame1)
+
+        for runs in (False, True):
+            delta = encode_dmd_delta(self.frame1, frame2, self.width,
+                                     runs=runs)
+            frame = bytearray(self.frame1)
+            apply_dmd_delta(frame, delta)
+            self.assertEqual(frame2, str(frame))
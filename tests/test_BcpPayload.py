@@ -0,0 +1,77 @@
+from Queue import Queue
+
+from mock import patch
+
+from MpfTestCase import MpfTestCase
+
+from mpf.system.bcp import BCPClientSocket, encode_command_string
+from mpf.system.utility_functions import Util
+
+
+class TestBcpPayload(MpfTestCase):
+
+    def getConfigFile(self):
+        return 'test_bcp.yaml'
+
+    def getMachinePath(self):
+        return '../tests/machine_files/bcp/'
+
+    def setUp(self):
+        super(TestBcpPayload, self).setUp()
+
+        # a client socket that isn't connected to anything
+        with patch.object(BCPClientSocket, 'setup_client_socket'):
+            self.client = BCPClientSocket(
+                self.machine, 'local_display',
+                self.machine.config['bcp']['connections']['local_display'],
+                Queue())
+
+        # catch the decoded frames instead of passing them to the light
+        # controller
+        self.frames = list()
+        self.client.bcp_commands['external_show_frame'] = (
+            lambda **kwargs: self.frames.append(kwargs))
+
+    def test_encode_payload(self):
+        payload = '\x00\n\xff'
+        bcp_string = encode_command_string('external_show_frame',
+                                           payload=payload, name='show1')
+
+        message, rest = bcp_string.split('\n', 1)
+        self.assertIn('payload_bytes=3', message)
+        self.assertIn('name=show1', message)
+        self.assertEqual(payload, rest)
+
+    def test_receive_payload(self):
+        payload = '\x01\x02\n\x03\x04\x05\x06'
+        bcp_string = encode_command_string('external_show_frame',
+                                           payload=payload, name='show1')
+
+        message, socket_bytes = (bcp_string + '\nswitch?name=s1').split('\n',
+                                                                       1)
+        socket_bytes = self.client.process_received_message(message,
+                                                            socket_bytes)
+
+        self.assertEqual('switch?name=s1', socket_bytes)
+        self.assertEqual([dict(name='show1', payload=payload)], self.frames)
+
+    def test_receive_partial_payload(self):
+        payload = '\x01\x02\x03\x04\x05\x06'
+        bcp_string = encode_command_string('external_show_frame',
+                                           payload=payload, name='show1')
+        message, socket_bytes = bcp_string.split('\n', 1)
+
+        # only part of the payload has arrived so far
+        incoming = [socket_bytes[4:] + '\n']
+        self.client.get_from_socket = lambda: incoming.pop(0)
+        socket_bytes = self.client.process_received_message(message,
+                                                            socket_bytes[:4])
+
+        self.assertEqual('', socket_bytes)
+        self.assertEqual(payload, self.frames[0]['payload'])
+
+    def test_bytes_to_list_of_lists(self):
+        self.assertEqual([[255, 255, 0], [0, 0, 255]],
+                         Util.bytes_to_list_of_lists('\xff\xff\x00\x00\x00\xff'))
+        self.assertEqual([[1, 2, 3], [4]],
+                         Util.bytes_to_list_of_lists('\x01\x02\x03\x04'))
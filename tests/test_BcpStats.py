@@ -0,0 +1,93 @@
+import time
+from Queue import Queue
+
+from mock import MagicMock, patch
+
+from MpfTestCase import MpfTestCase
+
+from mpf.system.bcp import (BCPClientSocket, RTT_HISTOGRAM_BUCKETS,
+                            decode_command_string)
+
+
+class TestBcpStats(MpfTestCase):
+
+    def getConfigFile(self):
+        return 'test_bcp.yaml'
+
+    def getMachinePath(self):
+        return '../tests/machine_files/bcp/'
+
+    def setUp(self):
+        super(TestBcpStats, self).setUp()
+
+        # a client socket that isn't connected to anything
+        with patch.object(BCPClientSocket, 'setup_client_socket'):
+            self.client = BCPClientSocket(
+                self.machine, 'local_display',
+                self.machine.config['bcp']['connections']['local_display'],
+                Queue())
+
+        self.client.socket = MagicMock()
+        self.client.ping_enabled = True
+
+    def test_ping_and_pong(self):
+        self.client.send_ping()
+
+        cmd, kwargs = decode_command_string(
+            self.client.sending_queue.get(False))
+        self.assertEqual('ping', cmd)
+
+        self.client.receive_pong(timestamp=kwargs['timestamp'],
+                                 receive_queue='3', send_queue='4')
+
+        self.assertEqual(3, self.client.remote_receive_queue)
+        self.assertEqual(4, self.client.remote_send_queue)
+        self.assertGreaterEqual(self.client.rtt_last, 0)
+
+        stats = self.client.get_stats()
+        self.assertEqual(1, stats['pings'])
+        self.assertEqual(1, stats['pongs'])
+        self.assertEqual(self.client.rtt_last, stats['rtt_avg'])
+
+    def test_invalid_pong(self):
+        self.client.receive_pong(timestamp='abc')
+        self.assertEqual(0, self.client.stats['pongs'])
+
+    def test_histogram(self):
+        now = time.time()
+
+        # round trips of about 0.5, 3, 40 & 2000ms
+        for rtt in (.0005, .003, .04, 2):
+            self.client.receive_pong(timestamp=repr(now - rtt))
+
+        histogram = self.client.get_stats()['rtt_histogram']
+
+        self.assertEqual(RTT_HISTOGRAM_BUCKETS + (None, ),
+                         tuple(bucket for bucket, _ in histogram))
+        self.assertEqual(dict(((1, 1), (5, 1), (50, 1), (None, 1))),
+                         dict((bucket, count) for bucket, count in histogram
+                              if count))
+
+    def test_reset(self):
+        self.client.send_ping()
+        self.client.receive_pong(timestamp=repr(time.time()))
+        stats = self.client.get_stats()
+        self.assertEqual(1, stats['pings'])
+
+        # get_stats() starts a new sampling period, but the last round trip
+        # and the remote queue depths are kept
+        stats = self.client.get_stats()
+        self.assertEqual(0, stats['pings'])
+        self.assertEqual(0, stats['pongs'])
+        self.assertEqual(0, stats['rtt_max'])
+        self.assertEqual(0, sum(count for _, count in stats['rtt_histogram']))
+
+    def test_sample_stats_machine_vars(self):
+        self.client.config['stats_machine_vars'] = True
+
+        self.client.sample_stats()
+
+        self.assertEqual(0.0, self.machine.get_machine_var(
+            'bcp_local_display_rtt_avg'))
+        self.assertEqual(9, len([name for name in self.machine.machine_vars
+                                 if name.startswith('bcp_local_display_')]))
@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from mpf.system.config_cache import ConfigCache
+
+
+class TestConfigCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.path, 'cache', 'config.cache')
+        self.config_file = os.path.join(self.path, 'config.yaml')
+        self._write(self.config_file, 'switches: {}\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _write(self, filename, data, mtime=1000):
+        with open(filename, 'w') as f:
+            f.write(data)
+        os.utime(filename, (mtime, mtime))
+
+    def _create_cache(self, key='key1'):
+        cache = ConfigCache(self.cache_file, key=key)
+        cache.add('machine', dict(switches=dict(s1=1)), [self.config_file])
+        cache.save()
+
+    def test_cache_hit(self):
+        self._create_cache()
+
+        cache = ConfigCache(self.cache_file, key='key1')
+        config = cache.get('machine')
+        self.assertEqual(dict(switches=dict(s1=1)), config)
+        self.assertFalse(cache.dirty)
+
+        # each get returns a new copy
+        config['switches']['s2'] = 2
+        self.assertEqual(dict(switches=dict(s1=1)), cache.get('machine'))
+
+    def test_changed_file(self):
+        self._create_cache()
+        self._write(self.config_file, 'switches: {s1: {}}\n', mtime=2000)
+
+        cache = ConfigCache(self.cache_file, key='key1')
+        self.assertIsNone(cache.get('machine'))
+        self.assertTrue(cache.dirty)
+
+    def test_touched_file(self):
+        self._create_cache()
+        self._write(self.config_file, 'switches: {}\n', mtime=2000)
+
+        cache = ConfigCache(self.cache_file, key='key1')
+        self.assertEqual(dict(switches=dict(s1=1)), cache.get('machine'))
+
+    def test_new_file(self):
+        new_file = os.path.join(self.path, 'new.yaml')
+        cache = ConfigCache(self.cache_file)
+        cache.add('mode.attract', dict(), [new_file])
+        cache.save()
+
+        self._write(new_file, 'mode: {}\n')
+
+        cache = ConfigCache(self.cache_file)
+        self.assertIsNone(cache.get('mode.attract'))
+
+    def test_key_and_rebuild(self):
+        self._create_cache()
+
+        self.assertIsNone(ConfigCache(self.cache_file,
+                                      key='key2').get('machine'))
+        self.assertIsNone(ConfigCache(self.cache_file, key='key1',
+                                      rebuild=True).get('machine'))
+
+    def test_corrupt_cache(self):
+        os.makedirs(os.path.dirname(self.cache_file))
+        self._write(self.cache_file, 'not a pickle')
+
+        cache = ConfigCache(self.cache_file, key='key1')
+        self.assertIsNone(cache.get('machine'))
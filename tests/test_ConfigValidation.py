@@ -0,0 +1,74 @@
+import unittest
+
+from mock import MagicMock
+
+from mpf.system.config import Config
+from mpf.system.timing import Timing
+
+
+class TestConfigValidation(unittest.TestCase):
+
+    def setUp(self):
+        Timing.ms_per_tick = 1000 / 30.0
+
+        self.machine = MagicMock()
+        self.machine.switches = dict(s1='switch1', s2='switch2')
+        self.machine.config = dict(
+            mpf=dict(allow_invalid_config_sections=False),
+            config_validator=dict(
+                test=dict(
+                    name='single|str|%',
+                    count='single|int|None',
+                    enabled='single|bool|False',
+                    time='single|ms|0',
+                    tags='list|str|None',
+                    events='dict|str:ms|None',
+                    switch='single|self.machine.switches[%]|None',
+                    switches='set|self.machine.switches[%]|None',
+                    steps=dict(value='single|float|1.0')
+                )))
+
+        self.config = Config(self.machine)
+
+    def test_defaults(self):
+        config = self.config.process_config2('test', dict())
+
+        self.assertEqual('%', config['name'])
+        self.assertIsNone(config['count'])
+        self.assertFalse(config['enabled'])
+        self.assertEqual(0, config['time'])
+        self.assertEqual([], config['tags'])
+        self.assertEqual(dict(), config['events'])
+        self.assertIsNone(config['switch'])
+        self.assertEqual(set(), config['switches'])
+        self.assertEqual([], config['steps'])
+
+    def test_values(self):
+        config = self.config.process_config2('test', dict(
+            name=12, count='5', enabled='off', time='1s', tags='a, b',
+            events=dict(e1=0, e2='2s'), switch='s1', switches='s1 s2',
+            steps=[dict(value='2'), dict()]))
+
+        self.assertEqual('12', config['name'])
+        self.assertEqual(5, config['count'])
+        self.assertIs(False, config['enabled'])
+        self.assertEqual(1000, config['time'])
+        self.assertEqual(['a', 'b'], config['tags'])
+        self.assertEqual(dict(e1=0, e2=2000), config['events'])
+        self.assertEqual('switch1', config['switch'])
+        self.assertEqual(set(['switch1', 'switch2']), config['switches'])
+        self.assertEqual([dict(value=2.0), dict(value=1.0)], config['steps'])
+
+    def test_invalid_device(self):
+        self.config.validation_error = MagicMock()
+        self.config.process_config2('test', dict(switch='s3'), 'dev1')
+
+        self.config.validation_error.assert_called_once_with(
+            's3', (('test', 'dev1'), 'switch'))
+
+    def test_specs_are_compiled_once(self):
+        self.config.process_config2('test', dict())
+        self.config._compile_validator = MagicMock()
+        self.config.process_config2('test', dict(count='2', switch='s2'))
+
+        self.assertFalse(self.config._compile_validator.called)
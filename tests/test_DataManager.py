@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from Queue import Queue
+
+from mock import MagicMock
+
+from mpf.system.data_manager import DataManager
+from mpf.system.file_manager import FileManager
+
+
+class TestDataManager(unittest.TestCase):
+
+    def setUp(self):
+        if not FileManager.file_interfaces:
+            FileManager.init()
+
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def _create(self, filename='data/test.yaml', journal=False,
+                compact_entries=500):
+        machine = MagicMock()
+        machine.machine_path = self.path
+        machine.crash_queue = Queue()
+        machine.config = dict(mpf=dict(
+            paths=dict(test=filename),
+            data_manager=dict(journal=journal,
+                              journal_compact_entries=compact_entries)))
+
+        return DataManager(machine, 'test')
+
+    def _load_file(self, filename):
+        return FileManager.load(os.path.join(self.path, filename))
+
+    def test_save_and_load(self):
+        for filename in ('data/test.yaml', 'data/test.json',
+                         'data/test.pickle'):
+            data_manager = self._create(filename)
+            data_manager.save_key('score', 1000)
+            data_manager.save_key('name', 'abc')
+            data_manager.flush()
+
+            self.assertEqual(dict(score=1000, name='abc'),
+                             self._load_file(filename))
+            self.assertEqual(dict(score=1000, name='abc'),
+                             self._create(filename).get_data())
+            self.assertFalse(os.path.exists(data_manager.temp_filename))
+
+    def test_delayed_saves_are_coalesced(self):
+        data_manager = self._create()
+        data_manager.delay.reset = MagicMock()
+
+        data_manager.save_all(delay_secs=5)
+        data_manager.save_all(delay_secs=10)
+        self.assertEqual(1, data_manager.delay.reset.call_count)
+
+        data_manager.save_all(delay_secs=1)
+        self.assertEqual(2, data_manager.delay.reset.call_count)
+
+        data_manager.data['a'] = 1
+        self.assertFalse(os.path.exists(data_manager.filename))
+
+        # flush writes the pending save right away
+        data_manager.flush()
+        self.assertEqual(dict(a=1), self._load_file('data/test.yaml'))
+        self.assertIsNone(data_manager.write_time)
+
+    def test_remove_key(self):
+        data_manager = self._create()
+        data_manager.save_key('a', 1)
+        data_manager.save_key('b', 2)
+        data_manager.remove_key('a')
+        data_manager.remove_key('missing')
+        data_manager.flush()
+
+        self.assertEqual(dict(b=2), self._load_file('data/test.yaml'))
+
+    def test_journal(self):
+        data_manager = self._create(journal=True)
+        data_manager.save_all(dict(a=1))
+        data_manager.save_key('b', 2)
+        data_manager.save_key('c', 3)
+        data_manager.remove_key('a')
+        data_manager.flush()
+
+        # the data file only has the full save, the rest is in the journal
+        self.assertEqual(dict(a=1), self._load_file('data/test.yaml'))
+        self.assertTrue(os.path.isfile(data_manager.journal_filename))
+
+        data_manager = self._create(journal=True)
+        self.assertEqual(dict(b=2, c=3), data_manager.get_data())
+
+        # loading it compacted the journal into the data file
+        data_manager.flush()
+        self.assertEqual(dict(b=2, c=3), self._load_file('data/test.yaml'))
+        self.assertFalse(os.path.isfile(data_manager.journal_filename))
+
+    def test_journal_compaction(self):
+        data_manager = self._create(journal=True, compact_entries=3)
+        data_manager.save_key('a', 1)
+        data_manager.save_key('b', 2)
+        data_manager.flush()
+        self.assertTrue(os.path.isfile(data_manager.journal_filename))
+
+        data_manager.save_key('c', 3)
+        data_manager.flush()
+        self.assertFalse(os.path.isfile(data_manager.journal_filename))
+        self.assertEqual(dict(a=1, b=2, c=3),
+                         self._load_file('data/test.yaml'))
+
+    def test_incomplete_journal_entry(self):
+        data_manager = self._create(journal=True)
+        data_manager.save_key('a', 1)
+        data_manager.save_key('b', 2)
+        data_manager.flush()
+
+        with open(data_manager.journal_filename, 'rb+') as f:
+            f.truncate(os.path.getsize(data_manager.journal_filename) - 2)
+
+        data_manager = self._create(journal=True)
+        data_manager.flush()
+        self.assertEqual(dict(a=1), data_manager.get_data())
+
+    def test_writer_error(self):
+        data_manager = self._create(journal=True)
+        data_manager._write_journal = MagicMock(side_effect=ValueError)
+
+        data_manager.save_key('score', 1000)
+
+        # the error is reported, and the writer thread keeps going
+        flush_thread = threading.Thread(target=data_manager.flush)
+        flush_thread.daemon = True
+        flush_thread.start()
+        flush_thread.join(5)
+        self.assertFalse(flush_thread.is_alive())
+        self.assertFalse(data_manager.machine.crash_queue.empty())
+
+        del data_manager._write_journal
+        data_manager.save_key('score', 2000)
+        data_manager.flush()
+        self.assertTrue(data_manager.writer_thread.is_alive())
+
+        data_manager = self._create(journal=True)
+        self.assertEqual(dict(score=2000), data_manager.get_data())
+        data_manager.flush()
@@ -0,0 +1,82 @@
+import unittest
+
+from mock import MagicMock
+
+try:
+    import pygame
+    from mpf.media_controller.core.display import DisplayElement
+    from mpf.media_controller.core.slide import Slide, add_dirty_rect
+except ImportError:
+    pygame = None
+
+
+@unittest.skipIf(pygame is None, "Pygame is not installed")
+class TestDirtyRects(unittest.TestCase):
+
+    def setUp(self):
+        self.display = MagicMock()
+        self.display.width = 20
+        self.display.height = 10
+        self.display.depth = 24
+        self.display.palette = None
+        self.display.surface = pygame.Surface((20, 10), depth=24)
+        self.display.slides = list()
+
+        self.slide = Slide(mpfdisplay=self.display, machine=MagicMock())
+        self.display.slides.append(self.slide)
+
+    def _add_element(self, name, x, y, color):
+        element = DisplayElement(self.slide, x, y, 'left', 'top', 0)
+        element.name = name
+        element.element_surface = pygame.Surface((4, 4), depth=24)
+        element.element_surface.fill(color)
+        element.set_position(x, y, 'left', 'top')
+        self.slide.elements.append(element)
+
+        return element
+
+    def test_add_dirty_rect(self):
+        rects = list()
+        add_dirty_rect(rects, pygame.Rect(0, 0, 4, 4))
+        add_dirty_rect(rects, pygame.Rect(10, 0, 4, 4))
+        self.assertEqual(2, len(rects))
+
+        # overlaps both
+        add_dirty_rect(rects, pygame.Rect(2, 0, 10, 2))
+        self.assertEqual([pygame.Rect(0, 0, 14, 4)], rects)
+
+    def test_only_changes_are_dirty(self):
+        element = self._add_element('box', 2, 3, (255, 0, 0))
+
+        self.slide.update()
+        self.assertEqual([pygame.Rect(2, 3, 4, 4)], self.slide.dirty_rects)
+        self.assertEqual((255, 0, 0, 255), self.slide.surface.get_at((3, 4)))
+
+        # nothing changed
+        self.slide.dirty_rects = list()
+        self.slide.update()
+        self.assertEqual([], self.slide.dirty_rects)
+
+        # moving it changes the old and the new area
+        element.set_position(5, 3, 'left', 'top')
+        element.dirty = True
+        self.slide.update()
+
+        self.assertEqual([pygame.Rect(2, 3, 7, 4)], self.slide.dirty_rects)
+        self.assertEqual((0, 0, 0, 255), self.slide.surface.get_at((3, 4)))
+        self.assertEqual((255, 0, 0, 255), self.slide.surface.get_at((6, 4)))
+
+    def test_layers_are_composited_again(self):
+        self._add_element('bottom', 2, 3, (255, 0, 0))
+        top = self._add_element('top', 4, 3, (0, 255, 0))
+        self.slide.update()
+
+        # the part of the bottom element under the top one shows again
+        self.slide.remove_element('top')
+        self.slide.dirty_rects = list()
+        self.slide.update()
+
+        self.assertEqual([pygame.Rect(4, 3, 4, 4)], self.slide.dirty_rects)
+        self.assertEqual((255, 0, 0, 255), self.slide.surface.get_at((5, 4)))
+        self.assertEqual((0, 0, 0, 255), self.slide.surface.get_at((7, 4)))
+        self.assertIsNone(top.slide)
@@ -0,0 +1,154 @@
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import unittest
+
+from mock import patch
+
+from PygameTestCase import PygameTestCase
+
+try:
+    import pygame
+    from mpf.media_controller.display_modules import dmd
+except ImportError:
+    pygame = None
+
+
+class TestDmdConversion(PygameTestCase):
+
+    def setUp(self):
+        # black, white, gray, pure green, and a transparent white pixel
+        self.rgba = ('\x00\x00\x00\xff' '\xff\xff\xff\xff' '\x80\x80\x80\xff'
+                     '\x00\xff\x00\xff' '\xff\xff\xff\x00')
+
+    def test_shades(self):
+        shades = dmd.rgba_to_shades(self.rgba)
+        self.assertEqual([0, 15, 8, 9, 15], [ord(x) for x in shades])
+
+        shades = dmd.rgba_to_shades(self.rgba, alpha_value=3)
+        self.assertEqual(3, ord(shades[4]))
+
+    @unittest.skipIf(pygame and dmd.numpy is None, "NumPy is not installed")
+    def test_numpy_matches_lookup_table(self):
+        rgba = os.urandom(64 * 4) + self.rgba
+
+        for alpha_value in (None, 3):
+            self.assertEqual(
+                dmd.rgba_to_shades(rgba, alpha_value=alpha_value),
+                dmd.rgba_to_shades_numpy(rgba, alpha_value=alpha_value))
+
+    def test_cached_file(self):
+        temp_path = tempfile.mkdtemp()
+
+        try:
+            image_file = os.path.join(temp_path, 'image.png')
+            with open(image_file, 'wb') as f:
+                f.write('not really a png')
+
+            surface = pygame.image.fromstring(self.rgba, (5, 1), 'RGBA')
+            dmd_surface = dmd.surface_to_dmd(surface, alpha_color=0)
+
+            cache_file = dmd.get_converted_file_name(image_file, temp_path,
+                                                     alpha_color=0)
+            self.assertNotEqual(cache_file, dmd.get_converted_file_name(
+                image_file, temp_path, alpha_color=None))
+
+            dmd.save_dmd_file(cache_file, [dmd_surface])
+            loaded = dmd.load_dmd_file(cache_file, dmd.dmd_palette)
+
+            self.assertEqual(1, len(loaded))
+            self.assertEqual((5, 1), loaded[0].get_size())
+            self.assertEqual(pygame.image.tostring(dmd_surface, 'P'),
+                             pygame.image.tostring(loaded[0], 'P'))
+        finally:
+            shutil.rmtree(temp_path)
+
+    def test_save_from_several_threads(self):
+        temp_path = tempfile.mkdtemp()
+
+        try:
+            dmd_surface = pygame.Surface((128, 32), depth=8)
+            file_name = os.path.join(temp_path, 'same_content.dmd')
+            errors = list()
+
+            def save():
+                try:
+                    dmd.save_dmd_file(file_name, [dmd_surface] * 200)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=save) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual([], errors)
+            self.assertEqual(['same_content.dmd'], os.listdir(temp_path))
+            self.assertEqual(200, len(dmd.load_dmd_file(file_name)))
+        finally:
+            shutil.rmtree(temp_path)
+
+
+class TestDmdFrames(PygameTestCase):
+
+    def setUp(self):
+        self.temp_path = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.temp_path, 'animation.dmd')
+
+        # 20 frames of 4x2 pixels, each filled with its frame number
+        with open(self.file_name, 'wb') as f:
+            f.write(struct.pack('IIII', dmd.DMD_FILE_HEADER, 20, 4, 2))
+
+            for frame in range(20):
+                f.write(chr(frame) * 8)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_path)
+
+    def test_frames(self):
+        frames = dmd.map_dmd_file(self.file_name, dmd.dmd_palette,
+                                  cache_size=4)
+
+        self.assertEqual(20, len(frames))
+        self.assertEqual((4, 2), frames[0].get_size())
+        self.assertEqual(chr(7) * 8, pygame.image.tostring(frames[7], 'P'))
+        self.assertEqual(chr(19) * 8, pygame.image.tostring(frames[-1], 'P'))
+        self.assertRaises(IndexError, frames.__getitem__, 20)
+
+        self.assertEqual(load_all(self.file_name),
+                         [pygame.image.tostring(x, 'P') for x in frames])
+
+    def test_truncated_file(self):
+        with open(self.file_name, 'r+b') as f:
+            f.truncate(16 + 8 * 10 + 3)
+
+        with patch('logging.Logger.warning') as warning:
+            frames = dmd.map_dmd_file(self.file_name, dmd.dmd_palette)
+
+        self.assertTrue(warning.called)
+        self.assertEqual(10, len(frames))
+        frames.close()
+
+    def test_cache(self):
+        frames = dmd.map_dmd_file(self.file_name, cache_size=4)
+
+        for frame in range(6):
+            frames[frame]
+
+        # frames 2 to 5 are still cached
+        self.assertIs(frames[5], frames[5])
+        frames[2]
+        frames[0]
+
+        self.assertEqual(4, len(frames.cache))
+        self.assertEqual(3, frames.hits)
+        self.assertEqual(7, frames.misses)
+        self.assertEqual(4 * 8, frames.get_memory_size())
+
+
+def load_all(file_name):
+    return [pygame.image.tostring(x, 'P')
+            for x in dmd.load_dmd_file(file_name, dmd.dmd_palette)]
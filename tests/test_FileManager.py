@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+
+from mpf.system.file_manager import FileManager
+
+
+class TestFileManager(unittest.TestCase):
+
+    def setUp(self):
+        FileManager.init()
+        self.path = tempfile.mkdtemp()
+        self.files = list()
+
+        for i in range(6):
+            self.files.append(self._write('file{}.yaml'.format(i),
+                                          'Section{0}:\n    Key: {0}\n'.
+                                          format(i)))
+
+        self.min_parallel_files = FileManager.min_parallel_files
+        self.processes = FileManager.processes
+        FileManager.processes = 2
+        FileManager.min_parallel_files = 2
+
+    def tearDown(self):
+        FileManager.min_parallel_files = self.min_parallel_files
+        FileManager.processes = self.processes
+        FileManager.preloaded.clear()
+        shutil.rmtree(self.path)
+
+    def _write(self, filename, data):
+        filename = os.path.join(self.path, filename)
+        with open(filename, 'w') as f:
+            f.write(data)
+        return filename
+
+    def test_load_many(self):
+        bad_file = self._write('bad.yaml', 'key: [unclosed\n')
+        configs = FileManager.load_many(self.files + [bad_file])
+
+        self.assertEqual(7, len(configs))
+        for i, filename in enumerate(self.files):
+            self.assertEqual(dict(section0=dict(key=0)) if i == 0 else
+                             {'section{}'.format(i): dict(key=i)},
+                             configs[filename])
+
+        # failed in the worker, then loaded (and failed) again in here
+        self.assertEqual(dict(), configs[bad_file])
+
+    def test_load_many_serial(self):
+        FileManager.processes = 1
+        configs = FileManager.load_many(self.files)
+        self.assertEqual(dict(section5=dict(key=5)), configs[self.files[5]])
+
+    def test_preload(self):
+        FileManager.preload(self.files)
+        self.assertEqual(6, len(FileManager.preloaded))
+
+        self.assertEqual(dict(section3=dict(key=3)),
+                         FileManager.load(self.files[3]))
+
+        # preloaded entries are only used once
+        self.assertEqual(5, len(FileManager.preloaded))
+        self.assertEqual(dict(section3=dict(key=3)),
+                         FileManager.load(self.files[3]))
+
+    def test_python_tags(self):
+        data_file = os.path.join(self.path, 'data.yaml')
+        FileManager.save(data_file, OrderedDict([('Score', 100)]))
+
+        self.assertEqual(OrderedDict([('score', 100)]),
+                         FileManager.load(data_file))
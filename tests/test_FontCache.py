@@ -0,0 +1,68 @@
+from mock import MagicMock
+
+from PygameTestCase import PygameTestCase
+
+try:
+    import pygame
+    from mpf.media_controller.core.font_manager import FontManager
+except ImportError:
+    pygame = None
+
+
+class TestFontCache(PygameTestCase):
+
+    def setUp(self):
+        pygame.font.init()
+
+        machine = MagicMock()
+        machine.config = dict(media_controller=dict(text_render_cache='1MB'))
+
+        self.fonts = FontManager(machine, dict(
+            default=dict(file=None, size=16, crop_top=1, crop_bottom=1)))
+
+    def test_cache_hit(self):
+        surface = self.fonts.render('100', color=(255, 255, 255))
+        self.assertIs(surface, self.fonts.render('100', color=[255, 255, 255]))
+
+        self.assertIsNot(surface, self.fonts.render('100', color=(255, 0, 0)))
+
+        stats = self.fonts.get_render_stats()
+        self.assertEqual(2, stats['entries'])
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(2, stats['misses'])
+
+    def test_eviction(self):
+        surface = self.fonts.render('1', color=(255, 255, 255))
+        size = self.fonts.render_cache_bytes
+        self.fonts.render_cache_max = size * 2
+
+        self.fonts.render('2', color=(255, 255, 255))
+        self.fonts.render('1', color=(255, 255, 255))
+        self.fonts.render('3', color=(255, 255, 255))
+
+        # 2 was the least recently used one
+        self.assertEqual(1, self.fonts.evictions)
+        self.assertIs(surface, self.fonts.render('1', color=(255, 255, 255)))
+        self.assertNotIn(('2', 'default', None, (255, 255, 255), None, False,
+                          False),
+                         self.fonts.render_cache)
+
+    def test_glyph_atlas(self):
+        surface = self.fonts.render('1,000', color=(255, 255, 255),
+                                    bg_color=(0, 0, 0), glyph_atlas=True)
+
+        glyph_widths = sum(self.fonts.render(char, color=(255, 255, 255),
+                                             bg_color=(0, 0, 0)).get_width()
+                           for char in '1,000')
+        self.assertEqual(glyph_widths, surface.get_width())
+        self.assertEqual(self.fonts.render('1', color=(255, 255, 255),
+                                           bg_color=(0, 0, 0)).get_height(),
+                         surface.get_height())
+
+    def test_glyph_atlas_fallback(self):
+        # letters aren't in the atlas
+        surface = self.fonts.render('Score', color=(255, 255, 255),
+                                    bg_color=(0, 0, 0), glyph_atlas=True)
+        self.assertEqual(surface.get_width(), self.fonts.render(
+            'Score', color=(255, 255, 255), bg_color=(1, 1, 1)).get_width())
+        self.assertEqual(dict(), self.fonts.glyph_atlases)
@@ -0,0 +1,76 @@
+import threading
+import unittest
+
+from mock import MagicMock
+
+try:
+    import pygame
+    from mpf.media_controller.core.frame_renderer import FrameRenderer
+except ImportError:
+    pygame = None
+
+
+@unittest.skipIf(pygame is None, "Pygame is not installed")
+class TestFrameRenderer(unittest.TestCase):
+
+    def setUp(self):
+        self.display = MagicMock()
+        self.display.name = 'dmd'
+        self.display.config = dict(fps=30)
+        self.display.machine.render_lock = threading.RLock()
+        self.display.current_slide.surface = pygame.Surface((10, 10),
+                                                            depth=24)
+        self.dirty_rects = list()
+        self.display.get_dirty_rects = self._get_dirty_rects
+
+        self.renderer = FrameRenderer(self.display)
+
+    def _get_dirty_rects(self):
+        rects = self.dirty_rects
+        self.dirty_rects = list()
+        return rects
+
+    def _draw(self, x, y, color):
+        self.display.current_slide.surface.set_at((x, y), color)
+        self.dirty_rects.append(pygame.Rect(x, y, 1, 1))
+
+    def test_double_buffering(self):
+        self._draw(1, 1, (255, 0, 0))
+        self.renderer.render_frame()
+
+        surface, rects = self.renderer.get_frame()
+        self.assertEqual([pygame.Rect(1, 1, 1, 1)], rects)
+        self.assertEqual((255, 0, 0, 255), surface.get_at((1, 1)))
+
+        # the next frame goes into the other buffer, which has to catch up
+        # with the first one
+        self._draw(5, 5, (0, 255, 0))
+        self.renderer.render_frame()
+        self.assertEqual((255, 0, 0, 255), surface.get_at((1, 1)))
+        self.assertEqual((0, 0, 0, 255), surface.get_at((5, 5)))
+
+        second_surface, rects = self.renderer.get_frame()
+        self.assertIsNot(surface, second_surface)
+        self.assertEqual([pygame.Rect(5, 5, 1, 1)], rects)
+        self.assertEqual((255, 0, 0, 255), second_surface.get_at((1, 1)))
+        self.assertEqual((0, 255, 0, 255), second_surface.get_at((5, 5)))
+
+        # nothing new
+        self.assertEqual((second_surface, []), self.renderer.get_frame())
+
+    def test_dropped_frame(self):
+        self._draw(1, 1, (255, 0, 0))
+        self.renderer.render_frame()
+
+        # the first frame wasn't taken, so this one is dropped
+        self._draw(5, 5, (0, 255, 0))
+        self.renderer.render_frame()
+        self.assertEqual(1, self.renderer.stats['dropped'])
+
+        self.renderer.get_frame()
+        self.renderer.render_frame()
+
+        surface, rects = self.renderer.get_frame()
+        self.assertEqual([pygame.Rect(5, 5, 1, 1)], rects)
+        self.assertEqual((0, 255, 0, 255), surface.get_at((5, 5)))
+        self.assertEqual((255, 0, 0, 255), surface.get_at((1, 1)))
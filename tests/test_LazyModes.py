@@ -0,0 +1,63 @@
+from MpfTestCase import MpfTestCase
+
+from mpf.system.mode import Mode
+from mpf.system.mode_controller import ModeStub
+
+
+class TestLazyModes(MpfTestCase):
+
+    def getConfigFile(self):
+        return 'test_lazy_modes.yaml'
+
+    def getMachinePath(self):
+        return '../tests/machine_files/mode_tests/'
+
+    def _get_mode(self, name):
+        for mode in self.machine.modes:
+            if mode.name == name:
+                return mode
+
+    def test_stubs(self):
+        self.assertIsInstance(self._get_mode('mode1'), ModeStub)
+        self.assertIsInstance(self._get_mode('mode2'), Mode)
+        self.assertIsInstance(self._get_mode('mode3'), ModeStub)
+
+    def test_load_on_start(self):
+        stub = self._get_mode('mode1')
+
+        self.machine.events.post('start_mode1')
+        self.machine_run()
+
+        mode1 = self._get_mode('mode1')
+        self.assertIsInstance(mode1, Mode)
+        self.assertIs(mode1, stub.mode)
+        self.assertTrue(self.machine.mode_controller.is_active('mode1'))
+        self.assertEqual(200, mode1.priority)
+
+        # the stub's handler is gone, the mode's own handlers are used now
+        self.machine.events.post('stop_mode1')
+        self.machine_run()
+        self.assertFalse(self.machine.mode_controller.is_active('mode1'))
+
+        self.machine.events.post('start_mode1')
+        self.machine_run()
+        self.assertTrue(self.machine.mode_controller.is_active('mode1'))
+        self.assertIs(mode1, self._get_mode('mode1'))
+
+    def test_warm_up(self):
+        stubs = [mode for mode in self.machine.modes
+                 if isinstance(mode, ModeStub)]
+
+        # one mode is loaded every 10 minutes, starting 10 minutes after
+        # reset_complete. That was posted during setUp, so the first one is
+        # loaded within the next 10 minutes.
+        self.advance_time_and_run(610)
+        self.assertEqual(len(stubs) - 1,
+                         len([mode for mode in self.machine.modes
+                              if isinstance(mode, ModeStub)]))
+
+        self.advance_time_and_run(len(stubs) * 600)
+        for mode in self.machine.modes:
+            self.assertIsInstance(mode, Mode)
+
+        self.assertFalse(self.machine.mode_controller.is_active('mode3'))
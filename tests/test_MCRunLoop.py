@@ -0,0 +1,89 @@
+import threading
+import time
+import unittest
+import Queue
+
+from mock import MagicMock, patch
+
+try:
+    import pygame
+    from mpf.media_controller.core.media_controller import MediaController
+except ImportError:
+    pygame = None
+
+
+@unittest.skipIf(pygame is None, "Pygame is not installed")
+class TestMCRunLoop(unittest.TestCase):
+
+    def _create_mc(self):
+        # a media controller without any config or BCP server
+        mc = MediaController.__new__(MediaController)
+        mc.log = MagicMock()
+        mc.done = False
+        mc.pygame = False
+        mc.receive_queue = Queue.Queue()
+        mc._wakeup_processed = threading.Event()
+        mc.render_lock = threading.RLock()
+        mc.display = MagicMock()
+        mc.display.displays = dict()
+        mc._reset_loop_stats()
+        mc.calls = list()
+
+        def timer_tick():
+            mc.calls.append('tick')
+
+            if mc.calls.count('tick') == 3:
+                mc.done = True
+
+        mc.timer_tick = timer_tick
+        mc._process_command = lambda cmd, **kwargs: mc.calls.append(
+            kwargs['name'])
+
+        return mc
+
+    def test_ticks_without_bcp_commands(self):
+        mc = self._create_mc()
+
+        start_time = time.time()
+        mc.run()
+
+        # woken up for each tick rather than polling
+        self.assertEqual(['tick'] * 3, mc.calls)
+        self.assertLess(time.time() - start_time, 1)
+        self.assertEqual(3, mc.loop_stats['ticks'])
+
+    def test_due_tick_runs_before_bcp_commands(self):
+        mc = self._create_mc()
+
+        for name in ('a', 'b'):
+            mc.receive_queue.put('trigger?name=' + name)
+
+        mc.run()
+
+        self.assertEqual(['tick', 'a', 'b'], mc.calls[:3])
+        self.assertEqual(2, mc.loop_stats['bcp_commands'])
+
+    def test_get_from_queue_releases_wakeups(self):
+        mc = self._create_mc()
+
+        mc.receive_queue.put(None)
+        mc.receive_queue.put('trigger?name=a')
+        mc.get_from_queue()
+
+        self.assertEqual(['a'], mc.calls)
+        self.assertTrue(mc._wakeup_processed.is_set())
+
+    def test_shutdown_stops_renderers(self):
+        mc = self._create_mc()
+        mc.pygame = True
+        renderer = MagicMock()
+        renderer.join.side_effect = lambda: mc.calls.append('join')
+        mc.display.displays = dict(dmd=MagicMock(renderer=renderer),
+                                   window=MagicMock(renderer=None))
+
+        with patch.object(pygame, 'quit',
+                          side_effect=lambda: mc.calls.append('quit')):
+            mc._do_shutdown()
+
+        self.assertTrue(renderer.stop.called)
+        self.assertEqual(['join', 'quit'], mc.calls)
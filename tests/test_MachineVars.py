@@ -0,0 +1,65 @@
+from mock import MagicMock
+
+from MpfTestCase import MpfTestCase
+
+
+class TestMachineVars(MpfTestCase):
+
+    def getConfigFile(self):
+        return 'test_event_manager.yaml'
+
+    def getMachinePath(self):
+        return '../tests/machine_files/event_manager/'
+
+    def setUp(self):
+        super(TestMachineVars, self).setUp()
+        self.machine.machine_var_data_manager.save_keys = MagicMock()
+
+    def test_saves_are_batched(self):
+        save_keys = self.machine.machine_var_data_manager.save_keys
+
+        self.machine.create_machine_var('credits', 1, persist=True)
+        self.machine.set_machine_var('credits', 2)
+        self.machine.set_machine_var('credits', 3)
+        self.machine.create_machine_var('temp', 1)
+        self.assertFalse(save_keys.called)
+
+        self.advance_time_and_run(1)
+        self.assertEqual(1, save_keys.call_count)
+        data, removed_keys = save_keys.call_args[0]
+        self.assertEqual(['credits'], data.keys())
+        self.assertEqual(3, data['credits']['value'])
+        self.assertEqual([], removed_keys)
+
+        # nothing changed, so nothing else is written
+        self.advance_time_and_run(10)
+        self.assertEqual(1, save_keys.call_count)
+
+    def test_save_on_ball_ended(self):
+        save_keys = self.machine.machine_var_data_manager.save_keys
+
+        self.machine.create_machine_var('credits', 1, persist=True)
+        self.machine.events.post('ball_ended')
+        self.machine.events._process_event_queue()
+
+        self.assertEqual(1, save_keys.call_count)
+
+    def test_remove(self):
+        save_keys = self.machine.machine_var_data_manager.save_keys
+        self.machine.machine_var_data_manager.data['credits'] = dict(value=2)
+
+        self.machine.create_machine_var('credits', 1, persist=True)
+        self.machine.remove_machine_var('credits')
+        self.machine.remove_machine_var('not_on_disk')
+        self.advance_time_and_run(1)
+
+        save_keys.assert_called_once_with(dict(), ['credits'])
+
+    def test_expire(self):
+        self.machine.create_machine_var('credits', 5, persist=True,
+                                        expire_secs=120)
+        self.advance_time_and_run(60)
+        self.assertEqual(5, self.machine.get_machine_var('credits'))
+
+        self.advance_time_and_run(120)
+        self.assertEqual(0, self.machine.get_machine_var('credits'))
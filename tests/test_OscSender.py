@@ -0,0 +1,163 @@
+import logging
+import unittest
+from Queue import Queue
+
+from mock import MagicMock, patch
+
+from mpf.plugins import osc
+
+
+class FakeOSCClientError(Exception):
+    pass
+
+
+class FakeOSCMessage(object):
+
+    def __init__(self, address):
+        self.address = address
+        self.data = list()
+
+    def append(self, data):
+        self.data.append(data)
+
+
+class FakeOSCBundle(object):
+
+    def __init__(self):
+        self.messages = list()
+
+    def append(self, message):
+        self.messages.append(message)
+
+
+class FakeOSCModule(object):
+    OSCMessage = FakeOSCMessage
+    OSCBundle = FakeOSCBundle
+    OSCClientError = FakeOSCClientError
+    OSCClient = MagicMock
+
+
+class TestOscSender(unittest.TestCase):
+
+    def setUp(self):
+        # PyOSC might not be installed, so the tests use stand-in classes
+        patcher = patch.object(osc, 'OSCmodule', FakeOSCModule, create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.address = ('127.0.0.1', 5000)
+        self.client = MagicMock()
+
+        self.osc = osc.OSC.__new__(osc.OSC)
+        self.osc.log = logging.getLogger('osc')
+        self.osc.machine = MagicMock()
+        self.osc.config = dict(max_bundle_messages=3, debug_messages=False)
+        self.osc.sending_queue = Queue()
+        self.osc.OSC_clients = {self.address: self.client}
+        self.osc.client_last_sent = {self.address: dict()}
+        self.osc.client_mode = 'name'
+
+    def _sent(self):
+        # returns a list of lists of (path, data) tuples, one per send() call
+        sent = list()
+        for call in self.client.send.call_args_list:
+            message = call[0][0]
+            if isinstance(message, FakeOSCBundle):
+                sent.append([(m.address, m.data[0])
+                             for m in message.messages])
+            else:
+                sent.append([(message.address, message.data[0])])
+        return sent
+
+    def _run_sending_loop(self):
+        # the loop blocks on an empty queue, so stop it with a method that
+        # raises once everything before it has been sent
+        def stop():
+            raise SystemExit
+
+        self.osc.sending_queue.put((stop, ()))
+
+        with self.assertRaises(SystemExit):
+            self.osc.sending_loop()
+
+    def test_single_message(self):
+        self.osc.send_osc_messages([('/sw/s_test', 1)])
+
+        self.assertEqual([[('/sw/s_test', 1)]], self._sent())
+
+    def test_unchanged_data_not_sent(self):
+        self.osc.send_osc_messages([('/sw/s_test', 1)])
+        self.osc.send_osc_messages([('/sw/s_test', 1)])
+        self.osc.send_osc_messages([('/sw/s_test', 0)])
+
+        self.assertEqual([[('/sw/s_test', 1)], [('/sw/s_test', 0)]],
+                         self._sent())
+
+    def test_last_message_per_address_wins(self):
+        self.osc.send_osc_messages([('/sw/s_test', 1), ('/sw/s_test', 0)])
+
+        self.assertEqual([[('/sw/s_test', 0)]], self._sent())
+
+    def test_bundles(self):
+        messages = [('/sw/s_%s' % x, 1) for x in range(7)]
+        self.osc.send_osc_messages(messages)
+
+        # max_bundle_messages is 3, and a single leftover message isn't
+        # wrapped in a bundle
+        self.assertEqual([messages[0:3], messages[3:6], messages[6:7]],
+                         self._sent())
+        self.assertIsInstance(self.client.send.call_args_list[0][0][0],
+                              FakeOSCBundle)
+        self.assertIsInstance(self.client.send.call_args_list[2][0][0],
+                              FakeOSCMessage)
+
+    def test_client_error_removes_client(self):
+        self.client.send.side_effect = FakeOSCClientError
+
+        self.osc.send_osc_messages([('/sw/s_test', 1)])
+
+        self.assertEqual(dict(), self.osc.OSC_clients)
+        self.assertEqual(dict(), self.osc.client_last_sent)
+
+    def test_sending_loop_combines_messages(self):
+        self.osc.client_send_osc_message('sw', 's_test1', 1)
+        self.osc.client_send_osc_message('sw', 's_test2', 1)
+        self.osc.client_send_osc_message('light', 'l_test', 0.5)
+
+        self._run_sending_loop()
+
+        self.assertEqual([[('/sw/s_test1', 1), ('/sw/s_test2', 1),
+                           ('/light/l_test', 0.5)]], self._sent())
+
+    def test_sending_loop_keeps_order_around_other_methods(self):
+        self.osc.client_send_osc_message('sw', 's_test', 1)
+        self.osc.sending_queue.put((self.osc._clear_client_state,
+                                    (self.address, )))
+        self.osc.client_send_osc_message('sw', 's_test', 1)
+
+        self._run_sending_loop()
+
+        # the state was cleared between the two, so both are sent
+        self.assertEqual([[('/sw/s_test', 1)], [('/sw/s_test', 1)]],
+                         self._sent())
+
+    def test_sync_resends_everything(self):
+        switch = MagicMock()
+        switch.name = 's_test'
+        switch.config = dict(number_str='SD1')
+        self.osc.machine.switches = [switch]
+        self.osc.machine.switch_controller.is_active.return_value = True
+        self.osc.found_new_osc_client = MagicMock()
+
+        self.osc.client_update_all()
+        self._run_sending_loop()
+        self.assertEqual([[('/sw/s_test', 1)]], self._sent())
+
+        # a sync from the client should send the switches again even though
+        # they haven't changed
+        for cat, path in (('sync', '/sw/s_test'), ('wpcsync', '/sw/sd1'),
+                          ('refresh', '/sw/sd1')):
+            self.client.send.reset_mock()
+            self.osc.process_message('/' + cat, 'i', [1], self.address)
+            self._run_sending_loop()
+            self.assertEqual([[(path, 1)]], self._sent())
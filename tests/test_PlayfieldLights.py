@@ -0,0 +1,85 @@
+import unittest
+
+from mock import MagicMock
+
+from mpf.system.light_controller import ExternalShow
+
+try:
+    import pygame
+    from mpf.media_controller.display_modules import playfield_lights
+except ImportError:
+    pygame = None
+
+
+class TestExternalShowChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.machine = MagicMock()
+        self.machine.leds = dict(led1='led1', led2='led2', led3='led3')
+        self.machine.lights = dict(light1='light1', light2='light2')
+
+        self.show = ExternalShow(self.machine, 'playfield_lights',
+                                 leds='led1, led2, led3',
+                                 lights='light1, light2')
+
+    def test_changed_leds(self):
+        self.show.update_led_colors([[1, 2, 3]], [1])
+
+        leds, colors = (self.machine.light_controller._add_leds_to_update_list
+                        .call_args[0][:2])
+        self.assertEqual(['led2'], leds)
+        self.assertEqual([[1, 2, 3]], colors)
+
+    def test_changed_lights(self):
+        self.show.update_lights('ff', [1])
+
+        self.machine.light_controller._add_to_light_update_list.\
+            assert_called_once_with('light2', 255, 0, True)
+
+
+@unittest.skipIf(pygame is None, "Pygame is not installed")
+class TestPlayfieldLights(unittest.TestCase):
+
+    def test_parse_coordinates(self):
+        self.assertEqual([('led_01', (1, 2)), ('led_02', (30, 40))],
+                         playfield_lights.parse_coordinates(
+                             'led_01:1,2;led_02:30,40'))
+        self.assertEqual([], playfield_lights.parse_coordinates(''))
+
+    def test_sample_and_diff(self):
+        surface = pygame.Surface((10, 10), depth=24)
+        surface.set_at((2, 3), (255, 0, 0))
+
+        if playfield_lights.numpy:
+            numpy = playfield_lights.numpy
+            coordinates = (numpy.array([2, 5]), numpy.array([3, 5]))
+        else:
+            coordinates = ([2, 5], [3, 5])
+
+        colors = playfield_lights.sample_pixels(surface, coordinates)
+        self.assertEqual([[255, 0, 0], [0, 0, 0]],
+                         [list(color) for color in colors])
+        self.assertEqual([0, 1],
+                         list(playfield_lights.get_changes(None, colors)))
+
+        surface.set_at((5, 5), (0, 0, 9))
+        new_colors = playfield_lights.sample_pixels(surface, coordinates)
+        self.assertEqual([1], list(playfield_lights.get_changes(colors,
+                                                                new_colors)))
+
+    def test_not_the_default_display(self):
+        # display modules are created before the window, so there's no
+        # default display yet
+        machine = MagicMock()
+        machine.config = dict(media_controller=dict(),
+                              playfield_lights=dict(fps=30))
+        machine.display.default_display = None
+        machine.display.displays = dict()
+        machine.display.transitions = dict()
+
+        display = playfield_lights.PlayfieldLights(machine)
+        self.assertIsNone(machine.display.default_display)
+
+        display._initialize()
+        self.assertIs(display, machine.display.displays['playfield_lights'])
+        self.assertIsNone(machine.display.default_display)
@@ -0,0 +1,26 @@
+import unittest
+
+from mpf.media_controller.core import slide
+
+
+class TestSlideAlpha(unittest.TestCase):
+
+    def test_blend(self):
+        # opaque white, transparent white, half white, opaque black
+        source = '\xff\x0f\x7f\xf0'
+        dest = '\x00\x00\x00\x0f'
+
+        self.assertEqual([15, 0, 7, 0],
+                         [ord(x) for x in slide.blend_8bit_alpha(source,
+                                                                 dest)])
+
+    def test_destination_alpha_is_ignored(self):
+        # only the shade of the destination is blended
+        self.assertEqual('\x05', slide.blend_8bit_alpha('\x0f', '\xf5'))
+
+    @unittest.skipIf(slide.numpy is None, "NumPy is not installed")
+    def test_table_matches_array(self):
+        for source in range(256):
+            for dest in range(16):
+                self.assertEqual(ord(slide.ALPHA_TABLE[source * 16 + dest]),
+                                 slide.ALPHA_ARRAY[source, dest])
@@ -0,0 +1,83 @@
+import socket
+import unittest
+
+from mock import MagicMock
+
+from mpf.plugins.socket_events import SocketSender
+
+
+class TestSocketSender(unittest.TestCase):
+
+    def setUp(self):
+        self.sender = SocketSender(MagicMock(), 'test', 'localhost', 5050,
+                                   queue_size=3)
+        self.sender.log = MagicMock()
+        self.socket = MagicMock()
+        self.sender._connect = MagicMock(side_effect=self._connect)
+
+    def _connect(self):
+        self.sender.client_socket = self.socket
+        return True
+
+    def _run(self):
+        # run the sending loop in this thread. It returns once it gets to the
+        # None that stop() queued.
+        self.sender.run()
+        self.assertFalse(self.sender.machine.crash_queue.put.called)
+
+    def test_batching(self):
+        self.sender.send('one\n')
+        self.sender.send('two\n')
+        self.sender.stop()
+
+        self._run()
+
+        self.socket.sendall.assert_called_once_with('one\ntwo\n')
+        self.assertEqual(2, self.sender.get_stats()['sent'])
+        self.assertEqual(0, self.sender.get_stats()['queue_depth'])
+
+    def test_full_queue_drops_messages(self):
+        for x in range(5):
+            self.sender.send('%s\n' % x)
+
+        stats = self.sender.get_stats()
+        self.assertEqual(3, stats['queue_depth'])
+        self.assertEqual(2, stats['dropped'])
+
+        # only the first drop of a run is logged
+        self.assertEqual(1, self.sender.log.warning.call_count)
+
+        # once there's room again, the next drop is logged too
+        self.sender.queue.get_nowait()
+        self.sender.send('5\n')
+        self.sender.send('6\n')
+        self.assertEqual(3, self.sender.get_stats()['dropped'])
+        self.assertEqual(2, self.sender.log.warning.call_count)
+
+    def test_stop_flushes_full_queue(self):
+        for x in range(3):
+            self.sender.send('%s\n' % x)
+
+        # there's no room for the sentinel, but what's queued is still sent
+        self.sender.stop()
+        self._run()
+
+        self.socket.sendall.assert_called_once_with('0\n1\n2\n')
+        self.assertEqual(3, self.sender.get_stats()['sent'])
+        self.assertEqual(0, self.sender.get_stats()['dropped'])
+
+    def test_resend_after_lost_connection(self):
+        self.socket.sendall.side_effect = [socket.error, None]
+
+        self.sender.send('one\n')
+        self.sender.send('two\n')
+        self.sender.stop()
+
+        self._run()
+
+        # the whole backlog is sent again on the new connection
+        self.assertEqual(2, self.socket.sendall.call_count)
+        self.socket.sendall.assert_called_with('one\ntwo\n')
+        self.assertEqual(2, self.sender.get_stats()['sent'])
+        self.assertEqual(0, self.sender.get_stats()['dropped'])
+        self.assertEqual(2, self.sender._connect.call_count)
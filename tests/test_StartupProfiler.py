@@ -0,0 +1,64 @@
+import gc
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from mpf.system.startup_profiler import StartupProfiler
+
+
+class TestStartupProfiler(unittest.TestCase):
+
+    def test_disabled(self):
+        profiler = StartupProfiler()
+
+        with profiler.profile('phase1'):
+            pass
+
+        self.assertEqual([], profiler.entries)
+
+    def test_profile(self):
+        profiler = StartupProfiler(enabled=True)
+
+        # a collection of the garbage left by other tests would make the
+        # object count go down
+        gc.collect()
+        gc.disable()
+
+        try:
+            with profiler.profile('phase1'):
+                with profiler.profile('device1', 'devices'):
+                    data = [[] for _ in range(1000)]
+        finally:
+            gc.enable()
+
+        self.assertEqual(['device1', 'phase1'],
+                         [x['name'] for x in profiler.entries])
+
+        device1, phase1 = profiler.entries
+        self.assertEqual(('devices', 1, 'phase1'),
+                         (device1['category'], device1['depth'],
+                          device1['parent']))
+        self.assertEqual((0, None), (phase1['depth'], phase1['parent']))
+        self.assertGreaterEqual(device1['objects'], 1000)
+        self.assertGreaterEqual(phase1['secs'], device1['secs'])
+
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, 'logs', 'profile.json')
+            profiler.finish(filename)
+
+            with open(filename) as f:
+                profile = json.load(f)
+
+            # saved in the order the entries started
+            self.assertEqual(['phase1', 'device1'],
+                             [x['name'] for x in profile['entries']])
+            self.assertEqual(profiler.total_secs, profile['total_secs'])
+        finally:
+            shutil.rmtree(path)
+
+        report = profiler.get_report()
+        self.assertIn('phase:phase1', report[2])
+        self.assertIn('devices:device1', report[3])
@@ -0,0 +1,64 @@
+from mock import MagicMock
+
+from PygameTestCase import PygameTestCase
+
+try:
+    import pygame
+    from mpf.media_controller.core.slide import Slide
+    from mpf.media_controller.display_modules.dmd import dmd_palette
+    from mpf.media_controller.elements.virtualdmd import VirtualDMD
+except ImportError:
+    pygame = None
+
+
+class TestVirtualDMD(PygameTestCase):
+
+    def setUp(self):
+        self.dmd = MagicMock()
+        self.dmd.depth = 8
+        self.dmd.config = dict(shades=16)
+        self.dmd.change_count = 0
+        self.dmd_surface = pygame.Surface((4, 2), depth=8)
+        self.dmd_surface.set_palette(dmd_palette)
+        self.dmd.get_surface.return_value = self.dmd_surface
+
+        display = MagicMock()
+        display.width = 40
+        display.height = 20
+        display.depth = 24
+        display.palette = None
+        display.surface = pygame.Surface((40, 20), depth=24)
+        display.slides = list()
+
+        slide = Slide(mpfdisplay=display, machine=MagicMock())
+        self.element = VirtualDMD(slide, MagicMock(), dmd_object=self.dmd,
+                                  x=0, y=0, h_pos='left', v_pos='top',
+                                  width=40, height=20)
+
+    def test_unchanged_frames_are_skipped(self):
+        self.assertTrue(self.element.update())
+        self.assertFalse(self.element.update())
+
+        self.dmd.change_count += 1
+        self.assertTrue(self.element.update())
+        self.assertEqual(2, self.dmd.get_surface.call_count)
+
+    def test_scale_and_grid(self):
+        self.dmd_surface.fill((15, 0, 0))
+        self.dmd_surface.set_at((1, 0), (7, 0, 0))
+        self.element.update()
+
+        surface = self.element.element_surface
+        line = surface.map_rgb((0, 0, 0))
+
+        # shades are copied and the grid is drawn on top of them
+        self.assertEqual(15, surface.get_at_mapped((5, 5)))
+        self.assertEqual(7, surface.get_at_mapped((15, 5)))
+        self.assertEqual(line, surface.get_at_mapped((10, 5)))
+        self.assertEqual(line, surface.get_at_mapped((5, 10)))
+
+        # the grid is only drawn once
+        grid_surface = self.element.grid_surface
+        self.dmd.change_count += 1
+        self.element.update()
+        self.assertIs(grid_surface, self.element.grid_surface)
@@ -0,0 +1,145 @@
+# config_benchmark.py
+# Mission Pinball Framework
+# Written by Brian Madden & Gabe Knuth
+# Released under the MIT License. (See license info at the end of this file.)
+
+# Documentation and more info at http://missionpinball.com/mpf
+
+"""Times how long the config processor takes to validate a large machine
+config. Run it from the MPF root folder:
+
+    python tools/config_benchmark.py -d 500 -r 20
+
+The first round includes compiling the config_validator specs, so it's
+reported separately from the average of the following rounds.
+"""
+
+import copy
+import os
+import sys
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.abspath(os.curdir))
+
+from mpf.system.config import Config
+from mpf.system.file_manager import FileManager
+from mpf.system.timing import Timing
+
+
+class BenchmarkMachine(object):
+
+    def __init__(self, mpfconfigfile, num_switches):
+        FileManager.init()
+        self.config = Config.load_config_file(mpfconfigfile)
+        self.timing = Timing(self)
+
+        # device collections for the self.machine.xxx[%] validators
+        self.switches = dict(('switch{}'.format(i), object())
+                             for i in range(num_switches))
+        self.coils = dict()
+        self.lights = dict()
+        self.leds = dict()
+
+
+def build_devices(num_devices):
+    devices = list()
+
+    for i in range(num_devices):
+        if i % 2 == 0:
+            devices.append(('switches', 'switch{}'.format(i), dict(
+                number='{}/{}'.format(i / 16, i % 16),
+                type='NC' if i % 5 == 0 else 'NO',
+                tags='playfield_active, tag{}'.format(i % 7),
+                debounce_open='10ms',
+                activation_events='sw{0}_on, sw{0}_active'.format(i))))
+
+        elif i % 4 == 1:
+            devices.append(('coils', 'coil{}'.format(i), dict(
+                number='A0-B0-{}'.format(i % 32),
+                pulse_ms=str(10 + i % 30),
+                hold_power='4',
+                allow_enable='yes',
+                tags='coil_tag')))
+
+        else:
+            devices.append(('shots', 'shot{}'.format(i), dict(
+                switch='switch{}, switch{}'.format(i - 1, i - 3),
+                delay_switch={'switch{}'.format(i - 1): '2s'},
+                enable_events='ball_started, mode_start',
+                reset_events='ball_ending: 100ms',
+                time='1.5s',
+                tags='shot_tag')))
+
+    return devices
+
+
+def run_round(config_processor, devices):
+    start = time.time()
+
+    for section, name, settings in devices:
+        config_processor.process_config2(section, settings, name)
+
+    return time.time() - start
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-d", type=int, dest="devices", default=500,
+                        help="Number of devices to validate. Default is 500")
+    parser.add_argument("-r", type=int, dest="rounds", default=20,
+                        help="Number of times to validate the whole config. "
+                        "Default is 20")
+    parser.add_argument("-C", dest="mpfconfigfile",
+                        default=os.path.join("mpf", "mpfconfig.yaml"),
+                        help="The MPF framework default config file. Default "
+                        "is mpf/mpfconfig.yaml")
+    args = parser.parse_args()
+
+    machine = BenchmarkMachine(args.mpfconfigfile, args.devices)
+    config_processor = Config(machine)
+    devices = build_devices(args.devices)
+
+    first_round = run_round(config_processor, copy.deepcopy(devices))
+
+    timings = list()
+    for _ in range(max(args.rounds - 1, 1)):
+        timings.append(run_round(config_processor, copy.deepcopy(devices)))
+
+    average = sum(timings) / len(timings)
+
+    print "Validated {} devices, {} rounds".format(args.devices,
+                                                   len(timings) + 1)
+    print "First round (incl. compiling specs): {:.2f}ms".format(
+        first_round * 1000)
+    print "Average of other rounds: {:.2f}ms ({:.1f}us per device)".format(
+        average * 1000, average * 1000000 / args.devices)
+    print "Fastest round: {:.2f}ms".format(min(timings) * 1000)
+
+
+if __name__ == "__main__":
+    main()
+
+
+
+# The MIT License (MIT)
+
+# Copyright (c) 2013-2015 Brian Madden and Gabe Knuth
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
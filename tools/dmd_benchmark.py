@@ -0,0 +1,134 @@
+# dmd_benchmark.py
+# Mission Pinball Framework
+# Written by Brian Madden & Gabe Knuth
+# Released under the MIT License. (See license info at the end of this file.)
+
+# Documentation and more info at http://missionpinball.com/mpf
+
+"""Times the conversion of images to DMD surfaces. Run it from the MPF root
+folder:
+
+    python tools/dmd_benchmark.py -r 10
+
+It converts random 128x32 and 1920x1080 surfaces with NumPy (if it's
+installed) and with the lookup table version, and compares them with loading
+the converted image from a cached .dmd file. Use --per-pixel to also time the
+old per-pixel PixelArray conversion, which takes minutes for the large image.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+
+sys.path.insert(0, os.path.abspath(os.curdir))
+
+import pygame
+
+from mpf.media_controller.display_modules import dmd
+
+
+SIZES = ((128, 32), (1920, 1080))
+
+
+def per_pixel_to_dmd(surface, shades=16, weights=(.299, .587, .114)):
+    # the conversion as it was done before, for comparison
+    width, height = surface.get_size()
+    pa = pygame.PixelArray(surface)
+    new_surface = pygame.Surface((width, height), depth=8)
+    new_surface.set_palette(dmd.dmd_palette)
+    new_pa = pygame.PixelArray(new_surface)
+
+    for x in range(width):
+        for y in range(height):
+            pixel_color = surface.unmap_rgb(pa[x, y])
+            pixel_weight = ((pixel_color[0] * weights[0]) +
+                            (pixel_color[1] * weights[1]) +
+                            (pixel_color[2] * weights[2])) / 255.0
+
+            new_pa[x, y] = int(round(pixel_weight * (shades - 1)))
+
+    return new_pa.surface
+
+
+def time_it(rounds, method, *args):
+    timings = list()
+
+    for _ in range(rounds):
+        start = time.time()
+        method(*args)
+        timings.append(time.time() - start)
+
+    return min(timings) * 1000
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("-r", type=int, dest="rounds", default=10,
+                        help="Number of times to convert each image. The "
+                        "fastest round is reported. Default is 10")
+    parser.add_argument("--per-pixel", action="store_true", dest="per_pixel",
+                        help="Also time the old per-pixel conversion (one "
+                        "round only)")
+    args = parser.parse_args()
+
+    temp_path = tempfile.mkdtemp()
+
+    try:
+        for width, height in SIZES:
+            surface = pygame.image.fromstring(os.urandom(width * height * 4),
+                                              (width, height), 'RGBA')
+            rgba = pygame.image.tostring(surface, 'RGBA')
+            dmd_file = os.path.join(temp_path, 'image.dmd')
+            dmd.save_dmd_file(dmd_file, [dmd.surface_to_dmd(surface)])
+
+            print "{}x{}:".format(width, height)
+
+            if dmd.numpy:
+                print "  NumPy conversion:      {:10.2f}ms".format(
+                    time_it(args.rounds, dmd.rgba_to_shades_numpy, rgba))
+            else:
+                print "  NumPy conversion:      (NumPy is not installed)"
+
+            print "  Lookup table:          {:10.2f}ms".format(
+                time_it(args.rounds, dmd.rgba_to_shades, rgba))
+
+            print "  Load cached .dmd file: {:10.2f}ms".format(
+                time_it(args.rounds, dmd.load_dmd_file, dmd_file,
+                        dmd.dmd_palette))
+
+            if args.per_pixel:
+                print "  Per-pixel (old):       {:10.2f}ms".format(
+                    time_it(1, per_pixel_to_dmd, surface))
+
+    finally:
+        shutil.rmtree(temp_path)
+
+
+if __name__ == "__main__":
+    main()
+
+
+# The MIT License (MIT)
+
+# Copyright (c) 2013-2015 Brian Madden and Gabe Knuth
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.